@@ -0,0 +1,87 @@
+"""benchmark argparse against the fast parser for each ArgSpec shape
+
+both timings include parser construction, as in parse_raw_command
+
+usage: python benchmarks/arg_parsing_benchmark.py
+"""
+
+from __future__ import annotations
+
+import timeit
+import typing
+
+import toolcli
+from toolcli.command_utils.parsing import arg_parsing
+from toolcli.command_utils.parsing import fast_arg_parsing
+
+
+arg_shapes: typing.Mapping[str, tuple[toolcli.ArgSpec, list[str]]] = {
+    'positional': ({'name': 'target'}, ['x']),
+    'positional nargs *': ({'name': 'targets', 'nargs': '*'}, ['x', 'y']),
+    'store': ({'name': '--value'}, ['--value', 'x']),
+    'store type': ({'name': '--number', 'type': int}, ['--number', '3']),
+    'store choices': (
+        {'name': '--mode', 'choices': ['a', 'b']},
+        ['--mode', 'a'],
+    ),
+    'store dest': ({'name': '--value', 'dest': 'other'}, ['--value', 'x']),
+    'store_true': ({'name': '--flag', 'action': 'store_true'}, ['--flag']),
+    'store_false': ({'name': '--flag', 'action': 'store_false'}, ['--flag']),
+    'store_const': (
+        {'name': '--flag', 'action': 'store_const', 'const': 1},
+        ['--flag'],
+    ),
+    'count': ({'name': '-v', 'action': 'count'}, ['-v', '-v']),
+    'append': ({'name': '--tag', 'action': 'append'}, ['--tag', 'x']),
+    'nargs int': ({'name': '--pair', 'nargs': 2}, ['--pair', 'x', 'y']),
+    'nargs ?': ({'name': '--maybe', 'nargs': '?', 'const': 1}, ['--maybe']),
+    'nargs +': ({'name': '--items', 'nargs': '+'}, ['--items', 'x', 'y']),
+    'default': ({'name': '--value', 'default': 'x'}, []),
+}
+
+
+def main() -> None:
+    config = toolcli.create_config()
+    n_runs = 2000
+    print(
+        'arg shape'.ljust(20),
+        'argparse usec'.rjust(14),
+        'fast usec'.rjust(10),
+        'speedup'.rjust(8),
+    )
+    for name, (arg_spec, raw_args) in arg_shapes.items():
+        arg_specs = [arg_spec]
+        parse_spec: toolcli.ParseSpec = {
+            'command_index': None,
+            'command_sequence': None,
+            'command_spec': {'args': arg_specs},
+            'config': config,
+        }
+
+        def run_argparse() -> None:
+            parser = arg_parsing.create_arg_parser(
+                parse_spec, arg_specs, config
+            )
+            parser.parse_args(raw_args)
+
+        def run_fast() -> None:
+            fast_parser = fast_arg_parsing.compile_fast_parser(arg_specs)
+            if fast_parser is None:
+                raise Exception('shape not supported by fast parser')
+            if fast_arg_parsing.parse_args_fast(fast_parser, raw_args) is None:
+                raise Exception('fast parser fell back to argparse')
+
+        argparse_seconds = timeit.timeit(run_argparse, number=n_runs)
+        fast_seconds = timeit.timeit(run_fast, number=n_runs)
+        argparse_usec = argparse_seconds / n_runs * 1e6
+        fast_usec = fast_seconds / n_runs * 1e6
+        print(
+            name.ljust(20),
+            ('%.2f' % argparse_usec).rjust(14),
+            ('%.2f' % fast_usec).rjust(10),
+            ('%.1fx' % (argparse_usec / fast_usec)).rjust(8),
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""benchmark parse_command_sequence across command index sizes
+
+resolution time should stay flat as the number of sequences grows
+
+usage: python benchmarks/command_sequence_benchmark.py
+"""
+
+from __future__ import annotations
+
+import timeit
+
+import toolcli
+from toolcli.command_utils.parsing import command_parsing
+
+
+def create_command_index(n_sequences: int) -> toolcli.CommandIndex:
+    command_index = {}
+    for i in range(n_sequences):
+        sequence = ('group' + str(i % 30), 'command' + str(i))
+        command_index[sequence] = 'module_' + str(i)
+    return command_index
+
+
+def main() -> None:
+    config = toolcli.create_config()
+    print('n_sequences'.rjust(12), 'usec per parse'.rjust(16))
+    for n_sequences in [10, 100, 1000, 10000]:
+        command_index = create_command_index(n_sequences)
+        last = n_sequences - 1
+        raw_command = ['group' + str(last % 30), 'command' + str(last), '-x']
+        n_runs = 10000
+        seconds = timeit.timeit(
+            lambda: command_parsing.parse_command_sequence(
+                raw_command=raw_command,
+                command_index=command_index,
+                config=config,
+            ),
+            number=n_runs,
+        )
+        usec = seconds / n_runs * 1e6
+        print(str(n_sequences).rjust(12), ('%.2f' % usec).rjust(16))
+
+
+if __name__ == '__main__':
+    main()
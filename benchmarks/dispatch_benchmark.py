@@ -0,0 +1,340 @@
+"""benchmark suite for toolcli dispatch at scale
+
+generates synthetic command indexes of varying size, with commands of varied
+depths and arg counts, sequence aliases, and a plugin, then times each stage of
+dispatching a command and of rendering help
+
+results are printed as a table and, if --output is given, written as json
+along with the toolcli version, python version, and platform, so that runs of
+different releases can be compared
+
+usage: python benchmarks/dispatch_benchmark.py [--sizes N ...] [--output PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+import typing
+
+import toolcli
+from toolcli.command_utils import help_utils
+from toolcli.command_utils import parsing
+
+
+default_sizes = [10, 100, 1000, 10000]
+
+# filetree benchmarks write one file per command, so they use smaller sizes
+max_filetree_size = 1000
+
+n_groups = 30
+max_depth = 4
+max_args = 8
+
+
+#
+# # synthetic command indexes
+#
+
+
+def _command(**kwargs: typing.Any) -> None:
+    pass
+
+
+def _get_value() -> int:
+    return 1
+
+
+def create_arg_specs(n_args: int) -> list[toolcli.ArgSpec]:
+    """create n_args arg specs, cycling through common arg shapes"""
+    shapes: list[toolcli.ArgSpec] = [
+        {'name': 'target', 'help': 'target of command'},
+        {'name': '--flag', 'action': 'store_true', 'help': 'a flag'},
+        {'name': '--number', 'type': int, 'help': 'a number'},
+        {'name': '--items', 'nargs': '+', 'help': 'some items'},
+        {'name': ['-m', '--mode'], 'choices': ['a', 'b'], 'help': 'a mode'},
+        {'name': '--verbose', 'action': 'count', 'help': 'verbosity'},
+        {'name': '--name', 'default': 'x', 'help': 'a name'},
+        {'name': '--tag', 'action': 'append', 'help': 'a tag'},
+    ]
+    return shapes[:n_args]
+
+
+def get_raw_args(n_args: int) -> list[str]:
+    """get raw args that use each of the first n_args arg shapes"""
+    raw_args = [
+        ['x'],
+        ['--flag'],
+        ['--number', '3'],
+        ['--items', 'y', 'z'],
+        ['-m', 'a'],
+        ['--verbose', '--verbose'],
+        ['--name', 'y'],
+        ['--tag', 'z'],
+    ]
+    return [arg for args in raw_args[:n_args] for arg in args]
+
+
+def get_sequence(i: int) -> toolcli.CommandSequence:
+    """get sequence of i-th command, with depths from 1 to max_depth"""
+    depth = 1 + i % max_depth
+    tokens = ['group' + str(i % n_groups)]
+    for level in range(1, depth - 1):
+        tokens.append('level' + str(level) + '_' + str(i % (level + 4)))
+    tokens.append('command' + str(i))
+    return tuple(tokens[-depth:])
+
+
+def create_command_index(n_sequences: int) -> toolcli.CommandIndex:
+    """create index of dict command specs with varied depths and args"""
+    command_index: toolcli.CommandIndex = {}
+    for i in range(n_sequences):
+        command_spec: toolcli.CommandSpec = {
+            'f': _command,
+            'help': 'help of command ' + str(i),
+            'args': create_arg_specs(i % (max_args + 1)),
+        }
+        if i % 2 == 0:
+            command_spec['extra_data'] = ['value']
+        command_index[get_sequence(i)] = command_spec
+    return command_index
+
+
+def create_config(n_sequences: int) -> toolcli.CLIConfig:
+    """create config with aliases, a plugin, and extra_data getters"""
+    plugin_index: toolcli.CommandIndex = {
+        ('plugin', 'command' + str(i)): {'f': _command, 'help': 'plugin'}
+        for i in range(max(1, n_sequences // 100))
+    }
+    return {
+        'base_command': 'bench',
+        'description': 'synthetic cli with ' + str(n_sequences) + ' commands',
+        'include_standard_subcommands': True,
+        'command_sequence_aliases': {('g0',): ('group0',)},
+        'plugins': [{'command_index': plugin_index, 'help_category': 'plugin'}],
+        'help_subcommand_categories': {},
+        'extra_data_getters': {'value': _get_value},
+        'cache_extra_data': False,
+        'help_renderer': 'plain',
+    }
+
+
+def get_target(n_sequences: int) -> tuple[toolcli.CommandSequence, int]:
+    """get deepest command with the most args among the last commands"""
+    for i in reversed(range(n_sequences)):
+        if i % max_depth == max_depth - 1 or n_sequences < max_depth:
+            if i % (max_args + 1) == max_args or i < max_args + 1:
+                return get_sequence(i), i % (max_args + 1)
+    return get_sequence(n_sequences - 1), (n_sequences - 1) % (max_args + 1)
+
+
+def create_command_package(root: str, name: str, n_sequences: int) -> None:
+    """write package with one command module per sequence"""
+    source = (
+        'def get_command_spec():\n'
+        "    return {'f': lambda: None, 'help': 'help'}\n"
+    )
+    package_path = os.path.join(root, name)
+    os.makedirs(package_path)
+    open(os.path.join(package_path, '__init__.py'), 'w').close()
+    for i in range(n_sequences):
+        sequence = get_sequence(i)
+        dirpath = os.path.join(package_path, *sequence[:-1])
+        if len(sequence) == 1:
+            dirpath = os.path.join(package_path, 'root')
+        os.makedirs(dirpath, exist_ok=True)
+        path = os.path.join(dirpath, sequence[-1] + '_command.py')
+        with open(path, 'w') as f:
+            f.write(source)
+
+
+#
+# # benchmarks
+#
+
+
+def get_benchmarks(
+    n_sequences: int,
+    tmpdir: str,
+) -> dict[str, typing.Callable[[], typing.Any]]:
+    """get benchmark functions for a synthetic cli with n_sequences"""
+
+    command_index = create_command_index(n_sequences)
+    config = toolcli.create_config(create_config(n_sequences))
+    target, n_args = get_target(n_sequences)
+    raw_command = list(target) + get_raw_args(n_args)
+
+    parse_spec = parsing.create_parse_spec(
+        raw_command=raw_command,
+        command_index=command_index,
+        command_sequence=None,
+        command_spec=None,
+        config=config,
+    )
+    prepared_index = parse_spec['command_index']
+    assert prepared_index is not None
+    args = parsing.parse_raw_command(raw_command, parse_spec)
+    prefix = target[:1]
+    prefix_parse_spec = dict(parse_spec, command_sequence=prefix)
+
+    def create_parse_spec() -> None:
+        parsing.create_parse_spec(
+            raw_command=raw_command,
+            command_index=command_index,
+            command_sequence=None,
+            command_spec=None,
+            config=config,
+        )
+
+    def render(function: typing.Callable[..., None], *args: typing.Any) -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(*args)
+
+    benchmarks: dict[str, typing.Callable[[], typing.Any]] = {
+        'create_parse_spec': create_parse_spec,
+        'parse_command_sequence': lambda: parsing.parse_command_sequence(
+            raw_command=raw_command,
+            command_index=prepared_index,
+            config=config,
+        ),
+        'add_command_sequence_aliases': lambda: (
+            parsing.add_command_sequence_aliases(command_index, config)
+        ),
+        'parse_raw_command': lambda: parsing.parse_raw_command(
+            raw_command, parse_spec
+        ),
+        'get_function_args': lambda: parsing.get_function_args(
+            parse_spec, args
+        ),
+        'root_help': lambda: render(
+            help_utils.print_root_command_help, parse_spec
+        ),
+        'subcommand_help': lambda: render(
+            help_utils.print_subcommand_help, parse_spec
+        ),
+        'prefix_help': lambda: render(
+            help_utils.print_prefix_help, prefix, prefix_parse_spec
+        ),
+    }
+
+    # filetree benchmarks
+    if n_sequences <= max_filetree_size:
+        package_name = 'toolcli_benchmark_package_' + str(n_sequences)
+        create_command_package(tmpdir, package_name, n_sequences)
+        cache_dir = os.path.join(tmpdir, 'index_cache')
+        parsing.filetree_to_command_index(package_name, cache_dir=cache_dir)
+        benchmarks['filetree_to_command_index'] = lambda: (
+            parsing.filetree_to_command_index(package_name)
+        )
+        benchmarks['filetree_to_command_index cached'] = lambda: (
+            parsing.filetree_to_command_index(package_name, cache_dir=cache_dir)
+        )
+
+    return benchmarks
+
+
+def time_benchmark(
+    function: typing.Callable[[], typing.Any],
+    repeat: int,
+    min_seconds: float,
+) -> dict[str, typing.Any]:
+    """time function, choosing number of calls per run like timeit.autorange"""
+
+    timer = timeit.Timer(function)
+    number = 1
+    while True:
+        seconds = timer.timeit(number)
+        if seconds >= min_seconds:
+            break
+        number *= 10 if seconds < min_seconds / 10 else 2
+    runs = [seconds / number * 1e6 for seconds in timer.repeat(repeat, number)]
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min_usec': min(runs),
+        'median_usec': statistics.median(runs),
+        'max_usec': max(runs),
+    }
+
+
+def run_benchmarks(
+    sizes: typing.Sequence[int],
+    repeat: int,
+    min_seconds: float,
+    only: typing.Sequence[str] | None = None,
+) -> list[dict[str, typing.Any]]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        sys.path.insert(0, tmpdir)
+        try:
+            for n_sequences in sizes:
+                benchmarks = get_benchmarks(n_sequences, tmpdir)
+                for name, function in benchmarks.items():
+                    if only and name not in only:
+                        continue
+                    result = time_benchmark(function, repeat, min_seconds)
+                    result = dict(
+                        benchmark=name, n_sequences=n_sequences, **result
+                    )
+                    results.append(result)
+                    print(
+                        name.ljust(34),
+                        str(n_sequences).rjust(12),
+                        ('%.2f' % result['min_usec']).rjust(14),
+                        ('%.2f' % result['median_usec']).rjust(14),
+                    )
+        finally:
+            sys.path.remove(tmpdir)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=default_sizes)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--min-seconds',
+        type=float,
+        default=0.05,
+        help='minimum duration of each timed run',
+    )
+    parser.add_argument('--only', nargs='+', help='names of benchmarks to run')
+    parser.add_argument('--output', help='path of json results file')
+    args = parser.parse_args()
+
+    print(
+        'benchmark'.ljust(34),
+        'n_sequences'.rjust(12),
+        'min usec'.rjust(14),
+        'median usec'.rjust(14),
+    )
+    results = run_benchmarks(
+        sizes=args.sizes,
+        repeat=args.repeat,
+        min_seconds=args.min_seconds,
+        only=args.only,
+    )
+
+    if args.output is not None:
+        report = {
+            'toolcli_version': toolcli.__version__,
+            'python_version': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import toolcli
+from toolcli.command_utils.parsing import arg_parsing
+
+
+def _create_parse_spec(arg_specs):
+    return {
+        'command_index': None,
+        'command_sequence': ('go',),
+        'command_spec': {'args': arg_specs},
+        'config': toolcli.create_config({'base_command': 'tool'}),
+    }
+
+
+def test_parser_cache_reuses_parser():
+    arg_parsing.reset_parser_cache()
+    arg_specs = [{'name': 'x'}, {'name': '--flag', 'action': 'store_true'}]
+    parse_spec = _create_parse_spec(arg_specs)
+    config = parse_spec['config']
+
+    first = arg_parsing.get_arg_parser(parse_spec, arg_specs, config)
+    equal_specs = [dict(arg_spec) for arg_spec in arg_specs]
+    other_parse_spec = _create_parse_spec(equal_specs)
+    second = arg_parsing.get_arg_parser(other_parse_spec, equal_specs, config)
+    assert first is second
+    assert second.parse_spec is other_parse_spec
+
+    different_specs = arg_specs + [{'name': '--other'}]
+    third = arg_parsing.get_arg_parser(parse_spec, different_specs, config)
+    assert third is not first
+
+    arg_parsing.reset_parser_cache()
+    fourth = arg_parsing.get_arg_parser(parse_spec, arg_specs, config)
+    assert fourth is not first
+
+
+def test_parser_cache_freezes_sets_and_skips_unhashable_values():
+    arg_parsing.reset_parser_cache()
+    parse_spec = _create_parse_spec([])
+    config = parse_spec['config']
+
+    set_specs = [{'name': '--mode', 'choices': {'fast', 'slow'}}]
+    first = arg_parsing.get_arg_parser(parse_spec, set_specs, config)
+    equal_specs = [{'name': '--mode', 'choices': {'slow', 'fast'}}]
+    assert arg_parsing.get_arg_parser(parse_spec, equal_specs, config) is first
+    other_specs = [{'name': '--mode', 'choices': {'fast'}}]
+    other = arg_parsing.get_arg_parser(parse_spec, other_specs, config)
+    assert other is not first
+
+    class Choices:
+        __hash__ = None
+
+        def __init__(self, values):
+            self.values = values
+
+        def __contains__(self, value):
+            return value in self.values
+
+        def __iter__(self):
+            return iter(self.values)
+
+    choices = Choices(['a'])
+    unhashable_specs = [{'name': '--mode', 'choices': choices}]
+    assert arg_parsing.get_arg_specs_fingerprint(unhashable_specs) is None
+    parser = arg_parsing.get_arg_parser(parse_spec, unhashable_specs, config)
+    other = arg_parsing.get_arg_parser(parse_spec, unhashable_specs, config)
+    assert other is not parser
+    assert len(arg_parsing._parser_cache) == 2
+
+
+def test_parse_raw_command_with_cached_parser():
+    arg_parsing.reset_parser_cache()
+    arg_specs = [{'name': 'x'}, {'name': '--flag', 'action': 'store_true'}]
+    parse_spec = _create_parse_spec(arg_specs)
+    for raw_command, expected in [
+        ('go a --flag', {'x': 'a', 'flag': True}),
+        ('go b', {'x': 'b', 'flag': False}),
+    ]:
+        parsed = arg_parsing.parse_raw_command(raw_command, parse_spec)
+        assert parsed == expected
@@ -0,0 +1,340 @@
+import pytest
+
+import toolcli
+from toolcli.command_utils.parsing import command_parsing
+
+
+command_index = {
+    (): 'root_module',
+    ('a',): 'a_module',
+    ('a', 'b'): 'a_b_module',
+    ('a', 'b', 'c'): 'a_b_c_module',
+    ('x', 'y'): 'x_y_module',
+    ('help',): 'help_module',
+    ('version',): 'version_module',
+}
+
+
+@pytest.mark.parametrize(
+    'raw_command,expected',
+    [
+        ('', ()),
+        ('a', ('a',)),
+        ('a b', ('a', 'b')),
+        ('a b c d', ('a', 'b', 'c')),
+        ('a --flag b', ('a', 'b')),
+        ('a z', ('a',)),
+        ('x', ()),
+        ('x y', ('x', 'y')),
+        ('a b -h', ('help',)),
+        ('--version', ('version',)),
+    ],
+)
+def test_parse_command_sequence(raw_command, expected):
+    config = toolcli.create_config()
+    sequence = command_parsing.parse_command_sequence(
+        raw_command=raw_command,
+        command_index=command_index,
+        config=config,
+    )
+    assert sequence == expected
+
+
+def test_parse_command_sequence_unsorted():
+    config = toolcli.create_config({'sort_command_index': False})
+    sequence = command_parsing.parse_command_sequence(
+        raw_command='a b c',
+        command_index=command_index,
+        config=config,
+    )
+    assert sequence == ()
+
+
+def test_parse_command_sequence_default():
+    index = {('a',): 'a_module'}
+    config = toolcli.create_config({'default_command_sequence': ('a',)})
+    sequence = command_parsing.parse_command_sequence(
+        raw_command='b',
+        command_index=index,
+        config=config,
+    )
+    assert sequence == ('a',)
+
+
+def test_command_trie_rebuilt_after_mutation():
+    index = {('a',): 'a_module'}
+    config = toolcli.create_config()
+    assert command_parsing.parse_command_sequence('a b', index, config) == (
+        'a',
+    )
+    index[('a', 'b')] = 'a_b_module'
+    assert command_parsing.parse_command_sequence('a b', index, config) == (
+        'a',
+        'b',
+    )
+
+
+def test_command_trie_rebuilt_after_same_length_mutation():
+    config = toolcli.create_config()
+    index = {('a',): 'a_module'}
+    layered = toolcli.command_utils.parsing.add_command_index_layer(
+        {}, {('c',): 'c_module'}
+    )
+    command_parsing.parse_command_sequence('a', index, config)
+    command_parsing.parse_command_sequence('c', layered, config)
+    for command_index in [index, layered]:
+        descendants = command_parsing.get_command_descendants(command_index, ())
+        assert ('b',) not in descendants
+
+    # plain mappings are only checked by length, so reset them explicitly
+    del index[('a',)]
+    index[('b',)] = 'b_module'
+    command_parsing.reset_command_trie_cache(index)
+    layered[('b',)] = 'b_module'
+    del layered[('c',)]
+
+    for command_index in [index, layered]:
+        assert command_parsing.parse_command_sequence(
+            'b', command_index, config
+        ) == ('b',)
+        descendants = command_parsing.get_command_descendants(command_index, ())
+        assert ('b',) in descendants
+
+
+def test_layered_command_index_views_share_generation():
+    config = toolcli.create_config()
+    parent = toolcli.command_utils.parsing.add_command_index_layer(
+        {('a',): 'a_module'}
+    )
+    child = toolcli.command_utils.parsing.add_command_index_layer(parent)
+    assert command_parsing.get_command_descendants(child, ()) == [('a',)]
+
+    parent[('b',)] = 'b_module'
+    assert child.generation == parent.generation == 1
+    assert command_parsing.get_command_descendants(child, ()) == [
+        ('a',),
+        ('b',),
+    ]
+
+    parent.pop(('b',))
+    child[('c',)] = 'c_module'
+    assert command_parsing.parse_command_sequence('c', child, config) == (
+        'c',
+    )
+    assert command_parsing.get_command_descendants(child, ()) == [
+        ('a',),
+        ('c',),
+    ]
+
+
+def test_command_prefix_index():
+    index = {
+        ('a',): 'a',
+        ('a', 'b'): 'ab',
+        ('c',): 'c',
+        ('a', 'b', 'd'): 'abd',
+        ('a', 'e'): 'ae',
+    }
+    prefix_index = command_parsing.build_command_prefix_index(index)
+    assert prefix_index['descendants'][()] == list(index.keys())
+    assert prefix_index['descendants'][('a',)] == [
+        ('a',),
+        ('a', 'b'),
+        ('a', 'b', 'd'),
+        ('a', 'e'),
+    ]
+    assert prefix_index['descendants'][('c',)] == [('c',)]
+
+    assert command_parsing.get_command_descendants(index, ('x',)) == []
+    assert command_parsing.get_command_prefix_index(
+        index
+    ) is command_parsing.get_command_prefix_index(index)
+
+
+@pytest.mark.parametrize(
+    'raw_command,expected',
+    [
+        ('aa', ('a',)),
+        ('aa b', ('a', 'b')),
+        ('ab c', ('a', 'b', 'c')),
+        ('ab z', ('a', 'b')),
+        ('x y', ('x', 'y')),
+        ('xy', ()),
+    ],
+)
+def test_parse_command_sequence_aliases(raw_command, expected):
+    aliases = {('aa',): ('a',), ('ab',): ('a', 'b'), ('xy',): ('x', 'z')}
+    config = toolcli.create_config({'command_sequence_aliases': aliases})
+    sequence = command_parsing.parse_command_sequence(
+        raw_command=raw_command,
+        command_index=command_index,
+        config=config,
+    )
+    assert sequence == expected
+
+
+def test_add_command_sequence_aliases():
+    aliases = {('aa',): ('a',), ('x',): ('a',), ('z',): ('missing',)}
+    config = toolcli.create_config({'command_sequence_aliases': aliases})
+    expanded = toolcli.command_utils.parsing.add_command_sequence_aliases(
+        command_index, config
+    )
+    assert expanded[('aa',)] == 'a_module'
+    assert expanded[('aa', 'b')] == 'a_b_module'
+    assert expanded[('aa', 'b', 'c')] == 'a_b_c_module'
+    assert expanded[('x', 'b', 'c')] == 'a_b_c_module'
+    assert expanded[('x',)] == 'a_module'
+    assert expanded[('x', 'y')] == 'x_y_module'
+    assert len(expanded) == len(command_index) + 6
+
+
+def test_layered_command_index():
+    base = {('a',): 'a_module', ('b',): 'b_module'}
+    layered = toolcli.command_utils.parsing.add_command_index_layer(
+        base, {('c',): 'c_module'}
+    )
+    layered = toolcli.command_utils.parsing.add_command_index_layer(layered)
+    layered[('d',)] = 'd_module'
+    assert list(layered) == [('a',), ('b',), ('c',), ('d',)]
+    assert len(layered) == 4
+    assert layered[('c',)] == 'c_module'
+    assert base == {('a',): 'a_module', ('b',): 'b_module'}
+    with pytest.raises(Exception):
+        layered[('a',)] = 'other_module'
+
+
+def test_prepare_command_index_does_not_copy_index():
+    base = {('a',): 'a_module'}
+    config = toolcli.create_config(
+        {
+            'plugins': [{'command_index': {('a',): 'x', ('p',): 'p_module'}}],
+            'include_standard_subcommands': [('help',)],
+        }
+    )
+    index = command_parsing.prepare_command_index(base, config)
+    assert index is not None
+    assert list(index) == [('a',), ('p',), ('help',)]
+    assert index[('a',)] == 'a_module'
+    assert index.maps[-1] is base
+    assert base == {('a',): 'a_module'}
+
+
+@pytest.mark.parametrize('sort', [True, False])
+@pytest.mark.parametrize('raw_command', ['a b c d', 'a z', 'x y', 'b'])
+def test_parse_command_sequence_layered(sort, raw_command):
+    items = list(command_index.items())
+    layered = toolcli.command_utils.parsing.add_command_index_layer(
+        dict(items[3:]), dict(items[1:3])
+    )
+    layered = toolcli.command_utils.parsing.add_command_index_layer(
+        layered, dict(items[:1])
+    )
+    config = toolcli.create_config({'sort_command_index': sort})
+    expected = command_parsing.parse_command_sequence(
+        raw_command=raw_command,
+        command_index=dict(layered),
+        config=config,
+    )
+    sequence = command_parsing.parse_command_sequence(
+        raw_command=raw_command,
+        command_index=layered,
+        config=config,
+    )
+    assert sequence == expected
+
+
+def test_resolve_command_spec_cache():
+    calls = []
+
+    def get_command_spec():
+        calls.append(None)
+        return {'f': lambda: None}
+
+    def get_dynamic_spec():
+        calls.append(None)
+        return {'f': lambda: None, 'dynamic': True}
+
+    command_parsing.reset_command_spec_cache()
+    first = command_parsing.resolve_command_spec(get_command_spec)
+    assert command_parsing.resolve_command_spec(get_command_spec) is first
+    assert len(calls) == 1
+    command_parsing.resolve_command_spec(get_command_spec, use_cache=False)
+    assert len(calls) == 2
+    command_parsing.reset_command_spec_cache()
+    assert command_parsing.resolve_command_spec(get_command_spec) is not first
+    assert len(calls) == 3
+
+    command_parsing.resolve_command_spec(get_dynamic_spec)
+    command_parsing.resolve_command_spec(get_dynamic_spec)
+    assert len(calls) == 5
+
+
+def test_reload_command_spec(tmp_path, monkeypatch):
+    source = (
+        'def get_command_spec():\n'
+        '    return {"help": "%s", "f": ["reload_spec_module", "f"]}\n'
+        'def f():\n'
+        '    return "%s"\n'
+    )
+    (tmp_path / 'reload_spec_module.py').write_text(source % ('first', 1))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    reference = 'reload_spec_module'
+    command_spec = command_parsing.resolve_command_spec(reference)
+    assert command_spec['help'] == 'first'
+    execution = toolcli.command_utils.execution
+    assert execution.resolve_function(command_spec['f'])() == '1'
+
+    (tmp_path / 'reload_spec_module.py').write_text(source % ('second!', 22))
+    assert command_parsing.resolve_command_spec(reference)['help'] == 'first'
+    reloaded = command_parsing.reload_command_spec(reference)
+    assert reloaded['help'] == 'second!'
+    assert command_parsing.resolve_command_spec(reference)['help'] == 'second!'
+    assert execution.resolve_function(reloaded['f'])() == '22'
+
+
+def test_warm_import(tmp_path, monkeypatch):
+    import sys
+    import threading
+
+    (tmp_path / 'warm_command_module.py').write_text(
+        'def get_command_spec():\n'
+        '    return {"f": ["warm_function_module", "f"],'
+        ' "imports": ["warm_extra_module"]}\n'
+    )
+    record_thread = (
+        'import threading\n'
+        'import_thread = threading.current_thread()\n'
+    )
+    (tmp_path / 'warm_function_module.py').write_text(
+        record_thread + 'def f():\n    pass\n'
+    )
+    (tmp_path / 'warm_extra_module.py').write_text(record_thread)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    config = toolcli.create_config({'warm_import': True})
+    parse_spec = command_parsing.create_parse_spec(
+        raw_command='run',
+        command_index={('run',): 'warm_command_module'},
+        command_sequence=None,
+        command_spec=None,
+        config=config,
+    )
+    assert parse_spec['command_sequence'] == ('run',)
+    assert command_parsing.get_command_spec_imports(
+        parse_spec['command_spec']
+    ) == ['warm_function_module', 'warm_extra_module']
+
+    # modules are imported off the main thread before the command executes
+    for thread in threading.enumerate():
+        if thread.name == 'toolcli-warm-import':
+            thread.join()
+    for module_name in ['warm_function_module', 'warm_extra_module']:
+        import_thread = sys.modules[module_name].import_thread
+        assert import_thread is not threading.main_thread()
+
+    (tmp_path / 'warm_other_module.py').write_text('')
+    thread = command_parsing.start_warm_import(['warm_other_module'])
+    assert thread is not None
+    thread.join()
+    assert 'warm_other_module' in sys.modules
+    assert command_parsing.start_warm_import(['warm_other_module']) is None
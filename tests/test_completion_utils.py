@@ -0,0 +1,124 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import toolcli
+from toolcli.command_utils import completion_utils
+
+
+def _complete_branch(prefix):
+    return ['main', 'dev', 'feature']
+
+
+command_index = {
+    ('remote', 'add'): {
+        'f': lambda: None,
+        'args': [
+            {'name': 'name'},
+            {'name': '--branch', 'completer': _complete_branch},
+            {'name': ['-m', '--mode'], 'choices': ['fetch', 'push']},
+            {'name': '--force', 'action': 'store_true'},
+            {'name': '--secret', 'hidden': True},
+        ],
+    },
+    ('remote', 'remove'): {'f': lambda: None},
+    ('status',): {'f': lambda: None},
+}
+
+
+@pytest.mark.parametrize(
+    'words,expected',
+    [
+        ([''], ['remote', 'status']),
+        (['re'], ['remote']),
+        (['remote', ''], ['add', 'remove']),
+        (['remote', 'add', '--'], ['--branch', '--mode', '--force']),
+        (['remote', 'add', '-'], ['--branch', '-m', '--mode', '--force']),
+        (['remote', 'add', '--mode', ''], ['fetch', 'push']),
+        (['remote', 'add', '--mode=p'], ['--mode=push']),
+        (['remote', 'add', '--branch', 'd'], ['dev']),
+        (['remote', 'add', '--force', ''], []),
+        (['status', '--'], []),
+        (['unknown', ''], []),
+    ],
+)
+def test_get_completions(words, expected):
+    config = toolcli.create_config()
+    completions = completion_utils.get_completions(
+        words=words, command_index=command_index, config=config
+    )
+    assert completions == expected
+
+
+@pytest.mark.parametrize('shell', ['bash', 'zsh', 'fish'])
+def test_get_completion_script(shell):
+    script = completion_utils.get_completion_script(shell, 'my-tool')
+    assert 'my-tool' in script
+    assert completion_utils.completion_env_var + '=' + shell in script
+
+
+def test_completion_does_not_import_rich_or_modules():
+    code = '\n'.join(
+        [
+            'import sys, toolcli',
+            'toolcli.run_cli(',
+            '    ["cli", "comp"],',
+            '    command_index={("a",): "some_missing_module"},',
+            '    config={"include_standard_subcommands": True},',
+            ')',
+            'assert "rich" not in sys.modules',
+            'assert "argparse" not in sys.modules',
+            'assert "some_missing_module" not in sys.modules',
+        ]
+    )
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.path.dirname(toolcli.__path__[0])
+    env[completion_utils.completion_env_var] = 'bash'
+    result = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True, env=env
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == 'completion\n'
+
+
+def test_completion_reads_specs_statically(tmp_path, monkeypatch):
+    package = tmp_path / 'completion_pkg'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    (package / 'some_command.py').write_text(
+        'def get_command_spec():\n'
+        '    return {\n'
+        "        'f': None,\n"
+        "        'args': [\n"
+        "            {'name': '--mode', 'choices': ['fast', 'slow']},\n"
+        "            {'name': '--path', 'completer': lambda prefix: ['x']},\n"
+        "            {'name': '--n', 'type': int},\n"
+        "            {'name': 'target', 'nargs': '?'},\n"
+        '        ],\n'
+        '    }\n'
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    toolcli.command_utils.parsing.reset_static_spec_cache()
+
+    command_index = {('some',): 'completion_pkg.some_command'}
+    config = toolcli.create_config()
+    assert completion_utils.get_completions(
+        ['some', '--'], command_index, config
+    ) == ['--mode', '--path', '--n']
+    assert completion_utils.get_completions(
+        ['some', '--mode', 's'], command_index, config
+    ) == ['slow']
+    assert completion_utils.get_completions(
+        ['some', '--n', ''], command_index, config
+    ) == []
+    assert completion_utils.get_completions(
+        ['some', ''], command_index, config
+    ) == []
+    assert 'completion_pkg.some_command' not in sys.modules
+
+    assert completion_utils.get_completions(
+        ['some', '--path', ''], command_index, config
+    ) == ['x']
+    assert 'completion_pkg.some_command' in sys.modules
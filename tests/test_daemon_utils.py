@@ -0,0 +1,145 @@
+import os
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+import toolcli
+
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, 'AF_UNIX') or not hasattr(os, 'fork'),
+    reason='requires unix sockets and fork',
+)
+
+daemon_script = textwrap.dedent(
+    '''
+    import os
+    import sys
+    import toolcli
+
+    def echo_command(words, fail):
+        print(os.getcwd(), os.environ.get('TOOLCLI_TEST_VALUE'), *words)
+        if fail:
+            raise Exception('failed')
+
+    command_index = {
+        ('echo',): {
+            'f': echo_command,
+            'args': [
+                {'name': 'words', 'nargs': '*'},
+                {'name': '--fail', 'action': 'store_true'},
+            ],
+        },
+    }
+    toolcli.run_daemon(
+        sys.argv[1],
+        command_index=command_index,
+        config={
+            'base_command': 'tool',
+            'include_standard_subcommands': [('cd',)],
+            'cd_dir_getter': lambda dirname: '/destination/' + dirname,
+        },
+    )
+    '''
+)
+
+
+@pytest.fixture
+def daemon_socket(tmp_path):
+    socket_path = str(tmp_path / 'daemon.sock')
+    package_root = os.path.dirname(toolcli.__path__[0])
+    env = dict(os.environ, PYTHONPATH=package_root)
+    process = subprocess.Popen(
+        [sys.executable, '-c', daemon_script, socket_path], env=env
+    )
+    for _ in range(100):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.05)
+    yield socket_path
+    process.terminate()
+    process.wait()
+
+
+def test_run_client_without_daemon(tmp_path):
+    socket_path = str(tmp_path / 'missing.sock')
+    assert toolcli.run_client(socket_path, ['echo']) is None
+
+
+def test_run_client(daemon_socket, tmp_path, capfd, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('TOOLCLI_TEST_VALUE', 'forwarded')
+
+    exit_code = toolcli.run_client(daemon_socket, ['echo', 'a', 'b'])
+    assert exit_code == 0
+    out, _ = capfd.readouterr()
+    assert out == str(tmp_path) + ' forwarded a b\n'
+
+    exit_code = toolcli.run_client(daemon_socket, ['echo', '--fail'])
+    assert exit_code == 1
+    out, _ = capfd.readouterr()
+    assert 'failed' in out
+
+    exit_code = toolcli.run_client(daemon_socket, ['echo', '--unknown'])
+    assert exit_code == 2
+
+
+def test_run_client_cd_protocol(daemon_socket, tmp_path):
+    tempfile = str(tmp_path / 'cd_destination')
+    raw_command = ['cd', 'docs', '--cd-destination-tempfile', tempfile]
+    exit_code = toolcli.run_client(daemon_socket, raw_command)
+    assert exit_code == 0
+    with open(tempfile) as f:
+        assert f.read() == '/destination/docs'
+
+
+def test_daemon_socket_permissions(daemon_socket):
+    import stat
+
+    from toolcli import daemon_utils
+
+    assert stat.S_IMODE(os.stat(daemon_socket).st_mode) == 0o600
+    with pytest.raises(Exception):
+        daemon_utils._remove_stale_socket(daemon_socket)
+
+
+def test_daemon_refuses_to_replace_other_files(tmp_path):
+    from toolcli import daemon_utils
+
+    path = tmp_path / 'not_a_socket'
+    path.write_text('data')
+    with pytest.raises(Exception):
+        daemon_utils._remove_stale_socket(str(path))
+    assert path.read_text() == 'data'
+
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(tmp_path / 'stale.sock'))
+    stale.close()
+    daemon_utils._remove_stale_socket(str(tmp_path / 'stale.sock'))
+    assert not os.path.exists(tmp_path / 'stale.sock')
+
+
+def test_preload_commands_with_uncopyable_extra_data():
+    import threading
+
+    from toolcli import daemon_utils
+
+    categories: dict = {}
+    config = {
+        'base_command': 'tool',
+        'extra_data': {'lock': threading.Lock()},
+        'help_subcommand_categories': categories,
+        'plugins': [
+            {
+                'command_index': {('plugin',): {'f': lambda: None}},
+                'help_category': 'plugin',
+            },
+        ],
+    }
+    command_index = {('a',): {'f': lambda lock: None}}
+    daemon_utils._preload_commands(command_index, None, config)
+    assert categories == {}
@@ -0,0 +1,339 @@
+import os
+
+import toolcli
+
+
+def greet_command(name, shout):
+    message = 'hello ' + name
+    if shout:
+        message = message.upper()
+    print(message)
+
+
+def fail_command():
+    raise Exception('failed')
+
+
+command_index = {
+    ('greet',): {
+        'f': greet_command,
+        'args': [
+            {'name': 'name'},
+            {'name': '--shout', 'action': 'store_true'},
+        ],
+    },
+    ('fail',): {'f': fail_command},
+}
+
+
+def test_run_many():
+    results = toolcli.run_many(
+        ['greet a', 'greet b --shout', 'fail', 'greet'],
+        command_index=command_index,
+        config={'base_command': 'tool'},
+    )
+    assert [result['exit_code'] for result in results] == [0, 0, 1, 2]
+    assert results[0]['stdout'] == 'hello a\n'
+    assert results[1]['stdout'] == 'HELLO B\n'
+    assert results[2]['exception'].args[0] == 'failed'
+    assert not results[3]['success']
+    assert 'required' in results[3]['stderr']
+
+
+def test_run_many_keeps_plugins_in_config():
+    seen = []
+
+    def show_plugins_command(parse_spec):
+        seen.append(parse_spec['config'].get('plugins'))
+
+    plugins = [
+        {
+            'command_index': {
+                ('plugin',): {
+                    'f': show_plugins_command,
+                    'extra_data': ['parse_spec'],
+                },
+            },
+        },
+    ]
+    results = toolcli.run_many(
+        ['plugin', 'plugin'],
+        command_index=command_index,
+        config={'base_command': 'tool', 'plugins': plugins},
+    )
+    assert all(result['success'] for result in results), results
+    assert seen == [plugins, plugins]
+
+
+def test_async_phases_share_event_loop():
+    import asyncio
+    import contextlib
+
+    loops = []
+    events = []
+
+    async def pre_middleware(parse_spec, args):
+        loops.append(asyncio.get_running_loop())
+
+    async def get_a():
+        loops.append(asyncio.get_running_loop())
+        events.append('a start')
+        await asyncio.sleep(0.01)
+        events.append('a end')
+        return 'a'
+
+    async def get_b():
+        events.append('b start')
+        await asyncio.sleep(0.01)
+        events.append('b end')
+        return 'b'
+
+    async def command(a, b):
+        loops.append(asyncio.get_running_loop())
+        events.append(a + b)
+
+    @contextlib.asynccontextmanager
+    async def context_manager():
+        events.append('enter')
+        yield
+        events.append('exit')
+
+    toolcli.run_cli(
+        'go',
+        command_index={('go',): {'f': command, 'extra_data': ['a', 'b']}},
+        config={
+            'base_command': 'tool',
+            'pre_middlewares': [pre_middleware],
+            'extra_data_getters': {'a': get_a, 'b': get_b},
+            'async_context_manager': context_manager,
+        },
+    )
+
+    assert len(loops) == 3 and len(set(map(id, loops))) == 1
+    assert events[0] == 'enter' and events[-1] == 'exit'
+    assert events[1:3] == ['a start', 'b start']
+    assert 'ab' in events
+
+
+def test_sync_command_with_async_middleware_can_run_event_loop():
+    import asyncio
+
+    events = []
+
+    async def pre_middleware(parse_spec, args):
+        events.append('pre')
+
+    async def get_value():
+        return 2
+
+    def command(value):
+        async def double():
+            return value * 2
+
+        events.append(asyncio.run(double()))
+
+    def post_middleware(parse_spec, args):
+        events.append(asyncio.run(get_value()))
+
+    exit_code = toolcli.run_cli(
+        'go',
+        command_index={('go',): {'f': command, 'extra_data': ['value']}},
+        config={
+            'base_command': 'tool',
+            'pre_middlewares': [pre_middleware],
+            'post_middlewares': [post_middleware],
+            'extra_data_getters': {'value': get_value},
+            'error_mode': 'return',
+        },
+    )
+    assert exit_code == 0
+    assert events == ['pre', 4, 2]
+
+
+def test_sync_extra_data_getters_concurrent_and_memoized():
+    import threading
+    import time
+
+    from toolcli.command_utils.parsing import arg_parsing
+
+    calls = []
+    barrier = threading.Barrier(2, timeout=5)
+
+    def get_a():
+        calls.append('a')
+        barrier.wait()
+        return 'a'
+
+    def get_b():
+        calls.append('b')
+        barrier.wait()
+        return 'b'
+
+    results = []
+
+    def command(a, b):
+        results.append(a + b)
+
+    def other_command(a):
+        results.append(a)
+
+    arg_parsing.reset_extra_data_cache()
+    start = time.perf_counter()
+    toolcli.run_many(
+        ['go', 'other'],
+        command_index={
+            ('go',): {'f': command, 'extra_data': ['a', 'b']},
+            ('other',): {'f': other_command, 'extra_data': ['a']},
+        },
+        config={
+            'base_command': 'tool',
+            'extra_data_getters': {'a': get_a, 'b': get_b},
+            'cache_extra_data': True,
+        },
+    )
+    assert time.perf_counter() - start < 5
+    assert results == ['ab', 'a']
+    assert sorted(calls) == ['a', 'b']
+    timings = arg_parsing.get_extra_data_timings()
+    assert 'a' in timings and 'b' in timings
+
+
+def test_extra_data_memoization_is_opt_in_and_sync_only():
+    from toolcli.command_utils.parsing import arg_parsing
+
+    calls = []
+
+    def get_value():
+        calls.append('sync')
+        return 'sync'
+
+    async def get_async_value():
+        calls.append('async')
+        return 'async'
+
+    results = []
+
+    def command(value, async_value):
+        results.append(value + async_value)
+
+    command_index = {
+        ('go',): {'f': command, 'extra_data': ['value', 'async_value']},
+    }
+    getters = {'value': get_value, 'async_value': get_async_value}
+
+    arg_parsing.reset_extra_data_cache()
+    toolcli.run_many(
+        ['go', 'go'],
+        command_index=command_index,
+        config={'base_command': 'tool', 'extra_data_getters': getters},
+    )
+    assert calls == ['sync', 'async'] * 2
+
+    calls.clear()
+    toolcli.run_many(
+        ['go', 'go'],
+        command_index=command_index,
+        config={
+            'base_command': 'tool',
+            'extra_data_getters': getters,
+            'cache_extra_data': True,
+        },
+    )
+    assert sorted(calls) == ['async', 'async', 'sync']
+    assert results == ['syncasync'] * 4
+    arg_parsing.reset_extra_data_cache()
+
+
+def test_resolve_function_cache(monkeypatch):
+    import importlib
+
+    from toolcli.command_utils import execution
+
+    execution.reset_function_cache()
+    imports = []
+    import_module = importlib.import_module
+
+    def counting_import_module(name, *args, **kwargs):
+        if name.startswith('os'):
+            imports.append(name)
+        return import_module(name, *args, **kwargs)
+
+    monkeypatch.setattr(importlib, 'import_module', counting_import_module)
+
+    config = toolcli.create_config(
+        {
+            'pre_middlewares': [['os.path', 'join']],
+            'extra_data_getters': {'cwd': ['os', 'getcwd', []]},
+            'preresolve_functions': True,
+        }
+    )
+    assert imports == ['os.path', 'os']
+    assert execution.resolve_function(['os.path', 'join']) is os.path.join
+    assert execution.resolve_function(('os', 'getcwd')) is os.getcwd
+    assert imports == ['os.path', 'os']
+    assert config['preresolve_functions']
+
+
+def test_error_modes(capsys):
+    import pytest
+
+    config = {'base_command': 'tool', 'error_mode': 'raise'}
+    with pytest.raises(toolcli.UnknownCommandException):
+        toolcli.run_cli('unknown', command_index=command_index, config=config)
+    with pytest.raises(toolcli.ArgumentException):
+        toolcli.run_cli('greet', command_index=command_index, config=config)
+    with pytest.raises(toolcli.CommandException) as info:
+        toolcli.run_cli('fail', command_index=command_index, config=config)
+    assert str(info.value) == 'failed'
+    assert isinstance(info.value.__cause__, Exception)
+    assert capsys.readouterr().out == ''
+
+    config = {'base_command': 'tool', 'error_mode': 'return'}
+    for raw_command, exit_code in [
+        ('greet a', 0),
+        ('fail', 1),
+        ('greet', 2),
+        ('x y', 2),
+    ]:
+        assert exit_code == toolcli.run_cli(
+            raw_command, command_index=command_index, config=config
+        )
+    output = capsys.readouterr().out
+    assert 'failed' in output
+    assert 'unknown command: x y' in output
+    assert 'greet' not in output.split('unknown command')[1]
+
+    with pytest.raises(SystemExit) as exit_info:
+        toolcli.run_cli('fail', command_index=command_index)
+    assert exit_info.value.code == 1
+
+
+def test_keyboard_interrupt_is_not_wrapped():
+    import pytest
+
+    def interrupted_command():
+        raise KeyboardInterrupt()
+
+    for error_mode in ['exit', 'raise', 'return']:
+        with pytest.raises(KeyboardInterrupt):
+            toolcli.run_cli(
+                'interrupt',
+                command_index={('interrupt',): {'f': interrupted_command}},
+                config={'base_command': 'tool', 'error_mode': error_mode},
+            )
+
+
+def test_run_cli_with_alias(capsys):
+    config = {
+        'base_command': 'tool',
+        'command_sequence_aliases': {
+            ('g',): ('greet',),
+            ('s', 'g'): ('greet',),
+        },
+        'error_mode': 'return',
+    }
+    for raw_command in ['g a --shout', 's g a --shout', 'greet a --shout']:
+        assert 0 == toolcli.run_cli(
+            raw_command, command_index=command_index, config=config
+        )
+        assert capsys.readouterr().out == 'HELLO A\n'
@@ -0,0 +1,88 @@
+import pytest
+
+import toolcli
+from toolcli.command_utils.parsing import arg_parsing
+from toolcli.command_utils.parsing import fast_arg_parsing
+
+
+arg_specs = [
+    {'name': 'target'},
+    {'name': 'extra', 'nargs': '*'},
+    {'name': '--flag', 'action': 'store_true'},
+    {'name': ['-q', '--no-color'], 'action': 'store_false'},
+    {'name': '-v', 'action': 'count'},
+    {'name': '--tag', 'action': 'append'},
+    {'name': '--count', 'type': int, 'default': '3'},
+    {'name': '--mode', 'choices': ['a', 'b'], 'default': 'a'},
+    {'name': '--pair', 'nargs': 2},
+    {'name': '--items', 'nargs': '+'},
+    {'name': '--maybe', 'nargs': '?', 'const': 'c'},
+    {'name': '--other-name', 'dest': 'renamed'},
+    {'name': '--const', 'action': 'store_const', 'const': 5},
+]
+
+raw_commands = [
+    'x',
+    'x y z',
+    'x --flag',
+    'x -q -v -v',
+    'x --tag a --tag b',
+    'x --count 7',
+    'x --mode b',
+    'x --pair 1 2',
+    'x --items 1 2 3',
+    'x --maybe',
+    'x --maybe m',
+    'x --other-name n --const',
+    'x y --count=9',
+    '--flag x y',
+]
+
+fallback_commands = [
+    'x --unknown',
+    'x --mode z',
+    'x --count nan',
+    'x --flag y',
+    '--flag',
+    'x -- -y',
+]
+
+
+def _create_parse_spec(specs):
+    return {
+        'command_index': None,
+        'command_sequence': None,
+        'command_spec': {'args': specs},
+        'config': toolcli.create_config(),
+    }
+
+
+@pytest.mark.parametrize('raw_command', raw_commands)
+def test_fast_parser_matches_argparse(raw_command):
+    parse_spec = _create_parse_spec(arg_specs)
+    parser = arg_parsing.create_arg_parser(
+        parse_spec, arg_specs, parse_spec['config']
+    )
+    expected = vars(parser.parse_args(raw_command.split(' ')))
+
+    fast_parser = fast_arg_parsing.compile_fast_parser(arg_specs)
+    assert fast_parser is not None
+    actual = fast_arg_parsing.parse_args_fast(
+        fast_parser, raw_command.split(' ')
+    )
+    assert actual == expected
+
+
+@pytest.mark.parametrize('raw_command', fallback_commands)
+def test_fast_parser_falls_back(raw_command):
+    fast_parser = fast_arg_parsing.compile_fast_parser(arg_specs)
+    assert fast_parser is not None
+    parsed = fast_arg_parsing.parse_args_fast(
+        fast_parser, raw_command.split(' ')
+    )
+    assert parsed is None
+
+
+def test_fast_parser_rejects_unsupported_specs():
+    specs = [{'name': '--version', 'action': 'version', 'version': '1'}]
+    assert fast_arg_parsing.compile_fast_parser(specs) is None
@@ -0,0 +1,162 @@
+import os
+import sys
+
+import toolcli
+from toolcli.command_utils.help_utils import help_cache
+
+
+command_source = '''
+def get_command_spec():
+    return {'f': lambda: None, 'help': %r}
+'''
+
+
+def _write_package(tmp_path, monkeypatch, help, name='help_cache_pkg'):
+    package = tmp_path / name
+    package.mkdir(exist_ok=True)
+    (package / '__init__.py').write_text('')
+    (package / 'some_command.py').write_text(command_source % help)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return package / 'some_command.py'
+
+
+def _run_help(
+    help_cache_dir, raw_command='help', name='help_cache_pkg', **config
+):
+    toolcli.command_utils.parsing.reset_static_spec_cache()
+    results = toolcli.run_many(
+        [raw_command],
+        command_index={('some',): name + '.some_command'},
+        config=dict(
+            {
+                'base_command': 'tool',
+                'include_standard_subcommands': [('help',)],
+                'help_cache_dir': str(help_cache_dir),
+            },
+            **config
+        ),
+    )
+    assert results[0]['success'], results[0]
+    return results[0]['stdout']
+
+
+def test_help_cache_invalidated_by_module_mtime(tmp_path, monkeypatch):
+    path = _write_package(tmp_path, monkeypatch, 'first help')
+    help_cache_dir = tmp_path / 'help_cache'
+
+    assert 'first help' in _run_help(help_cache_dir)
+    assert len(os.listdir(help_cache_dir)) == 1
+    assert 'first help' in _run_help(help_cache_dir)
+    assert len(os.listdir(help_cache_dir)) == 1
+
+    _write_package(tmp_path, monkeypatch, 'second help')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert 'second help' in _run_help(help_cache_dir)
+    for name in os.listdir(help_cache_dir):
+        assert not name.endswith('.tmp')
+
+
+def test_help_cache_fingerprint_covers_config(monkeypatch):
+    monkeypatch.setenv('COLUMNS', '80')
+    parse_spec = {
+        'command_index': {('a',): {'help': 'a help'}},
+        'command_sequence': ('help',),
+        'command_spec': {},
+        'config': {'base_command': 'tool'},
+    }
+    fingerprint = help_cache.get_help_cache_fingerprint(
+        parse_spec, 'root', options={'hidden': False}
+    )
+    assert fingerprint == help_cache.get_help_cache_fingerprint(
+        parse_spec, 'root', options={'hidden': False}
+    )
+    assert fingerprint != help_cache.get_help_cache_fingerprint(
+        parse_spec, 'root', options={'hidden': True}
+    )
+
+    for key, value in [
+        ('style_theme', {'title': 'bold'}),
+        ('description', 'some description'),
+        ('version', '1.0.0'),
+    ]:
+        config = dict(parse_spec['config'], **{key: value})
+        other_parse_spec = dict(parse_spec, config=config)
+        other = help_cache.get_help_cache_fingerprint(
+            other_parse_spec, 'root', options={'hidden': False}
+        )
+        assert other != fingerprint
+
+    monkeypatch.setenv('COLUMNS', '120')
+    assert fingerprint != help_cache.get_help_cache_fingerprint(
+        parse_spec, 'root', options={'hidden': False}
+    )
+
+
+def test_subcommand_help_cache_skips_import(tmp_path, monkeypatch):
+    name = 'subcommand_help_cache_pkg'
+    path = _write_package(tmp_path, monkeypatch, 'cached help', name)
+    help_cache_dir = tmp_path / 'help_cache'
+
+    first = _run_help(help_cache_dir, 'help some', name)
+    assert 'cached help' in first
+    assert name + '.some_command' in sys.modules
+
+    # replace module with one that cannot be imported, keeping its mtime
+    stat = os.stat(path)
+    path.write_text('raise Exception("module should not be imported")')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    del sys.modules[name + '.some_command']
+
+    assert _run_help(help_cache_dir, 'help some', name) == first
+    assert _run_help(help_cache_dir, 'some -h', name) == first
+    assert name + '.some_command' not in sys.modules
+
+
+def test_prefix_help_cache(tmp_path):
+    help_cache_dir = tmp_path / 'help_cache'
+    command_index = {
+        ('a', 'b'): {'f': lambda: None, 'help': 'b help'},
+        ('a', 'c'): {'f': lambda: None, 'help': 'c help'},
+    }
+    config = {
+        'base_command': 'tool',
+        'include_standard_subcommands': [('help',)],
+        'help_cache_dir': str(help_cache_dir),
+    }
+    outputs = []
+    for i in range(2):
+        results = toolcli.run_many(
+            ['help a'], command_index=command_index, config=config
+        )
+        assert results[0]['success'], results[0]
+        outputs.append(results[0]['stdout'])
+    assert 'c help' in outputs[0]
+    assert outputs[0] == outputs[1]
+    assert len(os.listdir(help_cache_dir)) == 1
+
+
+def test_legacy_help_cache_interface(tmp_path, capsys):
+    import pytest
+
+    command_index = {('some',): 'some_module'}
+    help_cache_dir = str(tmp_path)
+    assert not toolcli.print_help_from_cache(
+        command_index, help_cache_dir, hidden=False
+    )
+    help_cache.save_help_text_to_cache(
+        'cached help\n', command_index, help_cache_dir, hidden=False
+    )
+    assert toolcli.print_help_from_cache(
+        command_index, help_cache_dir, hidden=False
+    )
+    assert capsys.readouterr().out == 'cached help\n'
+    assert not toolcli.print_help_from_cache(
+        command_index, help_cache_dir, hidden=True
+    )
+
+    with pytest.deprecated_call():
+        path = help_cache.get_help_dir_hash_path(
+            command_index, help_cache_dir, hidden=False
+        )
+    assert os.path.isfile(path)
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+
+import toolcli
+
+
+# budget for cumulative import time of toolcli, in microseconds
+import_time_budget = int(os.environ.get('TOOLCLI_IMPORT_BUDGET_US', 50000))
+
+heavy_modules = [
+    'argparse',
+    'asyncio',
+    'rich',
+    'toolstr',
+    'toolcli.command_utils',
+    'toolcli.input_utils',
+]
+
+
+def _run_python(code):
+    package_root = os.path.dirname(toolcli.__path__[0])
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [package_root, env.get('PYTHONPATH', '')]
+    )
+    return subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+
+def test_import_time_within_budget():
+    result = _run_python('import toolcli')
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == 'toolcli':
+            cumulative_us = int(fields[1])
+            break
+    else:
+        raise Exception('could not find toolcli in importtime output')
+    assert cumulative_us < import_time_budget
+
+
+def test_import_does_not_load_heavy_modules():
+    code = 'import sys, toolcli; print("\\n".join(sys.modules))'
+    result = _run_python(code)
+    loaded = set(result.stdout.splitlines())
+    for module in heavy_modules:
+        assert module not in loaded, module + ' imported eagerly'
+
+
+def test_lazy_attributes_resolve():
+    for name in toolcli.__all__:
+        assert getattr(toolcli, name) is not None
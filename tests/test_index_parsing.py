@@ -0,0 +1,33 @@
+import os
+
+from toolcli.command_utils.parsing import index_parsing
+
+
+root_module_name = 'toolcli.command_utils.standard_subcommands'
+
+
+def test_filetree_to_command_index_cache(tmp_path):
+    cache_dir = str(tmp_path)
+    uncached = index_parsing.filetree_to_command_index(root_module_name)
+    first = index_parsing.filetree_to_command_index(
+        root_module_name, cache_dir=cache_dir
+    )
+    assert first == uncached
+    assert len(os.listdir(cache_dir)) == 1
+
+    second = index_parsing.filetree_to_command_index(
+        root_module_name, cache_dir=cache_dir
+    )
+    assert second == uncached
+
+
+def test_filetree_to_command_index_cache_key(tmp_path):
+    cache_dir = str(tmp_path)
+    cache_path = index_parsing.get_command_index_cache_path(
+        root_module_name, '_command.py', cache_dir
+    )
+    index_parsing.filetree_to_command_index(
+        root_module_name, cache_dir=cache_dir, cache_key='1.0'
+    )
+    assert index_parsing.load_command_index_cache(cache_path, '1.0')
+    assert index_parsing.load_command_index_cache(cache_path, '2.0') is None
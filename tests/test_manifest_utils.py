@@ -0,0 +1,231 @@
+import os
+import sys
+import textwrap
+
+import pytest
+
+import toolcli
+from toolcli.command_utils import manifest_utils
+
+
+command_module_source = textwrap.dedent(
+    '''
+    import sys
+
+    sys.modules[__name__].was_imported = True
+
+
+    def get_command_spec():
+        if True:
+            return {
+                'f': run_command,
+                'help': 'run something',
+                'args': [
+                    {'name': 'count', 'type': int},
+                    {'name': '--label', 'default': 'x'},
+                ],
+            }
+
+
+    def run_command(count, label):
+        print(label * count)
+    '''
+)
+
+
+def test_manifest_build_and_load(tmp_path, monkeypatch):
+    package = tmp_path / 'manifest_pkg'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    (package / 'run_command.py').write_text(command_module_source)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module_name = 'manifest_pkg.run_command'
+
+    manifest_path = str(tmp_path / 'manifest.json')
+    command_index = {('run',): module_name}
+    config = {
+        'base_command': 'tool',
+        'include_standard_subcommands': True,
+        'command_manifest': manifest_path,
+    }
+
+    # build manifest
+    results = toolcli.run_many(
+        ['cli manifest build'], command_index=command_index, config=config
+    )
+    assert results[0]['success'], results[0]
+    del sys.modules[module_name]
+    manifest_utils.reset_manifest_cache()
+    toolcli.command_utils.parsing.reset_command_spec_cache()
+
+    # help is rendered from manifest without importing module
+    results = toolcli.run_many(['help'], config=config)
+    assert results[0]['success'], results[0]
+    assert 'run something' in results[0]['stdout']
+    assert module_name not in sys.modules
+
+    # module is imported only when command function is resolved
+    results = toolcli.run_many(['run 3 --label ab'], config=config)
+    assert results[0]['stdout'] == 'ababab\n'
+    assert module_name in sys.modules
+
+    manifest_utils.reset_manifest_cache()
+
+
+def _build_manifest(tmp_path, command_index):
+    manifest_path = str(tmp_path / 'manifest.json')
+    config = {
+        'base_command': 'tool',
+        'include_standard_subcommands': True,
+        'command_manifest': manifest_path,
+    }
+    results = toolcli.run_many(
+        ['cli manifest build'], command_index=command_index, config=config
+    )
+    assert results[0]['success'], results[0]
+    manifest_utils.reset_manifest_cache()
+    toolcli.command_utils.parsing.reset_command_spec_cache()
+    return manifest_path, config
+
+
+def test_stale_manifest_is_ignored(tmp_path, monkeypatch):
+    package = tmp_path / 'stale_manifest_pkg'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    module_path = package / 'run_command.py'
+    module_path.write_text(command_module_source)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module_name = 'stale_manifest_pkg.run_command'
+
+    manifest_path, config = _build_manifest(
+        tmp_path, {('run',): module_name}
+    )
+    assert manifest_utils.load_command_manifest(manifest_path) is not None
+    assert manifest_utils.get_manifest_command_spec(module_name) is not None
+
+    # manifests of other toolcli versions are ignored
+    manifest_utils.reset_manifest_cache()
+    monkeypatch.setattr(toolcli, '__version__', '0.0.0')
+    assert manifest_utils.load_command_manifest(manifest_path) is None
+    monkeypatch.undo()
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    # manifests are ignored once a command module changes
+    manifest_utils.reset_manifest_cache()
+    stat = os.stat(module_path)
+    os.utime(module_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert manifest_utils.load_command_manifest(manifest_path) is None
+    assert manifest_utils.get_manifest_command_spec(module_name) is None
+    with pytest.raises(Exception, match='stale'):
+        toolcli.command_utils.parsing.prepare_command_index(
+            command_index=None, config=toolcli.create_config(config)
+        )
+    command_index = {('run',): module_name}
+    assert (
+        toolcli.command_utils.parsing.prepare_command_index(
+            command_index=command_index,
+            config=toolcli.create_config(config),
+            add_standard_subcommands=False,
+        )
+        is command_index
+    )
+
+    manifest_utils.reset_manifest_cache()
+
+
+def get_function_command_spec():
+    return {'f': ['builtins', 'print'], 'help': 'function reference'}
+
+
+def get_lazy_command_spec():
+    return {'f': lambda: None, 'help': 'lazy reference'}
+
+
+def test_manifest_keeps_dict_and_function_references(tmp_path):
+    command_index = {
+        ('inline',): {'f': ['builtins', 'print'], 'help': 'inline spec'},
+        ('function',): get_function_command_spec,
+        ('lazy',): get_lazy_command_spec,
+        ('lambda',): {'f': lambda: None},
+    }
+    manifest_path, config = _build_manifest(tmp_path, command_index)
+    manifest = manifest_utils.load_command_manifest(manifest_path)
+    assert manifest is not None
+
+    # specs that the manifest cannot represent need the live index
+    with pytest.raises(Exception, match='lambda'):
+        manifest_utils.get_manifest_command_index(manifest)
+
+    del command_index[('lambda',)]
+    manifest_path, config = _build_manifest(tmp_path, command_index)
+    manifest = manifest_utils.load_command_manifest(manifest_path)
+    assert manifest is not None
+    manifest_index = manifest_utils.get_manifest_command_index(manifest)
+    assert manifest_index[('inline',)]['help'] == 'inline spec'
+    assert manifest_index[('function',)]['help'] == 'function reference'
+    lazy_reference = manifest_index[('lazy',)]
+    assert callable(lazy_reference)
+    assert lazy_reference()['help'] == 'lazy reference'
+
+    manifest_utils.reset_manifest_cache()
+
+
+def test_manifest_marks_completers(tmp_path):
+    command_index = {
+        ('inline',): {
+            'f': ['builtins', 'print'],
+            'args': [
+                {'name': '--path', 'completer': lambda prefix: ['x']},
+                {'name': '--n', 'type': int},
+            ],
+        },
+    }
+    manifest_path, config = _build_manifest(tmp_path, command_index)
+    manifest = manifest_utils.load_command_manifest(manifest_path)
+    assert manifest is not None
+    (entry,) = [
+        entry
+        for entry in manifest['commands']
+        if entry['sequence'] == ['inline']
+    ]
+    assert not entry['complete']
+    assert entry['command_spec']['args'] == [
+        {'name': '--path', 'completer': True},
+        {'name': '--n', 'type': int},
+    ]
+
+    manifest_utils.reset_manifest_cache()
+
+
+def test_apply_manifest_copies_categories(tmp_path):
+    command_index = {
+        ('inline',): {'f': ['builtins', 'print'], 'help': 'inline spec'},
+    }
+    manifest_path = str(tmp_path / 'manifest.json')
+    results = toolcli.run_many(
+        ['cli manifest build'],
+        command_index=command_index,
+        config={
+            'include_standard_subcommands': True,
+            'command_manifest': manifest_path,
+            'help_subcommand_categories': {('inline',): 'tools'},
+        },
+    )
+    assert results[0]['success'], results[0]
+    manifest_utils.reset_manifest_cache()
+
+    user_categories = {('other',): 'misc'}
+    config = toolcli.create_config(
+        {
+            'command_manifest': manifest_path,
+            'help_subcommand_categories': user_categories,
+        }
+    )
+    manifest_utils.apply_command_manifest(None, config)
+    assert config['help_subcommand_categories'] == {
+        ('other',): 'misc',
+        ('inline',): 'tools',
+    }
+    assert user_categories == {('other',): 'misc'}
+
+    manifest_utils.reset_manifest_cache()
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+
+import toolcli
+from toolcli.command_utils import plain_console
+
+
+def _render(markup, style_theme=None, color=True, truecolor=True):
+    def get_style(name):
+        definition = (style_theme or {}).get(name, name)
+        return plain_console.parse_style(definition, truecolor=truecolor)
+
+    return plain_console.render_markup(markup, get_style, color=color)
+
+
+def test_render_markup_without_color():
+    markup = '[title]usage:[/title]\n    [option]tool \\[options][/option]'
+    assert _render(markup, color=False) == 'usage:\n    tool [options]'
+
+
+def test_render_markup_with_theme():
+    style_theme = {'title': 'bold red', 'option': '#64aaaa on blue'}
+    assert _render('[title]a[/title] b', style_theme) == '\x1b[1;31ma\x1b[0m b'
+    assert (
+        _render('[option]c[/]', style_theme)
+        == '\x1b[38;2;100;170;170;44mc\x1b[0m'
+    )
+    assert (
+        _render('[option]c[/option]', style_theme, truecolor=False)
+        == '\x1b[38;5;73;44mc\x1b[0m'
+    )
+
+
+def test_render_markup_styles_each_line():
+    rendered = _render('[bold]a\nb[/bold]')
+    assert rendered == '\x1b[1ma\x1b[0m\n\x1b[1mb\x1b[0m'
+
+
+def test_render_markup_link():
+    rendered = _render('[link https://example.com]docs[/]')
+    assert rendered == (
+        '\x1b]8;;https://example.com\x1b\\docs\x1b]8;;\x1b\\'
+    )
+
+
+def test_parse_style_ignores_unknown_words():
+    assert plain_console.parse_style('bold not italic sparkly') == ('1', None)
+
+
+def test_plain_console_capture():
+    console = plain_console.PlainConsole(style_theme={'title': 'bold'})
+    console.begin_capture()
+    console.print('[title]a[/title]', 'b')
+    console.print()
+    assert console.end_capture() == 'a b\n\n'
+
+
+def test_wrap_text():
+    assert plain_console.wrap_text('aa bb cc dd', 5) == 'aa bb\ncc dd'
+    assert plain_console.wrap_text('abcdefg h', 3) == 'abc\ndef\ng h'
+    assert plain_console.wrap_text('short\nlines', 5) == 'short\nlines'
+
+    # escape codes take up no width
+    styled = '\x1b[1maa bb\x1b[0m cc'
+    assert plain_console.wrap_text(styled, 5) == '\x1b[1maa bb\n\x1b[0mcc'
+
+
+def test_plain_console_wraps_to_width():
+    console = plain_console.PlainConsole(width=10)
+    console.begin_capture()
+    console.print('[bold]one two three four[/bold]')
+    assert console.end_capture() == 'one two\nthree four\n'
+
+
+def test_help_does_not_import_rich():
+    code = '\n'.join(
+        [
+            'import sys, toolcli',
+            'toolcli.run_cli(',
+            '    ["help"],',
+            '    command_index={("a",): {"f": print, "help": "a help"}},',
+            '    config={"include_standard_subcommands": [("help",)]},',
+            ')',
+            'assert "rich" not in sys.modules',
+        ]
+    )
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.path.dirname(toolcli.__path__[0])
+    result = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True, env=env
+    )
+    assert result.returncode == 0, result.stderr
+    assert 'a help' in result.stdout
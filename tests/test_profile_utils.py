@@ -0,0 +1,88 @@
+import json
+
+import toolcli
+from toolcli.command_utils import profile_utils
+
+
+def _get_value():
+    return 3
+
+
+def _command(x, value):
+    print(int(x) + value)
+
+
+def _middleware(parse_spec, args):
+    pass
+
+
+command_index = {
+    ('a',): {
+        'f': _command,
+        'args': [{'name': '--x'}],
+        'extra_data': ['value'],
+    },
+}
+
+
+def _run(config):
+    config = dict(
+        {
+            'extra_data_getters': {'value': _get_value},
+            'pre_middlewares': [_middleware],
+            'cache_extra_data': False,
+        },
+        **config
+    )
+    toolcli.run_cli(
+        ['a', '--x', '1'], command_index=command_index, config=config
+    )
+
+
+def test_profile_json_report(capsys):
+    _run({'profile': 'json'})
+    captured = capsys.readouterr()
+    assert captured.out == '4\n'
+    report = json.loads(captured.err)
+    names = [phase['name'] for phase in report['phases']]
+    for name in [
+        'create_config',
+        'create_parse_spec',
+        'parse_command_sequence',
+        'resolve_command_spec',
+        'create_arg_parser',
+        'parse_args',
+        'middleware _middleware',
+        'extra_data value',
+        'command',
+    ]:
+        assert name in names, name
+    depths = {phase['name']: phase['depth'] for phase in report['phases']}
+    assert depths['create_parse_spec'] == 0
+    assert depths['resolve_command_spec'] == 1
+    assert report['total'] > 0
+    assert not profile_utils.is_profile_active()
+
+
+def test_profile_table_and_trace(capsys, monkeypatch, tmp_path):
+    trace_path = str(tmp_path / 'trace.json')
+    monkeypatch.setenv(profile_utils.profile_env_var, 'table')
+    monkeypatch.setenv(profile_utils.profile_trace_env_var, trace_path)
+    _run({})
+    captured = capsys.readouterr()
+    assert captured.err.startswith('phase')
+    assert '  parse_command_sequence' in captured.err
+
+    with open(trace_path) as f:
+        trace = json.load(f)
+    events = trace['traceEvents']
+    assert {event['ph'] for event in events} == {'X'}
+    assert 'command' in [event['name'] for event in events]
+
+
+def test_profile_inactive(capsys):
+    _run({})
+    assert capsys.readouterr().err == ''
+    with profile_utils.profile_phase('unused'):
+        pass
+    assert not profile_utils.is_profile_active()
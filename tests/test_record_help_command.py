@@ -0,0 +1,79 @@
+import os
+
+import toolcli
+
+
+def a_command():
+    pass
+
+
+def test_record_all_help_incremental(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    command_index = {
+        ('a',): {'f': a_command, 'help': 'command a'},
+        ('b',): {'f': a_command, 'help': 'command b'},
+    }
+    config = {
+        'base_command': 'tool',
+        'include_standard_subcommands': [('record', 'help')],
+    }
+    raw_command = 'record help --all --incremental --jobs 2'
+
+    results = toolcli.run_many(
+        [raw_command], command_index=command_index, config=config
+    )
+    assert results[0]['success'], results[0]
+    a_path = tmp_path / 'subcommands' / 'a__help.html'
+    b_path = tmp_path / 'subcommands' / 'b__help.html'
+    assert a_path.is_file() and b_path.is_file()
+
+    # only changed subcommands are recorded again
+    os.utime(a_path, (0, 0))
+    os.utime(b_path, (0, 0))
+    command_index[('b',)]['help'] = 'new help of command b'
+    results = toolcli.run_many(
+        [raw_command], command_index=command_index, config=config
+    )
+    assert results[0]['success'], results[0]
+    assert os.stat(a_path).st_mtime == 0
+    assert os.stat(b_path).st_mtime != 0
+    assert 'new help of command b' in b_path.read_text()
+
+
+def test_record_all_help_incremental_root_spec(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    command_index = {
+        (): {'f': a_command, 'args': [{'name': '--x', 'help': 'old'}]},
+        ('a',): {'f': a_command, 'help': 'command a'},
+    }
+    config = {
+        'base_command': 'tool',
+        'include_standard_subcommands': [('record', 'help')],
+    }
+    raw_command = 'record help --all --incremental'
+
+    results = toolcli.run_many(
+        [raw_command], command_index=command_index, config=config
+    )
+    assert results[0]['success'], results[0]
+    root_path = tmp_path / 'root__help.html'
+    assert root_path.is_file()
+
+    # changing the root spec records root help again
+    os.utime(root_path, (0, 0))
+    command_index[()]['args'][0]['help'] = 'new'
+    results = toolcli.run_many(
+        [raw_command], command_index=command_index, config=config
+    )
+    assert results[0]['success'], results[0]
+    assert os.stat(root_path).st_mtime != 0
+
+
+def test_command_spec_fingerprint_distinguishes_lambdas():
+    from toolcli.command_utils.standard_subcommands import record_help_command
+
+    first = {'help': lambda parse_spec: 'first'}
+    second = {'help': lambda parse_spec: 'second'}
+    assert record_help_command.get_command_spec_fingerprint(
+        first
+    ) != record_help_command.get_command_spec_fingerprint(second)
@@ -0,0 +1,58 @@
+import sys
+import textwrap
+
+import toolcli
+from toolcli.command_utils.parsing import static_parsing
+
+
+heavy_module_source = textwrap.dedent(
+    '''
+    def get_command_spec():
+        """command spec"""
+        return {
+            'f': heavy_command,
+            'help': 'heavy command help',
+            'args': [{'name': '--size', 'type': int, 'help': 'size'}],
+        }
+
+    raise Exception('module should not be imported')
+    '''
+)
+
+
+def test_parse_static_command_spec():
+    metadata = static_parsing.parse_static_command_spec(heavy_module_source)
+    assert metadata == {
+        'help': 'heavy command help',
+        'args': [{'name': '--size', 'help': 'size'}],
+    }
+
+
+def test_parse_static_command_spec_dynamic():
+    source = textwrap.dedent(
+        '''
+        def get_command_spec():
+            return {'help': get_help, 'f': f}
+        '''
+    )
+    assert static_parsing.parse_static_command_spec(source) is None
+
+
+def test_root_help_does_not_import_modules(tmp_path, monkeypatch):
+    package = tmp_path / 'static_parsing_pkg'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    (package / 'heavy_command.py').write_text(heavy_module_source)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    results = toolcli.run_many(
+        ['help'],
+        command_index={('heavy',): 'static_parsing_pkg.heavy_command'},
+        config={
+            'base_command': 'tool',
+            'include_standard_subcommands': [('help',)],
+        },
+    )
+    assert results[0]['success'], results[0]
+    assert 'heavy command help' in results[0]['stdout']
+    assert 'static_parsing_pkg.heavy_command' not in sys.modules
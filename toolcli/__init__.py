@@ -1,13 +1,138 @@
 """toolcli makes it easy to create structured hierarchical cli tools"""
 
-from .command_utils import *
-from .capture_utils import *
-from .external_utils import *
-from .exceptions import *
-from .file_validate_utils import *
-from .input_utils import *
-from .terminal_utils import *
-from .spec import *
+from __future__ import annotations
+
+import typing
+
+if typing.TYPE_CHECKING:
+    from .command_utils import *
+    from .capture_utils import *
+    from .daemon_utils import *
+    from .external_utils import *
+    from .exceptions import *
+    from .file_validate_utils import *
+    from .input_utils import *
+    from .terminal_utils import *
+    from .spec import *
 
 
 __version__ = '0.6.16'
+
+
+# public names are imported lazily on first access to reduce startup time
+_lazy_attributes: typing.Mapping[str, str] = {
+    # command_utils
+    'run_cli': 'command_utils',
+    'run_many': 'command_utils',
+    'execute_command_spec': 'command_utils',
+    'execute_other_command_sequence': 'command_utils',
+    'filetree_to_command_index': 'command_utils',
+    'resolve_command_spec': 'command_utils',
+    'print_help_from_cache': 'command_utils',
+    'execution': 'command_utils',
+    'help_utils': 'command_utils',
+    'output_utils': 'command_utils',
+    'parsing': 'command_utils',
+    'plugin_utils': 'command_utils',
+    # capture_utils
+    'get_minimal_html_format': 'capture_utils',
+    'save_console_output': 'capture_utils',
+    # daemon_utils
+    'run_client': 'daemon_utils',
+    'run_daemon': 'daemon_utils',
+    # external_utils
+    'get_editor_command': 'external_utils',
+    'get_opener_command': 'external_utils',
+    'open_file_in_editor': 'external_utils',
+    'open_tempfile_in_editor': 'external_utils',
+    'open_url_in_browser': 'external_utils',
+    # exceptions
+    'CDException': 'exceptions',
+    'CLIException': 'exceptions',
+    'UnknownCommandException': 'exceptions',
+    'ArgumentException': 'exceptions',
+    'ExtraDataException': 'exceptions',
+    'CommandException': 'exceptions',
+    # file_validate_utils
+    'is_valid_directory_path': 'file_validate_utils',
+    'is_valid_file_path': 'file_validate_utils',
+    # input_utils
+    'DirectoryCreateActions': 'input_utils',
+    'InputDirectoryPathKwargs': 'input_utils',
+    'InvalidAction': 'input_utils',
+    'input_directory_path': 'input_utils',
+    'input_first_letter_choice': 'input_utils',
+    'input_int': 'input_utils',
+    'input_number_choice': 'input_utils',
+    'input_prompt': 'input_utils',
+    'input_yes_or_no': 'input_utils',
+    # terminal_utils
+    'get_n_terminal_cols': 'terminal_utils',
+    'get_n_terminal_rows': 'terminal_utils',
+    # spec
+    'ArgSpec': 'spec',
+    'CLIConfig': 'spec',
+    'CallExample': 'spec',
+    'CommandIndex': 'spec',
+    'CommandPrefixIndex': 'spec',
+    'CommandSequence': 'spec',
+    'CommandSpec': 'spec',
+    'CommandResult': 'spec',
+    'CommandSpecReference': 'spec',
+    'CommandTrie': 'spec',
+    'FunctionReference': 'spec',
+    'HelpConsole': 'spec',
+    'HelpUrlGetter': 'spec',
+    'MiddlewareFunction': 'spec',
+    'MiddlewareSpec': 'spec',
+    'MiddlewareSpecs': 'spec',
+    'ModuleReference': 'spec',
+    'MutableCommandIndex': 'spec',
+    'NamedAction': 'spec',
+    'ParseSpec': 'spec',
+    'ParsedArgs': 'spec',
+    'PhaseTiming': 'spec',
+    'Plugin': 'spec',
+    'RawCommand': 'spec',
+    'StyleTheme': 'spec',
+    'create_config': 'spec',
+    'default_config': 'spec',
+    'standard_args': 'spec',
+}
+
+__all__ = list(_lazy_attributes)
+
+_submodules = {
+    'capture_utils',
+    'command_utils',
+    'daemon_utils',
+    'exceptions',
+    'external_utils',
+    'file_validate_utils',
+    'input_utils',
+    'spec',
+    'terminal_utils',
+}
+
+
+def __getattr__(name: str) -> typing.Any:
+    import importlib
+
+    if name in _lazy_attributes:
+        module = importlib.import_module(
+            '.' + _lazy_attributes[name], __name__
+        )
+        value = getattr(module, name)
+    elif name in _submodules:
+        value = importlib.import_module('.' + name, __name__)
+    else:
+        raise AttributeError(
+            'module ' + repr(__name__) + ' has no attribute ' + repr(name)
+        )
+
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> typing.List[str]:
+    return sorted(set(globals()) | set(_lazy_attributes) | _submodules)
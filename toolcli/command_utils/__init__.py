@@ -1,5 +1,6 @@
 from .execution import (
     run_cli,
+    run_many,
     execute_command_spec,
     execute_other_command_sequence,
 )
@@ -7,6 +8,6 @@ from .parsing import (
     filetree_to_command_index,
     resolve_command_spec,
 )
-from .help_utils.root_command_help import (
+from .help_utils.help_cache import (
     print_help_from_cache,
 )
@@ -0,0 +1,326 @@
+"""shell completion of subcommands, flags, and arg values
+
+completion scripts for bash, zsh, and fish are printed by `cli completion
+<shell>`. on each keystroke the script runs the cli with the TOOLCLI_COMPLETE
+environment variable set and the words typed so far as its arguments, the last
+of which is the word being completed. run_cli() then prints one candidate per
+line instead of running a command
+
+completion only merges the command index and matches it against its trie. it
+does not render help, parse args, or run middleware. command specs are read
+from loaded command manifests or statically from source when possible, so
+that command modules are only imported to call the `completer` of an arg
+
+a completer is called as `completer(prefix=prefix)` and returns a sequence of
+candidate values, which are then filtered by prefix
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import typing
+
+from typing_extensions import Literal
+
+from toolcli import spec
+
+
+completion_env_var = 'TOOLCLI_COMPLETE'
+
+CompletionShell = Literal['bash', 'zsh', 'fish']
+
+_value_free_actions = {
+    'store_const',
+    'store_true',
+    'store_false',
+    'append_const',
+    'count',
+    'help',
+    'version',
+}
+
+_bash_template = """_{name}_complete() {{
+    local IFS=$'\\n'
+    COMPREPLY=($({env_var}=bash "${{COMP_WORDS[0]}}" \\
+        "${{COMP_WORDS[@]:1:$COMP_CWORD}}" 2>/dev/null))
+}}
+complete -o default -F _{name}_complete {base_command}
+"""
+
+_zsh_template = """#compdef {base_command}
+_{name}_complete() {{
+    local -a candidates
+    candidates=("${{(@f)$({env_var}=zsh "${{words[1]}}" \\
+        "${{(@)words[2,$CURRENT]}}" 2>/dev/null)}}")
+    compadd -- $candidates
+}}
+compdef _{name}_complete {base_command}
+"""
+
+_fish_template = """function __{name}_complete
+    set -l tokens (commandline -opc)
+    set -l current (commandline -ct)
+    env {env_var}=fish $tokens "$current" 2>/dev/null
+end
+complete -c {base_command} -f -a '(__{name}_complete)'
+"""
+
+
+def get_completion_script(shell: CompletionShell, base_command: str) -> str:
+    """get script that registers completion of base_command in shell"""
+
+    if shell == 'bash':
+        template = _bash_template
+    elif shell == 'zsh':
+        template = _zsh_template
+    elif shell == 'fish':
+        template = _fish_template
+    else:
+        raise Exception('unknown shell: ' + str(shell))
+
+    name = ''.join(
+        character if character.isalnum() else '_'
+        for character in base_command
+    )
+    return template.format(
+        name=name,
+        base_command=base_command,
+        env_var=completion_env_var,
+    )
+
+
+def is_completion_requested() -> bool:
+    return bool(os.environ.get(completion_env_var))
+
+
+def run_completion(
+    raw_command: spec.RawCommand | None,
+    command_index: spec.CommandIndex | None,
+    command_spec: spec.CommandSpec | None,
+    config: spec.CLIConfig | None,
+) -> None:
+    """print completion candidates of the last word of raw_command
+
+    errors are suppressed so that a failing completion never disrupts the shell
+    """
+    from .parsing import command_parsing
+
+    if raw_command is None:
+        raw_command = sys.argv[1:]
+    if isinstance(raw_command, str):
+        raw_command = raw_command.split(' ')
+
+    try:
+        config = spec.create_config(config)
+        command_index = command_parsing.prepare_command_index(
+            command_index=command_index,
+            config=config,
+            add_standard_subcommands=command_spec is None,
+        )
+        candidates = get_completions(
+            words=raw_command,
+            command_index=command_index,
+            config=config,
+            command_spec=command_spec,
+        )
+    except Exception:
+        return
+    if len(candidates) > 0:
+        sys.stdout.write('\n'.join(candidates) + '\n')
+
+
+def get_completions(
+    words: typing.Sequence[str],
+    command_index: spec.CommandIndex | None,
+    config: spec.CLIConfig,
+    command_spec: spec.CommandSpec | None = None,
+) -> list[str]:
+    """get completion candidates of the last word of words
+
+    words are the words after the base command, the last word is the word
+    being completed and may be empty
+    """
+    from .parsing import command_parsing
+
+    if len(words) == 0:
+        words = ['']
+    current = words[-1]
+    previous = list(words[:-1])
+    positional = [word for word in previous if not word.startswith('-')]
+
+    # determine command sequence
+    sequence: spec.CommandSequence | None
+    if command_spec is not None:
+        sequence = ()
+    elif command_index is not None:
+        sequence = command_parsing.match_command_index(
+            args=positional,
+            command_index=command_index,
+            sort=config.get(
+                'sort_command_index', spec.default_config['sort_command_index']
+            ),
+        )
+    else:
+        return []
+
+    def get_arg_specs(
+        metadata_only: bool,
+    ) -> typing.Sequence[spec.ArgSpec]:
+        if command_spec is not None:
+            return command_spec.get('args', [])
+        if command_index is None or sequence is None:
+            return []
+        resolved = _resolve_command_spec(command_index[sequence], metadata_only)
+        return resolved.get('args', [])
+
+    # complete flags
+    if current.startswith('-'):
+        if current.startswith('--') and '=' in current:
+            flag, prefix = current.split('=', 1)
+            arg_spec = _find_arg_spec(get_arg_specs(True), flag)
+            if arg_spec is None or not _takes_value(arg_spec):
+                return []
+            values = _complete_values(arg_spec, prefix, get_arg_specs)
+            return [flag + '=' + value for value in values]
+        candidates = []
+        for arg_spec in get_arg_specs(True):
+            if arg_spec.get('hidden'):
+                continue
+            for name in _get_arg_names(arg_spec):
+                if name.startswith('-') and name.startswith(current):
+                    candidates.append(name)
+        return candidates
+
+    # complete value of preceding option
+    if len(previous) > 0 and previous[-1].startswith('-'):
+        if '=' not in previous[-1]:
+            arg_spec = _find_arg_spec(get_arg_specs(True), previous[-1])
+            if arg_spec is not None and _takes_value(arg_spec):
+                return _complete_values(arg_spec, current, get_arg_specs)
+
+    candidates = []
+
+    # complete subcommand tokens
+    if command_spec is None and command_index is not None:
+        for token in get_subcommand_tokens(command_index, positional):
+            if token.startswith(current):
+                candidates.append(token)
+
+    # complete value of next positional arg
+    if sequence is not None:
+        n_filled = len(positional) - len(sequence)
+        positional_specs = [
+            arg_spec
+            for arg_spec in get_arg_specs(True)
+            if not _get_arg_names(arg_spec)[0].startswith('-')
+        ]
+        if n_filled < len(positional_specs):
+            arg_spec = positional_specs[n_filled]
+            candidates.extend(
+                _complete_values(arg_spec, current, get_arg_specs)
+            )
+
+    return candidates
+
+
+def get_subcommand_tokens(
+    command_index: spec.CommandIndex,
+    prefix: typing.Sequence[str],
+) -> list[str]:
+    """get tokens that can follow prefix, using the tries of command_index"""
+    from .parsing import command_parsing
+    from .parsing import index_parsing
+
+    if isinstance(command_index, index_parsing.LayeredCommandIndex):
+        layers = list(reversed(command_index.maps))
+    else:
+        layers = [command_index]
+
+    tokens: dict[str, None] = {}
+    for layer in layers:
+        node: spec.CommandTrie | None = command_parsing.get_command_trie(layer)
+        for token in prefix:
+            if node is None:
+                break
+            node = node['children'].get(token)
+        if node is not None:
+            tokens.update(dict.fromkeys(node['children']))
+    return list(tokens)
+
+
+def _resolve_command_spec(
+    reference: spec.CommandSpecReference,
+    metadata_only: bool,
+) -> spec.CommandSpec:
+    """resolve command spec, avoiding imports when metadata suffices
+
+    if metadata_only is True, specs are read from manifests or statically from
+    source even if they are missing values that cannot be stored or extracted,
+    such as completers. modules are only imported if neither is possible
+    """
+    from . import manifest_utils
+    from .parsing import command_parsing
+    from .parsing import static_parsing
+
+    if metadata_only:
+        return static_parsing.resolve_command_spec_metadata(reference)
+    if isinstance(reference, str):
+        manifest_spec = manifest_utils.get_manifest_command_spec(
+            reference, complete=True
+        )
+        if manifest_spec is not None:
+            return manifest_spec
+    return command_parsing.resolve_command_spec(reference)
+
+
+def _get_arg_names(arg_spec: spec.ArgSpec) -> list[str]:
+    name = arg_spec['name']
+    if isinstance(name, str):
+        return [name]
+    else:
+        return list(name)
+
+
+def _find_arg_spec(
+    arg_specs: typing.Sequence[spec.ArgSpec],
+    flag: str,
+) -> spec.ArgSpec | None:
+    for arg_spec in arg_specs:
+        if flag in _get_arg_names(arg_spec):
+            return arg_spec
+    return None
+
+
+def _takes_value(arg_spec: spec.ArgSpec) -> bool:
+    return (
+        arg_spec.get('action') not in _value_free_actions
+        and arg_spec.get('nargs') != 0
+    )
+
+
+def _complete_values(
+    arg_spec: spec.ArgSpec,
+    prefix: str,
+    get_arg_specs: typing.Callable[[bool], typing.Sequence[spec.ArgSpec]],
+) -> list[str]:
+    """complete value of arg from its choices or completer"""
+
+    choices = arg_spec.get('choices')
+    if choices is not None:
+        values = [str(choice) for choice in choices]
+    else:
+        # metadata marks completers that it cannot store as `True`, only
+        # these require importing the module to resolve the full spec
+        completer: typing.Any = arg_spec.get('completer')
+        if completer is True:
+            name = _get_arg_names(arg_spec)[0]
+            full_spec = _find_arg_spec(get_arg_specs(False), name)
+            if full_spec is None:
+                return []
+            completer = full_spec.get('completer')
+        if not callable(completer):
+            return []
+        values = [str(value) for value in completer(prefix=prefix)]
+
+    return [value for value in values if value.startswith(prefix)]
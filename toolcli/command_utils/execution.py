@@ -5,8 +5,14 @@ import sys
 import typing
 import types
 
+if typing.TYPE_CHECKING:
+    import asyncio
+
+from .. import exceptions
 from .. import spec
+from . import completion_utils
 from . import parsing
+from . import profile_utils
 
 
 def run_cli(
@@ -16,55 +22,236 @@ def run_cli(
     command_spec: typing.Optional[spec.CommandSpec] = None,
     args: typing.Optional[spec.ParsedArgs] = None,
     config: typing.Optional[spec.CLIConfig] = None,
-) -> None:
-    """run cli
+) -> int:
+    """run cli, returning exit code
 
     Requires at least one of the following sets of arguments:
     - {raw_command, command_index}
     - {args, command_sequence, command_index}
     - {raw_command, command_spec}
     - {args, command_spec}
+
+    phases are timed if profiling is enabled, see profile_utils
+
+    if shell completion is requested, completion candidates are printed
+    instead of running a command, see completion_utils
+
+    errors are handled according to the `error_mode` config key:
+    - 'exit': print error message and exit (default)
+    - 'return': print error message and return exit code
+    - 'raise': raise a CLIException subclass without printing
     """
 
+    if completion_utils.is_completion_requested():
+        completion_utils.run_completion(
+            raw_command=raw_command,
+            command_index=command_index,
+            command_spec=command_spec,
+            config=config,
+        )
+        return 0
+
+    if profile_utils.start_profile(config):
+        try:
+            return _run_cli(
+                raw_command=raw_command,
+                command_sequence=command_sequence,
+                command_index=command_index,
+                command_spec=command_spec,
+                args=args,
+                config=config,
+            )
+        finally:
+            profile_utils.finish_profile(config)
+    else:
+        return _run_cli(
+            raw_command=raw_command,
+            command_sequence=command_sequence,
+            command_index=command_index,
+            command_spec=command_spec,
+            args=args,
+            config=config,
+        )
+
+
+def _run_cli(
+    raw_command: typing.Optional[spec.RawCommand],
+    command_sequence: typing.Optional[spec.CommandSequence],
+    command_index: typing.Optional[spec.CommandIndex],
+    command_spec: typing.Optional[spec.CommandSpec],
+    args: typing.Optional[spec.ParsedArgs],
+    config: typing.Optional[spec.CLIConfig],
+) -> int:
+
     # create config
-    config = spec.create_config(config)
+    with profile_utils.profile_phase('create_config'):
+        config = spec.create_config(config)
+
+    try:
+        return _run_cli_command(
+            raw_command=raw_command,
+            command_sequence=command_sequence,
+            command_index=command_index,
+            command_spec=command_spec,
+            args=args,
+            config=config,
+        )
+    except exceptions.CLIException as exception:
+        error_mode = config.get('error_mode', 'exit')
+        if error_mode == 'raise':
+            raise
+        if isinstance(exception.__cause__, SystemExit):
+            pass
+        elif len(exception.args) == 0:
+            print('unknown error, use --debug to debug')
+        else:
+            print(exception.args[0])
+        if error_mode == 'return':
+            return exception.exit_code
+        sys.exit(exception.exit_code)
+
+
+def _run_cli_command(
+    raw_command: typing.Optional[spec.RawCommand],
+    command_sequence: typing.Optional[spec.CommandSequence],
+    command_index: typing.Optional[spec.CommandIndex],
+    command_spec: typing.Optional[spec.CommandSpec],
+    args: typing.Optional[spec.ParsedArgs],
+    config: spec.CLIConfig,
+) -> int:
 
     # get raw command
     if raw_command is None and command_sequence is None:
         raw_command = sys.argv[1:]
 
     # create parse spec
-    parse_spec = parsing.create_parse_spec(
-        raw_command=raw_command,
-        command_index=command_index,
-        command_sequence=command_sequence,
-        command_spec=command_spec,
-        config=config,
-    )
+    with profile_utils.profile_phase('create_parse_spec'):
+        parse_spec = parsing.create_parse_spec(
+            raw_command=raw_command,
+            command_index=command_index,
+            command_sequence=command_sequence,
+            command_spec=command_spec,
+            config=config,
+        )
 
     # parse args
     if args is None:
         if raw_command is None:
             raise Exception('must specify raw_command or args')
-        args = parsing.parse_raw_command(
-            raw_command=raw_command,
-            parse_spec=parse_spec,
-        )
+        with profile_utils.profile_phase('parse_raw_command'):
+            args = parsing.parse_raw_command(
+                raw_command=raw_command,
+                parse_spec=parse_spec,
+            )
 
     # execute command_spec and middlewares
     try:
         execute_parsed_command(parse_spec=parse_spec, args=args)
-    except SystemExit as _exception:
-        sys.exit(1)
-    except BaseException as exception:
+    except SystemExit as exception:
+        if exception.code is None or exception.code == 0:
+            return 0
+        elif isinstance(exception.code, int):
+            exit_code = exception.code
+        else:
+            exit_code = 1
+        raise exceptions.CommandException(
+            'command exited with code ' + str(exception.code), exit_code
+        ) from exception
+    except exceptions.CLIException:
+        raise
+    except Exception as exception:
         if args.get('debug'):
             _enter_debugger()
+            return 1
+        if len(exception.args) == 0:
+            message = 'unknown error, use --debug to debug'
         else:
-            if len(exception.args) == 0:
-                print('unknown error, use --debug to debug')
-            else:
-                print(exception.args[0])
-            sys.exit(1)
+            message = str(exception.args[0])
+        raise exceptions.CommandException(message) from exception
+
+    return 0
+
+
+def run_many(
+    raw_commands: typing.Iterable[spec.RawCommand],
+    command_index: typing.Optional[spec.CommandIndex] = None,
+    command_spec: typing.Optional[spec.CommandSpec] = None,
+    config: typing.Optional[spec.CLIConfig] = None,
+    capture_output: bool = True,
+) -> list[spec.CommandResult]:
+    """run many raw commands in the current process
+
+    command_index and config are resolved once and shared by every command.
+    errors are returned in each command's result instead of exiting
+
+    Requires one of command_index or command_spec
+    """
+
+    import contextlib
+    import io
+
+    # resolve config and command index once for whole batch
+    config = spec.create_config(config)
+    command_index = parsing.prepare_command_index(
+        command_index=command_index,
+        config=config,
+        add_standard_subcommands=command_spec is None,
+    )
+
+    results: list[spec.CommandResult] = []
+    for raw_command in raw_commands:
+        exception: typing.Optional[BaseException] = None
+        stdout: typing.Optional[io.StringIO] = None
+        stderr: typing.Optional[io.StringIO] = None
+        with contextlib.ExitStack() as stack:
+            if capture_output:
+                stdout = io.StringIO()
+                stderr = io.StringIO()
+                stack.enter_context(contextlib.redirect_stdout(stdout))
+                stack.enter_context(contextlib.redirect_stderr(stderr))
+            try:
+                parse_spec = parsing.create_parse_spec(
+                    raw_command=raw_command,
+                    command_index=command_index,
+                    command_sequence=None,
+                    command_spec=command_spec,
+                    config=config,
+                    prepare_index=False,
+                )
+                args = parsing.parse_raw_command(
+                    raw_command=raw_command,
+                    parse_spec=parse_spec,
+                )
+                execute_parsed_command(parse_spec=parse_spec, args=args)
+                exit_code = 0
+            except SystemExit as e:
+                if e.code is None:
+                    exit_code = 0
+                elif isinstance(e.code, int):
+                    exit_code = e.code
+                else:
+                    exit_code = 1
+                if exit_code != 0:
+                    exception = e
+            except exceptions.CLIException as e:
+                exit_code = e.exit_code
+                exception = e
+            except Exception as e:
+                exit_code = 1
+                exception = e
+
+        results.append(
+            {
+                'raw_command': raw_command,
+                'success': exit_code == 0,
+                'exit_code': exit_code,
+                'stdout': stdout.getvalue() if stdout is not None else None,
+                'stderr': stderr.getvalue() if stderr is not None else None,
+                'exception': exception,
+            }
+        )
+
+    return results
 
 
 def execute_parsed_command(
@@ -72,26 +259,142 @@ def execute_parsed_command(
     args: spec.ParsedArgs,
     middleware: bool = True,
 ) -> None:
-    """execute parsed command with specified arguments"""
+    """execute parsed command with specified arguments
+
+    if any middleware, extra_data getter, or the command itself is async, the
+    async phases share a single event loop, inside of the config's
+    async_context_manager if one is specified. sync phases are called while
+    that loop is not running
+    """
 
-    # execute pre middleware
     config = parse_spec['config']
-    if middleware and config.get('pre_middlewares') is not None:
-        _execute_middlewares(config['pre_middlewares'], parse_spec, args)
+    if middleware:
+        pre_middlewares = [
+            resolve_function(f) for f in config.get('pre_middlewares') or []
+        ]
+        post_middlewares = [
+            resolve_function(f) for f in config.get('post_middlewares') or []
+        ]
+    else:
+        pre_middlewares = []
+        post_middlewares = []
+    function = resolve_function(parse_spec['command_spec']['f'])
+
+    # share a single event loop among phases if any phase is async
+    is_async = (
+        _iscoroutinefunction(function)
+        or any(_iscoroutinefunction(f) for f in pre_middlewares)
+        or any(_iscoroutinefunction(f) for f in post_middlewares)
+        or parsing.has_async_extra_data(parse_spec)
+    )
+    if is_async:
+        _execute_phases_in_event_loop(
+            parse_spec=parse_spec,
+            args=args,
+            function=function,
+            pre_middlewares=pre_middlewares,
+            post_middlewares=post_middlewares,
+        )
+        return
+
+    # execute pre middleware
+    _execute_middlewares(pre_middlewares, parse_spec, args)
 
     # gather function args
-    function_args = parsing.get_function_args(parse_spec, args)
+    with profile_utils.profile_phase('extra_data'):
+        function_args = parsing.get_function_args(parse_spec, args)
 
     # execute command
-    execute_command_spec(
-        command_spec=parse_spec['command_spec'],
-        args=function_args,
-        async_context_manager=config.get('async_context_manager'),
-    )
+    with profile_utils.profile_phase('command'):
+        function(**function_args)
 
     # execute post middleware
-    if middleware and config.get('post_middlewares') is not None:
-        _execute_middlewares(config['post_middlewares'], parse_spec, args)
+    _execute_middlewares(post_middlewares, parse_spec, args)
+
+
+def _execute_phases_in_event_loop(
+    parse_spec: spec.ParseSpec,
+    args: spec.ParsedArgs,
+    function: typing.Callable[..., typing.Any],
+    pre_middlewares: typing.Sequence[typing.Callable[..., typing.Any]],
+    post_middlewares: typing.Sequence[typing.Callable[..., typing.Any]],
+) -> None:
+    """execute phases of parsed command, sharing one event loop among them
+
+    the loop only runs during async phases, so sync middlewares and commands
+    are called outside of it and may start event loops of their own. the
+    config's async_context_manager, if any, is entered around all phases
+    """
+    import asyncio
+
+    loop = asyncio.new_event_loop()
+    try:
+        async_context_manager = parse_spec['config'].get(
+            'async_context_manager'
+        )
+        if async_context_manager is None:
+            context_manager = None
+        else:
+            context_manager = async_context_manager()
+            loop.run_until_complete(context_manager.__aenter__())
+
+        try:
+            # execute pre middleware
+            _execute_middlewares(pre_middlewares, parse_spec, args, loop)
+
+            # gather function args
+            with profile_utils.profile_phase('extra_data'):
+                function_args = loop.run_until_complete(
+                    parsing.async_get_function_args(parse_spec, args)
+                )
+
+            # execute command
+            with profile_utils.profile_phase('command'):
+                if _iscoroutinefunction(function):
+                    loop.run_until_complete(function(**function_args))
+                else:
+                    function(**function_args)
+
+            # execute post middleware
+            _execute_middlewares(post_middlewares, parse_spec, args, loop)
+
+        except BaseException:
+            if context_manager is None:
+                raise
+            suppress = loop.run_until_complete(
+                context_manager.__aexit__(*sys.exc_info())
+            )
+            if not suppress:
+                raise
+        else:
+            if context_manager is not None:
+                loop.run_until_complete(
+                    context_manager.__aexit__(None, None, None)
+                )
+    finally:
+        _close_event_loop(loop)
+
+
+def _close_event_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """cancel remaining tasks and close loop, like asyncio.run() does"""
+    import asyncio
+
+    try:
+        tasks = [task for task in asyncio.all_tasks(loop) if not task.done()]
+        for task in tasks:
+            task.cancel()
+        if len(tasks) > 0:
+            loop.run_until_complete(
+                asyncio.gather(*tasks, return_exceptions=True)
+            )
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        shutdown_default_executor = getattr(
+            loop, 'shutdown_default_executor', None
+        )
+        if shutdown_default_executor is not None:
+            loop.run_until_complete(shutdown_default_executor())
+    finally:
+        loop.close()
 
 
 def _iscoroutinefunction(function: typing.Any) -> bool:
@@ -145,10 +448,17 @@ async def _async_execute_in_context_manager(
         await function(**args)
 
 
+# functions of (module_name, function_name) references
+_function_cache: dict[tuple[str, str], types.FunctionType] = {}
+
+
 def resolve_function(
     function_ref: spec.FunctionReference,
 ) -> types.FunctionType:
-    """return the function refered to by function_ref"""
+    """return the function refered to by function_ref
+
+    (module_name, function_name) references are imported once per process
+    """
 
     if isinstance(function_ref, types.FunctionType):
         return function_ref
@@ -158,14 +468,44 @@ def resolve_function(
                 'function reference should be (module_name, function_name)'
             )
         module_name, function_name = function_ref
-        module = importlib.import_module(module_name)
-        return getattr(module, function_name)
+        function = _function_cache.get((module_name, function_name))
+        if function is not None:
+            return function
+        with profile_utils.profile_phase('import ' + module_name):
+            module = importlib.import_module(module_name)
+        function = getattr(module, function_name)
+        _function_cache[(module_name, function_name)] = function
+        return function
     else:
         raise Exception(
             'could not parse command function: ' + str(function_ref)
         )
 
 
+def preresolve_functions(config: spec.CLIConfig) -> None:
+    """resolve function references of middlewares and extra_data getters
+
+    used to move imports out of the invocation of a command, for example when
+    a long-lived process is started
+    """
+    for middlewares in (
+        config.get('pre_middlewares'),
+        config.get('post_middlewares'),
+    ):
+        for middleware in middlewares or []:
+            resolve_function(middleware)
+    extra_data_getters = config.get('extra_data_getters') or {}
+    for function_ref in extra_data_getters.values():
+        if isinstance(function_ref, (list, tuple)) and len(function_ref) == 3:
+            function_ref = function_ref[:2]
+        resolve_function(function_ref)
+
+
+def reset_function_cache() -> None:
+    """clear resolved function references, e.g. after reloading modules"""
+    _function_cache.clear()
+
+
 def execute_other_command_sequence(
     command_sequence: spec.CommandSequence,
     parse_spec: spec.ParseSpec,
@@ -215,17 +555,28 @@ def _enter_debugger() -> None:
 
 
 def _execute_middlewares(
-    middlewares: list[spec.MiddlewareSpec],
+    middlewares: typing.Sequence[spec.MiddlewareSpec],
     parse_spec: spec.ParseSpec,
     args: spec.ParsedArgs,
+    loop: asyncio.AbstractEventLoop | None = None,
 ) -> None:
-    """execute middlewares"""
+    """execute middlewares
+
+    async middlewares are run in loop if given, otherwise in a new event loop
+    """
     for middleware in middlewares:
         f = resolve_function(middleware)
 
-        if _iscoroutinefunction(f):
-            import asyncio
+        with profile_utils.profile_phase('middleware ' + _get_name(f)):
+            if not _iscoroutinefunction(f):
+                f(parse_spec=parse_spec, args=args)
+            elif loop is not None:
+                loop.run_until_complete(f(parse_spec=parse_spec, args=args))
+            else:
+                import asyncio
+
+                asyncio.run(f(parse_spec=parse_spec, args=args))
 
-            asyncio.run(f(parse_spec=parse_spec, args=args))
-        else:
-            f(parse_spec=parse_spec, args=args)
+
+def _get_name(function: typing.Any) -> str:
+    return str(getattr(function, '__qualname__', function))
@@ -1,2 +1,3 @@
+from .help_cache import *
 from .root_command_help import *
 from .subcommand_help import *
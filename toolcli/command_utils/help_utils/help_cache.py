@@ -0,0 +1,318 @@
+"""disk cache of rendered help messages
+
+cached messages are stored as the exact bytes that were written to the
+terminal, including ansi styling, so a cache hit is written straight to stdout
+without rendering. each entry is keyed by a fingerprint of everything that
+affects the rendered message, so stale entries are never read
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import typing
+import types
+
+from typing_extensions import Literal
+
+from toolcli import spec
+from toolcli.command_utils.parsing import command_parsing
+from toolcli.command_utils.parsing import static_parsing
+
+
+HelpKind = Literal['root', 'subcommand', 'prefix']
+
+# environment variables that affect how output is styled
+_terminal_env_vars = ('TERM', 'COLORTERM', 'NO_COLOR', 'FORCE_COLOR')
+
+
+def get_help_cache_dir(
+    parse_spec: spec.ParseSpec,
+    help_cache_dir: str | None = None,
+) -> str | None:
+    if help_cache_dir is None:
+        help_cache_dir = parse_spec['config'].get('help_cache_dir')
+    return help_cache_dir
+
+
+def get_help_cache_fingerprint(
+    parse_spec: spec.ParseSpec,
+    kind: HelpKind,
+    command_sequence: spec.CommandSequence = (),
+    options: typing.Mapping[str, typing.Any] | None = None,
+) -> str | None:
+    """get fingerprint of everything that affects a rendered help message
+
+    covers toolcli and cli versions, mtimes of command modules, config entries
+    used for rendering, and terminal properties. only file metadata is read,
+    so the fingerprint is cheap compared to rendering help
+
+    root help covers every command of the index, subcommand and prefix help
+    cover the commands under command_sequence. returns None if the message
+    cannot be fingerprinted and should not be cached
+    """
+    import hashlib
+
+    import toolcli
+
+    config = parse_spec['config']
+    command_index = parse_spec['command_index']
+
+    # subcommand help needs a reference that changes along with its source
+    if kind == 'subcommand':
+        if command_index is None:
+            return None
+        reference = command_index.get(command_sequence)
+        if reference is None or isinstance(reference, dict):
+            return None
+        if command_sequence == ('cd',) and not isinstance(
+            config.get('cd_dir_help', {}), dict
+        ):
+            return None
+
+    style_theme = config.get('style_theme') or {}
+    categories = config.get('help_subcommand_categories') or {}
+    manifest_path = config.get('command_manifest')
+    key = [
+        toolcli.__version__,
+        config.get('version'),
+        config.get('base_command'),
+        config.get('description'),
+        config.get('help_renderer', 'plain'),
+        config.get('cd_dir_help') if command_sequence == ('cd',) else None,
+        sorted(style_theme.items()),
+        sorted(categories.items()),
+        _get_file_mtime(manifest_path) if manifest_path is not None else None,
+        _get_terminal_key(),
+        kind,
+        command_sequence,
+        sorted((options or {}).items()),
+    ]
+
+    fingerprint = hashlib.md5(repr(key).encode())
+    if command_index is not None:
+        for other_sequence in command_parsing.get_command_descendants(
+            command_index, command_sequence
+        ):
+            reference = command_index[other_sequence]
+            reference_key = (other_sequence, _get_reference_key(reference))
+            fingerprint.update(repr(reference_key).encode())
+    return fingerprint.hexdigest()
+
+
+def _get_terminal_key() -> typing.Any:
+    import shutil
+
+    try:
+        is_terminal = sys.stdout.isatty()
+    except Exception:
+        is_terminal = False
+    return (
+        shutil.get_terminal_size().columns,
+        is_terminal,
+        [os.environ.get(name) for name in _terminal_env_vars],
+    )
+
+
+def _get_reference_key(
+    reference: spec.CommandSpecReference,
+) -> typing.Any:
+    """get key of command spec reference that changes with its source"""
+
+    if isinstance(reference, str):
+        return (reference, _get_file_mtime(_get_module_path(reference)))
+    elif isinstance(reference, types.ModuleType):
+        path = getattr(reference, '__file__', None)
+        return (reference.__name__, _get_file_mtime(path))
+    elif isinstance(reference, types.FunctionType):
+        module = sys.modules.get(reference.__module__)
+        path = getattr(module, '__file__', None)
+        name = reference.__module__ + '.' + reference.__qualname__
+        return (name, _get_file_mtime(path))
+    elif isinstance(reference, dict):
+        help = reference.get('help')
+        if not isinstance(help, str):
+            help = getattr(help, '__qualname__', None)
+        return (help, reference.get('hidden'))
+    else:
+        return None
+
+
+_module_paths: dict[str, str | None] = {}
+
+
+def _get_module_path(module_name: str) -> str | None:
+    if module_name not in _module_paths:
+        _module_paths[module_name] = static_parsing.get_module_path(
+            module_name
+        )
+    return _module_paths[module_name]
+
+
+def _get_file_mtime(path: str | None) -> int | None:
+    if path is None:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_help_cache_path(
+    parse_spec: spec.ParseSpec,
+    help_cache_dir: str,
+    kind: HelpKind,
+    command_sequence: spec.CommandSequence = (),
+    options: typing.Mapping[str, typing.Any] | None = None,
+) -> str | None:
+    fingerprint = get_help_cache_fingerprint(
+        parse_spec=parse_spec,
+        kind=kind,
+        command_sequence=command_sequence,
+        options=options,
+    )
+    if fingerprint is None:
+        return None
+    return os.path.join(help_cache_dir, fingerprint)
+
+
+def print_cached_help(
+    parse_spec: spec.ParseSpec,
+    help_cache_dir: str,
+    kind: HelpKind,
+    command_sequence: spec.CommandSequence = (),
+    options: typing.Mapping[str, typing.Any] | None = None,
+) -> bool:
+    """write cached help to stdout, returning whether cache was hit"""
+
+    help_cache_path = get_help_cache_path(
+        parse_spec=parse_spec,
+        help_cache_dir=help_cache_dir,
+        kind=kind,
+        command_sequence=command_sequence,
+        options=options,
+    )
+    if help_cache_path is None:
+        return False
+    try:
+        with open(help_cache_path, 'rb') as f:
+            contents = f.read()
+    except OSError:
+        return False
+    write_help_bytes(contents)
+    return True
+
+
+def save_cached_help(
+    help_text: str,
+    parse_spec: spec.ParseSpec,
+    help_cache_dir: str,
+    kind: HelpKind,
+    command_sequence: spec.CommandSequence = (),
+    options: typing.Mapping[str, typing.Any] | None = None,
+) -> None:
+    """save rendered help text to cache atomically"""
+    import tempfile
+
+    help_cache_path = get_help_cache_path(
+        parse_spec=parse_spec,
+        help_cache_dir=help_cache_dir,
+        kind=kind,
+        command_sequence=command_sequence,
+        options=options,
+    )
+    if help_cache_path is None:
+        return
+    os.makedirs(help_cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=help_cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(help_text.encode())
+        os.replace(tmp_path, help_cache_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _get_legacy_parse_spec(
+    command_index: spec.CommandIndex,
+) -> spec.ParseSpec:
+    return {
+        'command_index': command_index,
+        'command_sequence': None,
+        'command_spec': {},
+        'config': {},
+    }
+
+
+def _get_legacy_options(hidden: bool) -> dict[str, typing.Any]:
+    return {'hidden': hidden, 'include_links': False, 'only_category': None}
+
+
+def print_help_from_cache(
+    command_index: spec.CommandIndex,
+    help_cache_dir: str,
+    hidden: bool,
+) -> bool:
+    """write cached root help of command_index to stdout, if present
+
+    legacy interface keyed only by command_index, use print_cached_help()
+    to share entries with the help that toolcli renders
+    """
+    return print_cached_help(
+        parse_spec=_get_legacy_parse_spec(command_index),
+        help_cache_dir=help_cache_dir,
+        kind='root',
+        options=_get_legacy_options(hidden),
+    )
+
+
+def save_help_text_to_cache(
+    help_text: str,
+    command_index: spec.CommandIndex,
+    help_cache_dir: str,
+    hidden: bool,
+) -> None:
+    """save root help of command_index for print_help_from_cache()"""
+    save_cached_help(
+        help_text=help_text,
+        parse_spec=_get_legacy_parse_spec(command_index),
+        help_cache_dir=help_cache_dir,
+        kind='root',
+        options=_get_legacy_options(hidden),
+    )
+
+
+def get_help_dir_hash_path(
+    command_index: spec.CommandIndex,
+    help_cache_dir: str,
+    hidden: bool,
+) -> str:
+    """deprecated, use get_help_cache_path()"""
+    import warnings
+
+    warnings.warn(
+        'get_help_dir_hash_path() is deprecated, use get_help_cache_path()',
+        DeprecationWarning,
+        stacklevel=2,
+    )
+    path = get_help_cache_path(
+        parse_spec=_get_legacy_parse_spec(command_index),
+        help_cache_dir=help_cache_dir,
+        kind='root',
+        options=_get_legacy_options(hidden),
+    )
+    return typing.cast(str, path)
+
+
+def write_help_bytes(contents: bytes) -> None:
+    """write rendered help to stdout, bypassing text encoding if possible"""
+    stdout = sys.stdout
+    buffer = getattr(stdout, 'buffer', None)
+    if buffer is None:
+        stdout.write(contents.decode())
+    else:
+        stdout.flush()
+        buffer.write(contents)
+        buffer.flush()
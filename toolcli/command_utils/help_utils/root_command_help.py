@@ -1,24 +1,46 @@
 from __future__ import annotations
 
-import os
 import typing
 import types
 
-if typing.TYPE_CHECKING:
-    import rich.console
-
 from toolcli import spec
 from toolcli.command_utils import output_utils
 from toolcli.command_utils.parsing import command_parsing
+from toolcli.command_utils.parsing import static_parsing
+from . import help_cache
 
 
 def print_prefix_help(
     command_sequence: spec.CommandSequence,
     parse_spec: spec.ParseSpec,
-    console: rich.console.Console | None = None,
+    console: spec.HelpConsole | None = None,
+    help_cache_dir: str | None = None,
+    reset_cache: bool = False,
 ) -> None:
+    """print help message for a prefix of other command sequences"""
+
+    # use cache if possible, unless custom console is specified
     if console is None:
-        console = output_utils.get_rich_console(parse_spec=parse_spec)
+        help_cache_dir = help_cache.get_help_cache_dir(
+            parse_spec, help_cache_dir
+        )
+    else:
+        help_cache_dir = None
+    if help_cache_dir is not None and not reset_cache:
+        printed = help_cache.print_cached_help(
+            parse_spec=parse_spec,
+            help_cache_dir=help_cache_dir,
+            kind='prefix',
+            command_sequence=command_sequence,
+        )
+        if printed:
+            return
+
+    # create console, capturing output if it will be cached
+    if console is None:
+        console = output_utils.get_console(parse_spec=parse_spec)
+    if help_cache_dir is not None:
+        console.begin_capture()
 
     config = parse_spec['config']
     command_index = parse_spec['command_index']
@@ -47,28 +69,50 @@ def print_prefix_help(
         + ' <subcommand> -h[/option][/description]'
     )
 
-    if command_index is None:
-        return
+    if command_index is not None:
+        _print_prefix_subcommands(
+            command_sequence=command_sequence,
+            command_index=command_index,
+            console=console,
+        )
+
+    if help_cache_dir is not None:
+        help_text = console.end_capture()
+        help_cache.write_help_bytes(help_text.encode())
+        help_cache.save_cached_help(
+            help_text=help_text,
+            parse_spec=parse_spec,
+            help_cache_dir=help_cache_dir,
+            kind='prefix',
+            command_sequence=command_sequence,
+        )
+
 
+def _print_prefix_subcommands(
+    command_sequence: spec.CommandSequence,
+    command_index: spec.CommandIndex,
+    console: spec.HelpConsole,
+) -> None:
     console.print()
     console.print('[title]available subcommands:[/title]')
 
     chop = len(command_sequence)
     subsequences: list[str] = []
     helps: list[str] = []
-    for other_command_sequence, command_spec_reference in command_index.items():
-        if other_command_sequence[:chop] == command_sequence:
-            subsequences.append(' '.join(other_command_sequence[chop:]))
-            command_spec = command_parsing.resolve_command_spec(
-                command_spec_reference
-            )
-            help = command_spec.get('help', '')
-            if isinstance(help, str):
-                helps.append(help)
-            elif isinstance(help, types.FunctionType):
-                helps.append(help())
-            else:
-                raise Exception('unknown help format')
+    for other_command_sequence in command_parsing.get_command_descendants(
+        command_index, command_sequence
+    ):
+        subsequences.append(' '.join(other_command_sequence[chop:]))
+        command_spec = static_parsing.resolve_command_spec_metadata(
+            command_index[other_command_sequence]
+        )
+        help = command_spec.get('help', '')
+        if isinstance(help, str):
+            helps.append(help)
+        elif isinstance(help, types.FunctionType):
+            helps.append(help())
+        else:
+            raise Exception('unknown help format')
 
     longest_subcommand = max(len(item) for item in subsequences)
     for subsequence, help in zip(subsequences, helps):
@@ -82,56 +126,9 @@ def print_prefix_help(
         console.print(text)
 
 
-def get_help_dir_hash_path(
-    command_index: spec.CommandIndex,
-    help_cache_dir: str,
-    hidden: bool,
-) -> str:
-    import hashlib
-
-    command_index_str = str(sorted(command_index.items()))
-    name_hash = hashlib.md5(command_index_str.encode()).hexdigest()
-    help_cache_path = os.path.join(help_cache_dir, name_hash)
-    if hidden:
-        help_cache_path = help_cache_path + '__hidden'
-    return help_cache_path
-
-
-def print_help_from_cache(
-    command_index: spec.CommandIndex,
-    help_cache_dir: str,
-    hidden: bool,
-) -> bool:
-    help_cache_path = get_help_dir_hash_path(
-        command_index, help_cache_dir, hidden=hidden
-    )
-    if os.path.isfile(help_cache_path):
-        with open(help_cache_path, 'r') as f:
-            contents = f.read()
-        print(contents, end='')
-        return True
-    else:
-        return False
-
-
-def save_help_text_to_cache(
-    help_text: str,
-    command_index: spec.CommandIndex,
-    help_cache_dir: str,
-    hidden: bool,
-) -> None:
-    help_cache_path = get_help_dir_hash_path(
-        command_index, help_cache_dir, hidden=hidden
-    )
-    dirname = os.path.dirname(help_cache_path)
-    os.makedirs(dirname, exist_ok=True)
-    with open(help_cache_path, 'w') as f:
-        f.write(help_text)
-
-
 def print_root_command_help(
     parse_spec: spec.ParseSpec,
-    console: rich.console.Console | None = None,
+    console: spec.HelpConsole | None = None,
     include_links: bool = False,
     only_category: str | None = None,
     show_hidden: bool = False,
@@ -145,40 +142,32 @@ def print_root_command_help(
     base_command = config.get('base_command', '<base-command>')
 
     # check cache and use it if possible
-    if help_cache_dir is None:
-        help_cache_dir = config.get('help_cache_dir')
+    help_cache_dir = help_cache.get_help_cache_dir(parse_spec, help_cache_dir)
 
     # do not use cache if custom console is specified
     if console is not None:
         help_cache_dir = None
 
-    # use cache if possible
-    if help_cache_dir is not None:
-        command_index = parse_spec.get('command_index')
-        if not reset_cache and command_index is not None:
-            printed = print_help_from_cache(
-                command_index=command_index,
-                help_cache_dir=help_cache_dir,
-                hidden=show_hidden,
-            )
-            if printed:
-                return
-
-    # create console
-    if help_cache_dir is not None:
-        old_console = console
-
-        import io
-
-        file = io.StringIO()
-
-        console = output_utils.get_rich_console(
+    options = {
+        'hidden': show_hidden,
+        'include_links': include_links,
+        'only_category': only_category,
+    }
+    if help_cache_dir is not None and not reset_cache:
+        printed = help_cache.print_cached_help(
             parse_spec=parse_spec,
-            file=file,
+            help_cache_dir=help_cache_dir,
+            kind='root',
+            options=options,
         )
-    else:
-        if console is None:
-            console = output_utils.get_rich_console(parse_spec=parse_spec)
+        if printed:
+            return
+
+    # create console, capturing output if it will be cached
+    if console is None:
+        console = output_utils.get_console(parse_spec=parse_spec)
+    if help_cache_dir is not None:
+        console.begin_capture()
 
     # print usage and description
     console.print(
@@ -209,7 +198,7 @@ def print_root_command_help(
         helps = {}
         for command_sequence, command_spec_spec in command_index.items():
             try:
-                command_spec = command_parsing.resolve_command_spec(
+                command_spec = static_parsing.resolve_command_spec_metadata(
                     command_spec_spec
                 )
             except Exception:
@@ -322,12 +311,12 @@ def print_root_command_help(
                     console.print(text, style='link ' + url)
 
     if help_cache_dir is not None:
-        file.seek(0)
-        help_text = file.read()
-        if old_console is None:
-            old_console = output_utils.get_rich_console(parse_spec=parse_spec)
-        print(help_text, end='')
-        if command_index is not None:
-            save_help_text_to_cache(
-                help_text, command_index, help_cache_dir, show_hidden
-            )
+        help_text = console.end_capture()
+        help_cache.write_help_bytes(help_text.encode())
+        help_cache.save_cached_help(
+            help_text=help_text,
+            parse_spec=parse_spec,
+            help_cache_dir=help_cache_dir,
+            kind='root',
+            options=options,
+        )
@@ -3,24 +3,22 @@ from __future__ import annotations
 import typing
 import types
 
-if typing.TYPE_CHECKING:
-    import rich.console
-
 import toolcli
 from toolcli import spec
 from .. import parsing
 from .. import output_utils
+from . import help_cache
 
 
 def print_subcommand_usage(
     parse_spec: toolcli.ParseSpec,
     indent: typing.Optional[str] = None,
-    console: rich.console.Console | None = None,
+    console: spec.HelpConsole | None = None,
 ) -> None:
     """print usage for a subcommand"""
 
     if console is None:
-        console = output_utils.get_rich_console(parse_spec)
+        console = output_utils.get_console(parse_spec)
 
     config = parse_spec['config']
     command_sequence = parse_spec['command_sequence']
@@ -82,7 +80,7 @@ def get_arg_metavar(arg_spec: toolcli.ArgSpec) -> str:
 def print_cd_dirs(
     *,
     config: spec.CLIConfig | None = None,
-    console: rich.console.Console | None = None,
+    console: spec.HelpConsole | None = None,
     parse_spec: spec.ParseSpec | None = None,
     indent: str | None = None,
 ) -> None:
@@ -96,7 +94,7 @@ def print_cd_dirs(
     if console is None:
         if parse_spec is None:
             raise Exception('must specify console or parse_spec')
-        console = output_utils.get_rich_console(parse_spec)
+        console = output_utils.get_console(parse_spec)
 
     console.print(indent + '[description]directories:[/description]')
 
@@ -108,7 +106,7 @@ def print_cd_dirs(
     else:
         raise Exception('invalid format for dirs dict')
     if len(dirs_dict) == 0:
-        print('[none]')
+        console.print('\\[none]')
     else:
         for key, value in dirs_dict.items():
             console.print(
@@ -120,19 +118,75 @@ def print_cd_dirs(
 
 def print_subcommand_help(
     parse_spec: toolcli.ParseSpec,
-    console: rich.console.Console | None = None,
+    console: spec.HelpConsole | None = None,
     include_links: bool = False,
     show_hidden: bool = False,
     include_subsubcommands: bool = True,
+    help_cache_dir: str | None = None,
+    reset_cache: bool = False,
 ) -> None:
     """print help for a subcommand"""
 
     if include_links:
         raise NotImplementedError('links in subcommand help')
 
+    # use cache if possible, unless custom console is specified
+    command_sequence = parse_spec['command_sequence']
+    if command_sequence is None:
+        command_sequence = ()
     if console is None:
-        console = output_utils.get_rich_console(parse_spec)
-
+        help_cache_dir = help_cache.get_help_cache_dir(
+            parse_spec, help_cache_dir
+        )
+    else:
+        help_cache_dir = None
+    options = {
+        'hidden': show_hidden,
+        'include_subsubcommands': include_subsubcommands,
+    }
+    if help_cache_dir is not None and not reset_cache:
+        printed = help_cache.print_cached_help(
+            parse_spec=parse_spec,
+            help_cache_dir=help_cache_dir,
+            kind='subcommand',
+            command_sequence=command_sequence,
+            options=options,
+        )
+        if printed:
+            return
+
+    # create console, capturing output if it will be cached
+    if console is None:
+        console = output_utils.get_console(parse_spec)
+    if help_cache_dir is not None:
+        console.begin_capture()
+
+    _print_subcommand_help(
+        parse_spec=parse_spec,
+        console=console,
+        show_hidden=show_hidden,
+        include_subsubcommands=include_subsubcommands,
+    )
+
+    if help_cache_dir is not None:
+        help_text = console.end_capture()
+        help_cache.write_help_bytes(help_text.encode())
+        help_cache.save_cached_help(
+            help_text=help_text,
+            parse_spec=parse_spec,
+            help_cache_dir=help_cache_dir,
+            kind='subcommand',
+            command_sequence=command_sequence,
+            options=options,
+        )
+
+
+def _print_subcommand_help(
+    parse_spec: toolcli.ParseSpec,
+    console: spec.HelpConsole,
+    show_hidden: bool,
+    include_subsubcommands: bool,
+) -> None:
     command_spec = parse_spec['command_spec']
     config = parse_spec.get('config', {})
 
@@ -254,30 +308,34 @@ def print_subcommand_help(
     if command_sequence is not None and command_index is not None:
         subsubcommands = []
         descriptions = []
-        for other_sequence, other_reference in command_index.items():
+        for other_sequence in parsing.get_command_descendants(
+            command_index, command_sequence
+        ):
             if other_sequence == command_sequence:
                 continue
-            if other_sequence[: len(command_sequence)] == command_sequence:
-                # get command spec
-                try:
-                    command_spec = parsing.resolve_command_spec(other_reference)
-                except Exception:
-                    command_spec = {}
-
-                if command_spec.get('hidden'):
-                    continue
-
-                # get description
-                command_spec_help = command_spec.get('help')
-                if isinstance(command_spec_help, str):
-                    description = command_spec_help
-                elif isinstance(command_spec_help, types.FunctionType):
-                    description = command_spec_help(parse_spec)
-                else:
-                    description = ''
 
-                subsubcommands.append(other_sequence[len(command_sequence) :])
-                descriptions.append(description.split('\n')[0])
+            # get command spec
+            try:
+                command_spec = parsing.resolve_command_spec_metadata(
+                    command_index[other_sequence]
+                )
+            except Exception:
+                command_spec = {}
+
+            if command_spec.get('hidden'):
+                continue
+
+            # get description
+            command_spec_help = command_spec.get('help')
+            if isinstance(command_spec_help, str):
+                description = command_spec_help
+            elif isinstance(command_spec_help, types.FunctionType):
+                description = command_spec_help(parse_spec)
+            else:
+                description = ''
+
+            subsubcommands.append(other_sequence[len(command_sequence) :])
+            descriptions.append(description.split('\n')[0])
 
         if len(subsubcommands) > 0 and include_subsubcommands:
             console.print()
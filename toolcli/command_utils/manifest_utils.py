@@ -0,0 +1,442 @@
+"""command manifests store the resolved command specs of a cli in one file
+
+a manifest is built once (e.g. with `cli manifest build`) and loaded through
+the `command_manifest` config key. loaded manifests supply the command index,
+help metadata, and, for specs that can be fully represented, the command spec
+itself. command modules are then only imported once the command function of
+the chosen command is resolved
+
+manifests record the toolcli version and the mtimes of the command modules
+they were built from. a manifest is ignored if either has changed since
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import types
+import typing
+from typing_extensions import TypedDict
+
+from toolcli import spec
+
+
+manifest_version = 3
+
+_standard_subcommand_prefix = 'toolcli.command_utils.standard_subcommands.'
+
+# builtin types that can be stored by name
+_serializable_types: typing.Mapping[str, typing.Callable[..., typing.Any]] = {
+    'int': int,
+    'float': float,
+    'str': str,
+}
+
+
+class ManifestEntry(TypedDict):
+    sequence: typing.List[str]
+    reference: typing.Optional[str]
+    function_reference: typing.Optional[typing.List[str]]
+    help: str
+    hidden: bool
+    category: typing.Optional[str]
+    standard: bool
+    complete: bool  # whether command_spec fully represents the spec
+    command_spec: spec.CommandSpec
+
+
+class CommandManifest(TypedDict):
+    version: int
+    toolcli_version: str
+    sources: typing.Dict[str, int]  # mtime of each command module file
+    commands: typing.List[ManifestEntry]
+
+
+# loaded manifests, keyed by path, stored with mtime of manifest file. stale
+# manifests are stored as None
+_loaded_manifests: dict[
+    str, tuple[float, typing.Optional[CommandManifest]]
+] = {}
+
+# entries of loaded manifests, keyed by module reference
+_manifest_entries: dict[str, ManifestEntry] = {}
+
+
+#
+# # building manifests
+#
+
+
+def build_command_manifest(parse_spec: spec.ParseSpec) -> CommandManifest:
+    """resolve every command spec in command index into a manifest"""
+
+    import toolcli
+    from .parsing import command_parsing
+
+    command_index = parse_spec['command_index']
+    if command_index is None:
+        raise Exception('must specify command_index')
+    categories = parse_spec['config'].get('help_subcommand_categories') or {}
+
+    commands = []
+    module_names: dict[str, None] = {}
+    for sequence, reference in command_index.items():
+        command_spec = command_parsing.resolve_command_spec(
+            reference, use_manifest=False
+        )
+        entry = _build_manifest_entry(command_spec, parse_spec)
+        entry['sequence'] = list(sequence)
+        entry['reference'] = reference if isinstance(reference, str) else None
+        if isinstance(reference, types.FunctionType):
+            entry['function_reference'] = _get_function_reference(reference)
+        entry['category'] = categories.get(sequence)
+        entry['standard'] = isinstance(
+            reference, str
+        ) and reference.startswith(_standard_subcommand_prefix)
+        commands.append(entry)
+
+        # modules whose changes make the entry stale
+        if entry['reference'] is not None:
+            module_names[entry['reference']] = None
+        if entry['function_reference'] is not None:
+            module_names[entry['function_reference'][0]] = None
+        f_ref = entry['command_spec'].get('f')
+        if isinstance(f_ref, list):
+            module_names[f_ref[0]] = None
+
+    sources = {}
+    for module_name in module_names:
+        path = _get_module_file(module_name)
+        if path is not None:
+            try:
+                sources[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                pass
+
+    return {
+        'version': manifest_version,
+        'toolcli_version': toolcli.__version__,
+        'sources': sources,
+        'commands': commands,
+    }
+
+
+def _get_module_file(module_name: str) -> typing.Optional[str]:
+    from .parsing import static_parsing
+
+    path = getattr(sys.modules.get(module_name), '__file__', None)
+    if path is None:
+        path = static_parsing.get_module_path(module_name)
+    return path
+
+
+def _build_manifest_entry(
+    command_spec: spec.CommandSpec,
+    parse_spec: spec.ParseSpec,
+) -> ManifestEntry:
+    complete = True
+    manifest_spec: dict[str, typing.Any] = {}
+
+    # command function, stored as (module_name, function_name)
+    f = command_spec.get('f')
+    if f is not None:
+        f_ref = _get_function_reference(f)
+        if f_ref is None:
+            complete = False
+        else:
+            manifest_spec['f'] = f_ref
+
+    # help
+    help = command_spec.get('help', '')
+    if isinstance(help, str):
+        manifest_spec['help'] = help
+        help_str = help
+    else:
+        complete = False
+        try:
+            help_str = help(parse_spec)
+        except Exception:
+            help_str = ''
+
+    # args
+    args = []
+    for arg_spec in command_spec.get('args', []):
+        manifest_arg: dict[str, typing.Any] = {}
+        for key, value in arg_spec.items():
+            if key == 'type' and value is not None:
+                type_name = getattr(value, '__name__', None)
+                if _serializable_types.get(str(type_name)) is value:
+                    manifest_arg[key] = type_name
+                    continue
+            if _is_serializable(value):
+                manifest_arg[key] = value
+            else:
+                complete = False
+                if key == 'completer':
+                    # record that completion needs to import the module
+                    manifest_arg[key] = True
+        args.append(manifest_arg)
+    if 'args' in command_spec:
+        manifest_spec['args'] = args
+
+    # other keys
+    for key in ['examples', 'hidden', 'extra_data', 'imports']:
+        if key in command_spec:
+            value = command_spec[key]  # type: ignore
+            if _is_serializable(value):
+                manifest_spec[key] = value
+            else:
+                complete = False
+    known_keys = [
+        'f',
+        'help',
+        'args',
+        'examples',
+        'hidden',
+        'extra_data',
+        'imports',
+    ]
+    for key in command_spec.keys():
+        if key not in known_keys:
+            complete = False
+
+    return {
+        'sequence': [],
+        'reference': None,
+        'function_reference': None,
+        'help': help_str,
+        'hidden': bool(command_spec.get('hidden', False)),
+        'category': None,
+        'standard': False,
+        'complete': complete,
+        'command_spec': typing.cast(spec.CommandSpec, manifest_spec),
+    }
+
+
+def _get_function_reference(
+    f: typing.Any,
+) -> typing.Optional[typing.List[str]]:
+    """get (module_name, function_name) of module-level function"""
+    import importlib
+
+    if isinstance(f, (list, tuple)) and len(f) == 2:
+        return [str(f[0]), str(f[1])]
+    module_name = getattr(f, '__module__', None)
+    name = getattr(f, '__qualname__', None)
+    if module_name is None or name is None or '.' in name:
+        return None
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError:
+        return None
+    if getattr(module, name, None) is not f:
+        return None
+    return [module_name, name]
+
+
+def _is_serializable(value: typing.Any) -> bool:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return True
+    elif isinstance(value, (list, tuple)):
+        return all(_is_serializable(item) for item in value)
+    elif isinstance(value, dict):
+        return all(
+            isinstance(key, str) and _is_serializable(item)
+            for key, item in value.items()
+        )
+    else:
+        return False
+
+
+def save_command_manifest(manifest: CommandManifest, path: str) -> None:
+    """save manifest to path atomically"""
+    import json
+    import tempfile
+
+    dirname = os.path.dirname(path)
+    if len(dirname) > 0:
+        os.makedirs(dirname, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dirname or None, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+#
+# # loading manifests
+#
+
+
+def load_command_manifest(path: str) -> typing.Optional[CommandManifest]:
+    """load manifest from path, registering its entries for spec resolution
+
+    returns None if the manifest is stale, i.e. it has another format or
+    toolcli version, or its command modules have changed since it was built
+    """
+    import json
+
+    mtime = os.stat(path).st_mtime
+    cached = _loaded_manifests.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    # unregister entries of previous version of manifest
+    if cached is not None and cached[1] is not None:
+        for entry in cached[1]['commands']:
+            reference = entry['reference']
+            if reference is not None:
+                if _manifest_entries.get(reference) is entry:
+                    del _manifest_entries[reference]
+
+    with open(path, 'r') as f:
+        manifest: CommandManifest = json.load(f)
+    if manifest.get('version') != manifest_version or not (
+        is_command_manifest_current(manifest)
+    ):
+        _loaded_manifests[path] = (mtime, None)
+        return None
+
+    for entry in manifest['commands']:
+        command_spec = entry['command_spec']
+        for arg_spec in command_spec.get('args', []):
+            type_name = arg_spec.get('type')
+            if isinstance(type_name, str):
+                arg_spec['type'] = _serializable_types[type_name]
+        reference = entry['reference']
+        if reference is not None:
+            _manifest_entries[reference] = entry
+
+    _loaded_manifests[path] = (mtime, manifest)
+    return manifest
+
+
+def is_command_manifest_current(manifest: CommandManifest) -> bool:
+    """return whether manifest matches toolcli version and command modules"""
+    import toolcli
+
+    if manifest.get('toolcli_version') != toolcli.__version__:
+        return False
+    for path, mtime in manifest['sources'].items():
+        try:
+            if os.stat(path).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def get_manifest_command_index(
+    manifest: CommandManifest,
+) -> spec.CommandIndex:
+    """get command index of manifest, excluding standard subcommands
+
+    function references are imported once their spec is resolved, and specs
+    given in the index are used if the manifest fully represents them
+    """
+    command_index: dict[spec.CommandSequence, spec.CommandSpecReference] = {}
+    unrepresented = []
+    for entry in manifest['commands']:
+        if entry['standard']:
+            continue
+        sequence = tuple(entry['sequence'])
+        function_reference = entry['function_reference']
+        if entry['reference'] is not None:
+            command_index[sequence] = entry['reference']
+        elif entry['complete']:
+            command_index[sequence] = entry['command_spec']
+        elif function_reference is not None:
+            command_index[sequence] = _create_lazy_function_reference(
+                *function_reference
+            )
+        else:
+            unrepresented.append(' '.join(sequence))
+    if len(unrepresented) > 0:
+        raise Exception(
+            'manifest cannot represent commands, specify command_index: '
+            + ', '.join(unrepresented)
+        )
+    return command_index
+
+
+def _create_lazy_function_reference(
+    module_name: str, name: str
+) -> typing.Callable[[], spec.CommandSpec]:
+    """create function reference that imports its module once called"""
+
+    def get_command_spec() -> spec.CommandSpec:
+        import importlib
+
+        module = importlib.import_module(module_name)
+        command_spec: spec.CommandSpec = getattr(module, name)()
+        return command_spec
+
+    get_command_spec.__module__ = module_name
+    get_command_spec.__qualname__ = name
+    return get_command_spec
+
+
+def apply_command_manifest(
+    command_index: typing.Optional[spec.CommandIndex],
+    config: spec.CLIConfig,
+) -> typing.Optional[spec.CommandIndex]:
+    """load manifest of config, returning command index to use"""
+
+    path = config.get('command_manifest')
+    if path is None:
+        return command_index
+    if not os.path.isfile(path):
+        if command_index is None:
+            raise Exception('command manifest does not exist: ' + str(path))
+        return command_index
+    manifest = load_command_manifest(path)
+    if manifest is None:
+        if command_index is None:
+            raise Exception('command manifest is stale, rebuild it: ' + path)
+        return command_index
+
+    # add categories of manifest, copying them to leave the caller's intact
+    categories = config.get('help_subcommand_categories')
+    if categories is not None:
+        categories = dict(categories)
+        for entry in manifest['commands']:
+            if entry['category'] is not None:
+                categories.setdefault(
+                    tuple(entry['sequence']), entry['category']
+                )
+        config['help_subcommand_categories'] = categories
+
+    if command_index is None:
+        command_index = get_manifest_command_index(manifest)
+    return command_index
+
+
+def get_manifest_command_spec(
+    reference: str, complete: bool = True
+) -> typing.Optional[spec.CommandSpec]:
+    """get command spec of reference from loaded manifests
+
+    if complete is False, return spec even if it only contains help metadata
+    """
+    entry = _manifest_entries.get(reference)
+    if entry is None:
+        return None
+    if entry['complete']:
+        return entry['command_spec']
+    elif not complete:
+        metadata = dict(entry['command_spec'])
+        metadata['help'] = entry['help']
+        metadata['hidden'] = entry['hidden']
+        return typing.cast(spec.CommandSpec, metadata)
+    else:
+        return None
+
+
+def reset_manifest_cache() -> None:
+    """unload all loaded manifests"""
+    _loaded_manifests.clear()
+    _manifest_entries.clear()
@@ -27,3 +27,25 @@ def get_rich_console(
 
     return console
 
+
+def get_console(
+    parse_spec: spec.ParseSpec,
+    file: typing.TextIO | None = None,
+) -> spec.HelpConsole:
+    """get console of help_renderer in config, which defaults to plain
+
+    the plain renderer avoids importing rich, rich is only required for
+    recording help as html or svg
+    """
+    renderer = parse_spec['config'].get('help_renderer', 'plain')
+    if renderer == 'plain':
+        from . import plain_console
+
+        return plain_console.PlainConsole(
+            style_theme=parse_spec['config'].get('style_theme'),
+            file=file,
+        )
+    elif renderer == 'rich':
+        return get_rich_console(parse_spec=parse_spec, file=file)
+    else:
+        raise Exception('unknown help_renderer: ' + str(renderer))
@@ -1,3 +1,17 @@
+import typing
+
 from .arg_parsing import *
 from .command_parsing import *
 from .index_parsing import *
+from .static_parsing import *
+
+
+def __getattr__(name: str) -> typing.Any:
+    # SubcommandArgumentParser is resolved lazily to defer importing argparse
+    if name == 'SubcommandArgumentParser':
+        from .subcommand_parser import SubcommandArgumentParser
+
+        return SubcommandArgumentParser
+    raise AttributeError(
+        'module ' + repr(__name__) + ' has no attribute ' + repr(name)
+    )
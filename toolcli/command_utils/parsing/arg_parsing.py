@@ -1,39 +1,29 @@
 from __future__ import annotations
 
-import argparse
+import collections
 import copy
 import typing
 
+from toolcli import exceptions
 from toolcli import spec
 from .. import execution
-from .. import help_utils
-
-
-class SubcommandArgumentParser(argparse.ArgumentParser):
-    """subclass of argparse.ArgumentParser that stores current ParseSpec"""
-
-    def __init__(
-        self: SubcommandArgumentParser,
-        parse_spec: spec.ParseSpec,
-        **kwargs: typing.Any,
-    ):
-        self.parse_spec = parse_spec
-        super().__init__(**kwargs)
-
-    def print_usage(
-        self,
-        file: typing.Optional[typing.IO[str]] = None,
-    ) -> None:
-        help_utils.print_subcommand_usage(self.parse_spec)
-
-    def print_help(
-        self,
-        file: typing.Optional[typing.IO[str]] = None,
-    ) -> None:
-        if self.parse_spec['command_sequence'] == ():
-            help_utils.print_root_command_help(self.parse_spec)
-        else:
-            help_utils.print_subcommand_help(self.parse_spec)
+from .. import profile_utils
+from . import command_parsing
+from . import fast_arg_parsing
+
+if typing.TYPE_CHECKING:
+    from .subcommand_parser import SubcommandArgumentParser
+
+
+def __getattr__(name: str) -> typing.Any:
+    # argparse is only imported once a parser is actually needed
+    if name == 'SubcommandArgumentParser':
+        from .subcommand_parser import SubcommandArgumentParser
+
+        return SubcommandArgumentParser
+    raise AttributeError(
+        'module ' + repr(__name__) + ' has no attribute ' + repr(name)
+    )
 
 
 def parse_raw_command(
@@ -44,15 +34,92 @@ def parse_raw_command(
     config = parse_spec.get('config')
     if config is None:
         config = spec.create_config(config)
-    command_index = parse_spec.get('command_index')
 
-    # gather arg specs
+    arg_specs = get_arg_specs(parse_spec, config)
+
+    # remove command sequence from raw command
+    if isinstance(raw_command, str):
+        raw_command = [
+            token.strip() for token in raw_command.split(' ') if token != ''
+        ]
+    raw_command = list(raw_command)
+    command_sequence = parse_spec.get('command_sequence')
+    if command_sequence is not None:
+        command_tokens = command_parsing.get_command_sequence_tokens(
+            raw_args=raw_command,
+            command_sequence=command_sequence,
+            config=config,
+        )
+        for token in command_tokens:
+            if token in raw_command:
+                raw_command.pop(raw_command.index(token))
+            else:
+                break
+
+    # tokenize raw command
+    if isinstance(raw_command, str):
+        raw_args = [arg.strip() for arg in raw_command.split(' ')]
+    elif isinstance(raw_command, list):
+        raw_args = raw_command
+    else:
+        raise Exception(
+            'unknown type for raw_command: ' + str(type(raw_command))
+        )
+
+    # parse arguments
+    parse_mode = config.get('arg_parse_mode', config.get('parse_mode'))
+    if parse_mode == 'fast':
+        with profile_utils.profile_phase('create_fast_parser'):
+            fast_parser = get_fast_parser(arg_specs)
+        if fast_parser is not None:
+            with profile_utils.profile_phase('parse_args_fast'):
+                parsed = fast_arg_parsing.parse_args_fast(
+                    fast_parser, raw_args
+                )
+            if parsed is not None:
+                return parsed
+    with profile_utils.profile_phase('create_arg_parser'):
+        parser = get_arg_parser(parse_spec, arg_specs, config)
+    with profile_utils.profile_phase('parse_args'):
+        if parse_mode is None or parse_mode == 'fast':
+            args = parser.parse_args(args=raw_args)
+        elif parse_mode == 'known':
+            args, _ = parser.parse_known_args(args=raw_args)
+        elif parse_mode == 'intermixed':
+            args = parser.parse_intermixed_args(args=raw_args)
+        elif parse_mode == 'known_intermixed':
+            args, _ = parser.parse_known_intermixed_args(args=raw_args)
+        else:
+            raise Exception('unknown parse_mode: ' + str(parse_mode))
+    parsed_args = vars(args)
+
+    return parsed_args
+
+
+def get_arg_specs(
+    parse_spec: spec.ParseSpec,
+    config: spec.CLIConfig,
+) -> typing.Sequence[spec.ArgSpec]:
+    """gather arg specs of command, including standard args"""
+
+    command_index = parse_spec.get('command_index')
     command_spec = parse_spec['command_spec']
     arg_specs: typing.Sequence[spec.ArgSpec] = command_spec.get('args', [])
     if config.get('include_debug_arg'):
         arg_specs = list(arg_specs) + [spec.standard_args['debug']]
     if command_index is not None and ('cd',) in command_index:
         arg_specs = list(arg_specs) + [spec.standard_args['cd']]
+    return arg_specs
+
+
+def create_arg_parser(
+    parse_spec: spec.ParseSpec,
+    arg_specs: typing.Sequence[spec.ArgSpec],
+    config: spec.CLIConfig,
+) -> SubcommandArgumentParser:
+    """create argparse parser for arg specs"""
+
+    from .subcommand_parser import SubcommandArgumentParser
 
     # create parser
     parser = SubcommandArgumentParser(
@@ -86,45 +153,108 @@ def parse_raw_command(
         )
         parser.add_argument(*name_args, **kwargs)  # type: ignore
 
-    # remove command sequence from raw command
-    if isinstance(raw_command, str):
-        raw_command = [
-            token.strip() for token in raw_command.split(' ') if token != ''
-        ]
-    raw_command = list(raw_command)
-    command_sequence = parse_spec.get('command_sequence')
-    if command_sequence is not None:
-        for token in command_sequence:
-            if token in raw_command:
-                raw_command.pop(raw_command.index(token))
-            else:
-                break
-
-    # tokenize raw command
-    if isinstance(raw_command, str):
-        raw_args = [arg.strip() for arg in raw_command.split(' ')]
-    elif isinstance(raw_command, list):
-        raw_args = raw_command
-    else:
-        raise Exception(
-            'unknown type for raw_command: ' + str(type(raw_command))
+    return parser
+
+
+#
+# # parser cache
+#
+
+_parser_cache: collections.OrderedDict[
+    typing.Hashable, SubcommandArgumentParser
+] = collections.OrderedDict()
+_fast_parser_cache: collections.OrderedDict[
+    typing.Hashable, fast_arg_parsing.FastParser | None
+] = collections.OrderedDict()
+parser_cache_size = 128
+
+
+def get_arg_specs_fingerprint(
+    arg_specs: typing.Sequence[spec.ArgSpec],
+) -> typing.Hashable:
+    """compute hashable fingerprint of arg specs for use as a cache key
+
+    returns None if arg specs contain values that cannot be frozen, in which
+    case parsers for them should not be cached
+    """
+    try:
+        return _freeze(arg_specs)
+    except TypeError:
+        return None
+
+
+def _freeze(value: typing.Any) -> typing.Hashable:
+    """convert value into an equivalent hashable value
+
+    raises TypeError if value contains unhashable values of other types
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    elif isinstance(value, dict):
+        return tuple(
+            sorted(
+                ((key, _freeze(item)) for key, item in value.items()),
+                key=lambda pair: pair[0],
+            )
         )
+    elif isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    hash(value)
+    return typing.cast(typing.Hashable, value)
+
+
+def get_arg_parser(
+    parse_spec: spec.ParseSpec,
+    arg_specs: typing.Sequence[spec.ArgSpec],
+    config: spec.CLIConfig,
+) -> SubcommandArgumentParser:
+    """get argparse parser for arg specs, reusing cached parsers if possible"""
+
+    fingerprint = get_arg_specs_fingerprint(arg_specs)
+    if fingerprint is None:
+        return create_arg_parser(parse_spec, arg_specs, config)
+
+    key = (
+        fingerprint,
+        config.get('description'),
+        config.get('base_command', '<program>'),
+    )
+    parser = _parser_cache.get(key)
+    if parser is not None:
+        _parser_cache.move_to_end(key)
+        parser.parse_spec = parse_spec
+        return parser
 
-    # parse arguments
-    parse_mode = config.get('parse_mode')
-    if parse_mode is None:
-        args = parser.parse_args(args=raw_args)
-    elif parse_mode == 'known':
-        args, _ = parser.parse_known_args(args=raw_args)
-    elif parse_mode == 'intermixed':
-        args = parser.parse_intermixed_args(args=raw_args)
-    elif parse_mode == 'known_intermixed':
-        args, _ = parser.parse_known_intermixed_args(args=raw_args)
-    else:
-        raise Exception('unknown parse_mode: ' + str(parse_mode))
-    parsed_args = vars(args)
+    parser = create_arg_parser(parse_spec, arg_specs, config)
+    _parser_cache[key] = parser
+    if len(_parser_cache) > parser_cache_size:
+        _parser_cache.popitem(last=False)
+    return parser
+
+
+def get_fast_parser(
+    arg_specs: typing.Sequence[spec.ArgSpec],
+) -> fast_arg_parsing.FastParser | None:
+    """get compiled fast parser for arg specs, reusing cached parsers"""
+
+    key = get_arg_specs_fingerprint(arg_specs)
+    if key is None:
+        return fast_arg_parsing.compile_fast_parser(arg_specs)
+    if key in _fast_parser_cache:
+        _fast_parser_cache.move_to_end(key)
+        return _fast_parser_cache[key]
+
+    fast_parser = fast_arg_parsing.compile_fast_parser(arg_specs)
+    _fast_parser_cache[key] = fast_parser
+    if len(_fast_parser_cache) > parser_cache_size:
+        _fast_parser_cache.popitem(last=False)
+    return fast_parser
 
-    return parsed_args
+
+def reset_parser_cache() -> None:
+    """clear cached parsers, e.g. after mutating arg specs in-place"""
+    _parser_cache.clear()
+    _fast_parser_cache.clear()
 
 
 def get_arg_name(arg_spec: spec.ArgSpec) -> str:
@@ -160,12 +290,71 @@ def is_arg_optional(arg_spec: spec.ArgSpec) -> bool:
 def get_function_args(
     parse_spec: spec.ParseSpec, args: dict[typing.Any, typing.Any]
 ) -> dict[typing.Any, typing.Any]:
-    """extract subset of parsed cli args that are passed to command function"""
+    """extract subset of parsed cli args that are passed to command function
+
+    independent extra_data getters are executed concurrently, sync getters in
+    a thread pool and async getters in a single event loop
+    """
+
+    function_args = _get_function_arg_values(parse_spec, args)
+    pending = _add_extra_data(parse_spec, args, function_args)
+    if len(pending) > 0:
+        concurrent = parse_spec['config'].get('concurrent_extra_data', True)
+        if any(
+            execution._iscoroutinefunction(function)
+            for function, _, _ in pending.values()
+        ):
+            import asyncio
+
+            coroutine = _gather_extra_data(pending, concurrent=concurrent)
+            values = asyncio.run(coroutine)
+        elif concurrent and len(pending) > 1:
+            values = _thread_extra_data(pending)
+        else:
+            values = {
+                name: _timed_call(name, call) for name, call in pending.items()
+            }
+        _store_extra_data(parse_spec, pending, values)
+        function_args.update(values)
+    return function_args
+
+
+async def async_get_function_args(
+    parse_spec: spec.ParseSpec, args: dict[typing.Any, typing.Any]
+) -> dict[typing.Any, typing.Any]:
+    """get_function_args() for use inside an already running event loop"""
+
+    function_args = _get_function_arg_values(parse_spec, args)
+    pending = _add_extra_data(parse_spec, args, function_args)
+    if len(pending) > 0:
+        concurrent = parse_spec['config'].get('concurrent_extra_data', True)
+        values = await _gather_extra_data(pending, concurrent=concurrent)
+        _store_extra_data(parse_spec, pending, values)
+        function_args.update(values)
+    return function_args
+
+
+def has_async_extra_data(parse_spec: spec.ParseSpec) -> bool:
+    """return whether command uses any async extra_data getters"""
+
+    extra_data_getters = parse_spec['config'].get('extra_data_getters', {})
+    for name in parse_spec['command_spec'].get('extra_data', []):
+        if name in extra_data_getters:
+            function, _, _ = _resolve_extra_data_getter(
+                extra_data_getters[name]
+            )
+            if execution._iscoroutinefunction(function):
+                return True
+    return False
+
+
+def _get_function_arg_values(
+    parse_spec: spec.ParseSpec, args: dict[typing.Any, typing.Any]
+) -> dict[typing.Any, typing.Any]:
+    """build function kwargs from parsed cli args"""
 
-    config = parse_spec['config']
     command_spec = parse_spec['command_spec']
 
-    # build function kwargs
     function_args = {}
     for arg_spec in command_spec.get('args', []):
 
@@ -200,7 +389,32 @@ def get_function_args(
         else:
             raise Exception('must specify arg: ' + str(name))
 
-    # inject extra_data
+    return function_args
+
+
+_ExtraDataCall = typing.Tuple[
+    typing.Callable[..., typing.Any],
+    typing.List[typing.Any],
+    typing.Dict[str, typing.Any],
+]
+
+
+def _add_extra_data(
+    parse_spec: spec.ParseSpec,
+    args: dict[typing.Any, typing.Any],
+    function_args: dict[typing.Any, typing.Any],
+) -> dict[str, _ExtraDataCall]:
+    """inject extra_data into function_args in-place
+
+    getters that still need to be executed are returned so that the caller
+    can execute them concurrently
+    """
+
+    config = parse_spec['config']
+    command_spec = parse_spec['command_spec']
+    use_cache = config.get('cache_extra_data', False)
+
+    pending: dict[str, _ExtraDataCall] = {}
     subcommand_extra_data = command_spec.get('extra_data', [])
     all_extra_data = config.get('extra_data', {})
     all_extra_data_getters = config.get('extra_data_getters', {})
@@ -223,34 +437,158 @@ def get_function_args(
         elif name in all_extra_data_getters:
             if name not in function_args:
                 function_reference = all_extra_data_getters[name]
-                function = execution.resolve_function(function_reference)
-
-                # get functions args and kwargs
-                if isinstance(function_reference, list) and len(function_reference) == 3:
-                    inputs = function_reference[2]
-                    if isinstance(inputs, list):
-                        f_args: list[typing.Any] = inputs
-                        f_kwargs: dict[str, typing.Any] = {}
-                    elif isinstance(inputs, dict):
-                        f_kwargs = inputs
-                        f_args = []
-                    else:
-                        raise Exception()
-                else:
-                    f_args = []
-                    f_kwargs = {}
+                if use_cache:
+                    key = _get_extra_data_key(name, function_reference)
+                    if key is not None and key in _extra_data_cache:
+                        function_args[name] = _extra_data_cache[key]
+                        continue
+                pending[name] = _resolve_extra_data_getter(function_reference)
 
-                # execute function
-                if execution._iscoroutinefunction(function):
-                    import asyncio
+        else:
+            raise exceptions.ExtraDataException(
+                'unknown extra_data: ' + str(name)
+            )
+
+    return pending
+
+
+def _resolve_extra_data_getter(
+    function_reference: typing.Any,
+) -> _ExtraDataCall:
+    """resolve getter function along with its args and kwargs"""
+
+    # get functions args and kwargs
+    if isinstance(function_reference, list) and len(function_reference) == 3:
+        inputs = function_reference[2]
+        function_reference = function_reference[:2]
+        if isinstance(inputs, list):
+            f_args: list[typing.Any] = inputs
+            f_kwargs: dict[str, typing.Any] = {}
+        elif isinstance(inputs, dict):
+            f_kwargs = inputs
+            f_args = []
+        else:
+            raise Exception()
+    else:
+        f_args = []
+        f_kwargs = {}
+
+    function = execution.resolve_function(function_reference)
+    return function, f_args, f_kwargs
+
+
+#
+# # extra_data execution
+#
+
+_extra_data_cache: dict[typing.Hashable, typing.Any] = {}
+_extra_data_timings: dict[str, float] = {}
 
-                    function_args[name] = asyncio.run(
-                        function(*f_args, **f_kwargs)
-                    )
-                else:
-                    function_args[name] = function(*f_args, **f_kwargs)
 
+def get_extra_data_timings() -> dict[str, float]:
+    """get seconds taken by most recent execution of each extra_data getter"""
+    return dict(_extra_data_timings)
+
+
+def reset_extra_data_cache() -> None:
+    """clear memoized extra_data values, forcing getters to run again"""
+    _extra_data_cache.clear()
+
+
+def _store_extra_data(
+    parse_spec: spec.ParseSpec,
+    pending: typing.Mapping[str, _ExtraDataCall],
+    values: typing.Mapping[str, typing.Any],
+) -> None:
+    """memoize values of sync getters if cache_extra_data is enabled
+
+    values of async getters are never memoized, because they may be bound to
+    an event loop that is closed once the current invocation finishes
+    """
+    config = parse_spec['config']
+    if not config.get('cache_extra_data', False):
+        return
+    extra_data_getters = config.get('extra_data_getters', {})
+    for name, value in values.items():
+        if execution._iscoroutinefunction(pending[name][0]):
+            continue
+        key = _get_extra_data_key(name, extra_data_getters[name])
+        if key is not None:
+            _extra_data_cache[key] = value
+
+
+def _get_extra_data_key(
+    name: str,
+    function_reference: typing.Any,
+) -> typing.Hashable | None:
+    """get memoization key of extra_data getter, or None if it has none"""
+    try:
+        return (name, _freeze(function_reference))
+    except TypeError:
+        return None
+
+
+def _timed_call(name: str, call: _ExtraDataCall) -> typing.Any:
+    import time
+
+    function, f_args, f_kwargs = call
+    start = time.perf_counter()
+    result = function(*f_args, **f_kwargs)
+    end = time.perf_counter()
+    _extra_data_timings[name] = end - start
+    profile_utils.record_phase('extra_data ' + name, start, end)
+    return result
+
+
+async def _timed_await(name: str, call: _ExtraDataCall) -> typing.Any:
+    import time
+
+    function, f_args, f_kwargs = call
+    start = time.perf_counter()
+    result = await function(*f_args, **f_kwargs)
+    end = time.perf_counter()
+    _extra_data_timings[name] = end - start
+    profile_utils.record_phase('extra_data ' + name, start, end)
+    return result
+
+
+def _thread_extra_data(
+    pending: typing.Mapping[str, _ExtraDataCall],
+) -> dict[str, typing.Any]:
+    """execute sync extra_data getters concurrently in a thread pool"""
+    import concurrent.futures
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=len(pending)
+    ) as executor:
+        futures = {
+            name: executor.submit(_timed_call, name, call)
+            for name, call in pending.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+async def _gather_extra_data(
+    pending: typing.Mapping[str, _ExtraDataCall],
+    concurrent: bool = True,
+) -> dict[str, typing.Any]:
+    """execute extra_data getters concurrently inside running event loop"""
+    import asyncio
+    import functools
+
+    loop = asyncio.get_running_loop()
+    awaitables: list[typing.Awaitable[typing.Any]] = []
+    for name, call in pending.items():
+        function = call[0]
+        if execution._iscoroutinefunction(function):
+            awaitables.append(_timed_await(name, call))
+        elif concurrent:
+            thread_call = functools.partial(_timed_call, name, call)
+            awaitables.append(loop.run_in_executor(None, thread_call))
         else:
-            raise Exception('unknown extra_data: ' + str(name))
+            future = loop.create_future()
+            future.set_result(_timed_call(name, call))
+            awaitables.append(future)
 
-    return function_args
+    values = await asyncio.gather(*awaitables)
+    return dict(zip(pending.keys(), values))
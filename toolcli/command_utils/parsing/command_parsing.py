@@ -7,8 +7,15 @@ import copy
 import types
 import sys
 
+if typing.TYPE_CHECKING:
+    import threading
+
+from toolcli import exceptions
 from toolcli import spec
+from .. import manifest_utils
 from .. import plugin_utils
+from .. import profile_utils
+from . import index_parsing
 
 
 def create_parse_spec(
@@ -18,41 +25,48 @@ def create_parse_spec(
     command_spec: typing.Optional[spec.CommandSpec],
     config: spec.CLIConfig,
     add_standard_subcommands: bool = True,
+    prepare_index: bool = True,
 ) -> spec.ParseSpec:
-    """create ParseSpec data"""
+    """create ParseSpec data
 
-    if config.get('plugins') is not None:
-        for plugin in config['plugins']:
-            if command_index is None:
-                raise NotImplementedError('plugin without command_index')
-            command_index = dict(command_index)
-            plugin_utils.add_plugin(
-                plugin=plugin,
-                command_index=command_index,
-                config=config,
-            )
+    if prepare_index is False, command_index must already be the output of
+    prepare_command_index() for config, and is used as is
+    """
+
+    if prepare_index:
+        command_index = prepare_command_index(
+            command_index=command_index,
+            config=config,
+            add_standard_subcommands=add_standard_subcommands
+            and command_spec is None,
+        )
 
     # get command spec
     if command_spec is None:
 
-        # add default subcommands
         if command_index is None:
             raise Exception('must specify command_spec or command_index')
-        if add_standard_subcommands:
-            command_index = _add_standard_subcommands(command_index, config)
 
         # get command sequence
         if command_sequence is None:
             if raw_command is None:
                 raise Exception('must specify command_sequence or raw_command')
-            command_sequence = parse_command_sequence(
-                raw_command=raw_command,
-                command_index=command_index,
-                config=config,
-            )
+            with profile_utils.profile_phase('parse_command_sequence'):
+                command_sequence = parse_command_sequence(
+                    raw_command=raw_command,
+                    command_index=command_index,
+                    config=config,
+                )
 
         # resolve command spec
-        command_spec = resolve_command_spec(command_index[command_sequence])
+        command_spec_ref = command_index[command_sequence]
+        with profile_utils.profile_phase('resolve_command_spec'):
+            command_spec = resolve_command_spec(command_spec_ref)
+
+        # import modules of command function and spec in background, which
+        # overlaps with arg parsing unless resolving the spec imported them
+        if config.get('warm_import', False):
+            start_warm_import(get_command_spec_imports(command_spec))
 
     parse_spec: spec.ParseSpec = {
         'command_index': command_index,
@@ -64,6 +78,46 @@ def create_parse_spec(
     return parse_spec
 
 
+def prepare_command_index(
+    command_index: typing.Optional[spec.CommandIndex],
+    config: spec.CLIConfig,
+    add_standard_subcommands: bool = True,
+) -> typing.Optional[spec.CommandIndex]:
+    """merge manifest, plugins, and standard subcommands into command_index
+
+    plugins and standard subcommands are added as layers of a
+    LayeredCommandIndex, so merging costs O(layer size) and command_index is
+    neither copied nor modified
+    """
+
+    if config.get('command_manifest') is not None:
+        with profile_utils.profile_phase('load_command_manifest'):
+            command_index = manifest_utils.apply_command_manifest(
+                command_index=command_index,
+                config=config,
+            )
+
+    if config.get('plugins') is not None:
+        with profile_utils.profile_phase('merge_plugins'):
+            for plugin in config['plugins']:
+                if command_index is None:
+                    raise NotImplementedError('plugin without command_index')
+                layered = index_parsing.add_command_index_layer(command_index)
+                plugin_utils.add_plugin(
+                    plugin=plugin,
+                    command_index=layered,
+                    config=config,
+                )
+                command_index = layered
+
+    # add default subcommands
+    if add_standard_subcommands and command_index is not None:
+        with profile_utils.profile_phase('add_standard_subcommands'):
+            command_index = _add_standard_subcommands(command_index, config)
+
+    return command_index
+
+
 def get_standard_subcommands() -> spec.CommandIndex:
     return {
         (
@@ -99,6 +153,15 @@ def get_standard_subcommands() -> spec.CommandIndex:
             'cli',
             'edit',
         ): 'toolcli.command_utils.standard_subcommands.cli.edit_command',
+        (
+            'cli',
+            'manifest',
+            'build',
+        ): 'toolcli.command_utils.standard_subcommands.cli.manifest_command',
+        (
+            'cli',
+            'completion',
+        ): 'toolcli.command_utils.standard_subcommands.cli.completion_command',
     }
 
 
@@ -107,7 +170,6 @@ def _add_standard_subcommands(
 ) -> spec.CommandIndex:
     """add default subcommands to command_index according to config"""
 
-    command_index = dict(command_index)
     standard_subcommands = get_standard_subcommands()
 
     # determine which subcommands to include
@@ -136,16 +198,20 @@ def _add_standard_subcommands(
                     )
 
     # add standard subcommands to command_index
-    if include is not None:
+    if include is not None and len(include) > 0:
+        layer: spec.MutableCommandIndex = {}
         for command_sequence in include:
             if command_sequence in command_index:
                 raise Exception(
                     'name collision in command_index: ' + str(command_sequence)
                 )
             else:
-                command_index[command_sequence] = standard_subcommands[
+                layer[command_sequence] = standard_subcommands[
                     command_sequence
                 ]
+        command_index = index_parsing.add_command_index_layer(
+            command_index, layer
+        )
 
     return command_index
 
@@ -177,64 +243,471 @@ def parse_command_sequence(
 
     args = [arg for arg in args if not arg.startswith('-')]
 
-    # sort command sequences from longest to shortest
-    sequences = list(command_index.keys())
-    for sequence in sequences:
-        if not isinstance(sequence, tuple):
-            raise Exception(
-                'sequences should be tuples of str\'s, got: ' + str(sequence)
-            )
-    if config.get(
+    # find longest (or first, if unsorted) command sequence that matches
+    sort = config.get(
         'sort_command_index', spec.default_config['sort_command_index']
-    ):
-        sequences = sorted(sequences, key=lambda sequence: -len(sequence))
-    else:
-        sequences = list(sequences)
+    )
+    sequence = match_command_index(
+        args=args,
+        command_index=command_index,
+        sort=sort,
+    )
+
+    # resolve aliases, unless a sequence without aliases matches more args
+    command_sequence_aliases = config.get('command_sequence_aliases')
+    if command_sequence_aliases:
+        alias_sequence = match_command_sequence_alias(
+            args=args,
+            command_index=command_index,
+            command_sequence_aliases=command_sequence_aliases,
+            sort=sort,
+        )
+        if alias_sequence is not None and (
+            sequence is None or (sort and alias_sequence[1] > len(sequence))
+        ):
+            sequence = alias_sequence[0]
 
-    # find first command sequence to match
-    for sequence in sequences:
-        length = len(sequence)
-        if sequence == tuple(args[:length]):
-            return sequence
+    if sequence is not None:
+        return sequence
 
     # if not matches, return default command sequence
     default_command_sequence = config.get('default_command_sequence')
     if default_command_sequence is not None:
         return default_command_sequence
     else:
-        print(sys.argv)
-        print(raw_command)
-        print(sequences)
-        print(args)
-        raise Exception('could not parse command sequence')
+        raise exceptions.UnknownCommandException(
+            'unknown command: ' + ' '.join(args),
+            raw_command=raw_command,
+        )
+
+
+#
+# # command trie
+#
+
+_IndexCache = typing.MutableMapping[
+    int,
+    typing.Tuple[
+        typing.Mapping[spec.CommandSequence, typing.Any],
+        typing.Hashable,
+        typing.Any,
+    ],
+]
+
+_command_trie_cache: _IndexCache = {}
+_command_prefix_index_cache: _IndexCache = {}
+_alias_trie_cache: _IndexCache = {}
+_index_cache_size = 16
+
+
+def _get_cached_by_index(
+    cache: _IndexCache,
+    command_index: typing.Mapping[spec.CommandSequence, typing.Any],
+    build: typing.Callable[[typing.Any], typing.Any],
+) -> typing.Any:
+    """get value derived from command_index, building it once per index
+
+    cached values are validated in O(1) against the version of command_index,
+    see _get_index_version()
+    """
+
+    key = id(command_index)
+    version = _get_index_version(command_index)
+    cached = cache.pop(key, None)
+    if (
+        cached is not None
+        and cached[0] is command_index
+        and cached[1] == version
+    ):
+        # reinsert so that eviction removes the least recently used value
+        cache[key] = cached
+        return cached[2]
+
+    value = build(command_index)
+    if len(cache) >= _index_cache_size:
+        del cache[next(iter(cache))]
+    cache[key] = (command_index, version, value)
+    return value
+
+
+def _get_index_version(
+    command_index: typing.Mapping[spec.CommandSequence, typing.Any],
+) -> typing.Hashable:
+    """get cheap version of command_index that changes when it is modified
+
+    LayeredCommandIndex counts its writes. plain mappings cannot report their
+    changes, so only their length is checked. after modifying a plain mapping
+    in place without changing its length, call reset_command_trie_cache()
+    """
+    if isinstance(command_index, index_parsing.LayeredCommandIndex):
+        return (command_index.generation, len(command_index))
+    else:
+        return len(command_index)
+
+
+def build_command_trie(
+    command_index: typing.Mapping[spec.CommandSequence, typing.Any],
+) -> spec.CommandTrie:
+    """build prefix trie of the command sequences in command_index
+
+    any mapping keyed by command sequences can be used, such as the config's
+    command_sequence_aliases
+    """
+
+    root: spec.CommandTrie = {
+        'sequence': None,
+        'position': None,
+        'children': {},
+    }
+    for position, sequence in enumerate(command_index.keys()):
+        if not isinstance(sequence, tuple):
+            raise Exception(
+                'sequences should be tuples of str\'s, got: ' + str(sequence)
+            )
+        node = root
+        for token in sequence:
+            child = node['children'].get(token)
+            if child is None:
+                child = {'sequence': None, 'position': None, 'children': {}}
+                node['children'][token] = child
+            node = child
+        node['sequence'] = sequence
+        node['position'] = position
+    return root
+
+
+def get_command_trie(command_index: spec.CommandIndex) -> spec.CommandTrie:
+    """get prefix trie of command_index, building it once per command_index"""
+    command_trie: spec.CommandTrie = _get_cached_by_index(
+        _command_trie_cache, command_index, build_command_trie
+    )
+    return command_trie
+
+
+def build_command_prefix_index(
+    command_index: spec.CommandIndex,
+) -> spec.CommandPrefixIndex:
+    """map each prefix of command_index to the sequences below it"""
+
+    descendants: dict[spec.CommandSequence, list[spec.CommandSequence]] = {}
+    for sequence in command_index.keys():
+        for length in range(len(sequence) + 1):
+            descendants.setdefault(sequence[:length], []).append(sequence)
+    return {'descendants': descendants}
+
+
+def get_command_prefix_index(
+    command_index: spec.CommandIndex,
+) -> spec.CommandPrefixIndex:
+    """get prefix index of command_index, building it once per command_index"""
+    prefix_index: spec.CommandPrefixIndex = _get_cached_by_index(
+        _command_prefix_index_cache, command_index, build_command_prefix_index
+    )
+    return prefix_index
+
+
+def get_command_descendants(
+    command_index: spec.CommandIndex,
+    command_sequence: spec.CommandSequence,
+) -> typing.Sequence[spec.CommandSequence]:
+    """get sequences of command_index that start with command_sequence
+
+    includes command_sequence itself if it is in command_index
+    """
+    descendants = get_command_prefix_index(command_index)['descendants']
+    return descendants.get(tuple(command_sequence), [])
+
+
+def reset_command_trie_cache(
+    command_index: typing.Optional[
+        typing.Mapping[spec.CommandSequence, typing.Any]
+    ] = None,
+) -> None:
+    """clear cached tries and prefix indices, freeing their memory
+
+    if command_index is given, only the values derived from it are cleared
+    """
+    caches = [
+        _command_trie_cache,
+        _command_prefix_index_cache,
+        _alias_trie_cache,
+    ]
+    for cache in caches:
+        if command_index is None:
+            cache.clear()
+        else:
+            cache.pop(id(command_index), None)
+
+
+def match_command_sequence(
+    args: typing.Sequence[str],
+    command_trie: spec.CommandTrie,
+    sort: bool = True,
+) -> spec.CommandSequence | None:
+    """match args against command_trie
+
+    if sort is True, return the longest matching sequence, otherwise return
+    the matching sequence that appears first in the command index
+    """
+
+    match = command_trie['sequence']
+    match_position = command_trie['position']
+    node = command_trie
+    for arg in args:
+        child = node['children'].get(arg)
+        if child is None:
+            break
+        node = child
+        position = node['position']
+        if node['sequence'] is not None and position is not None:
+            if sort or match_position is None or position < match_position:
+                match = node['sequence']
+                match_position = position
+    return match
+
+
+def match_command_index(
+    args: typing.Sequence[str],
+    command_index: spec.CommandIndex,
+    sort: bool = True,
+) -> spec.CommandSequence | None:
+    """match args against the sequences of command_index
+
+    the layers of a LayeredCommandIndex are matched against separate tries,
+    so that the trie of each layer is built once and reused by every view
+    that includes the layer
+    """
+
+    if not isinstance(command_index, index_parsing.LayeredCommandIndex):
+        return match_command_sequence(
+            args=args,
+            command_trie=get_command_trie(command_index),
+            sort=sort,
+        )
+
+    match = None
+    match_position = None
+    offset = 0
+    for layer in reversed(command_index.maps):
+        layer_trie = get_command_trie(layer)
+        sequence = match_command_sequence(args, layer_trie, sort=sort)
+        if sequence is not None:
+            if sort:
+                if match is None or len(sequence) > len(match):
+                    match = sequence
+            else:
+                node = layer_trie
+                for token in sequence:
+                    node = node['children'][token]
+                position = node['position']
+                if position is not None and (
+                    match_position is None or offset + position < match_position
+                ):
+                    match = sequence
+                    match_position = offset + position
+        offset += len(layer)
+    return match
+
+
+def get_command_sequence_tokens(
+    raw_args: typing.Sequence[str],
+    command_sequence: spec.CommandSequence,
+    config: spec.CLIConfig,
+) -> spec.CommandSequence:
+    """get tokens of raw_args that were matched as command_sequence
+
+    these differ from command_sequence if an alias of the config was used
+    """
+
+    args = [arg for arg in raw_args if not arg.startswith('-')]
+    if tuple(args[: len(command_sequence)]) == command_sequence:
+        return command_sequence
+
+    # use longest alias that matches, as match_command_sequence_alias() does
+    matched = command_sequence
+    matched_alias: spec.CommandSequence = ()
+    command_sequence_aliases = config.get('command_sequence_aliases') or {}
+    for alias, target in command_sequence_aliases.items():
+        target = tuple(target)
+        if command_sequence[: len(target)] != target:
+            continue
+        tokens = tuple(alias) + command_sequence[len(target) :]
+        if tuple(args[: len(tokens)]) == tokens and len(alias) > len(
+            matched_alias
+        ):
+            matched = tokens
+            matched_alias = tuple(alias)
+    return matched
+
+
+def match_command_sequence_alias(
+    args: typing.Sequence[str],
+    command_index: spec.CommandIndex,
+    command_sequence_aliases: typing.Mapping[
+        spec.CommandSequence, spec.CommandSequence
+    ],
+    sort: bool = True,
+) -> tuple[spec.CommandSequence, int] | None:
+    """match args that start with an alias against command_trie
+
+    the longest alias that prefixes args is replaced by its target sequence,
+    so that aliases never have to be expanded into the command index. returns
+    (matched sequence, number of args consumed), or None if no alias matches
+    a sequence that extends its target
+    """
+
+    alias_trie: spec.CommandTrie = _get_cached_by_index(
+        _alias_trie_cache, command_sequence_aliases, build_command_trie
+    )
+    alias = match_command_sequence(args, alias_trie, sort=True)
+    if alias is None or len(alias) == 0:
+        return None
+
+    target = tuple(command_sequence_aliases[alias])
+    sequence = match_command_index(
+        args=target + tuple(args[len(alias) :]),
+        command_index=command_index,
+        sort=sort,
+    )
+    if sequence is None or sequence[: len(target)] != target:
+        return None
+    return sequence, len(sequence) - len(target) + len(alias)
+
+
+#
+# # command spec resolution
+#
+
+# resolved command specs, keyed by module name, module, or function reference
+_command_spec_cache: dict[typing.Any, spec.CommandSpec] = {}
 
 
 def resolve_command_spec(
     command_spec_ref: spec.CommandSpecReference,
+    use_manifest: bool = True,
+    use_cache: bool = True,
 ) -> spec.CommandSpec:
-    """return the command spec referred to by command_spec_ref"""
+    """return the command spec referred to by command_spec_ref
+
+    if use_manifest is True, specs of loaded command manifests are used when
+    they fully represent the spec of a module reference
+
+    if use_cache is True, each module or function reference is resolved once
+    per process. specs with `dynamic` set to True are resolved on every call.
+    use reload_command_spec() or reset_command_spec_cache() to pick up changes
+    """
+    if isinstance(command_spec_ref, dict):
+        return command_spec_ref
+    if use_cache:
+        cached = _command_spec_cache.get(command_spec_ref)
+        if cached is not None:
+            return cached
+
     if isinstance(command_spec_ref, types.ModuleType):
         if hasattr(command_spec_ref, 'get_command_spec'):
             f = typing.cast(
                 typing.Callable[[], spec.CommandSpec],
                 getattr(command_spec_ref, 'get_command_spec'),
             )
-            return f()
+            command_spec = f()
         else:
             raise Exception('module has no function get_command_spec()')
     elif isinstance(command_spec_ref, types.FunctionType):
         f = typing.cast(typing.Callable[[], spec.CommandSpec], command_spec_ref)
-        return f()
-    elif isinstance(command_spec_ref, dict):
-        return command_spec_ref
+        command_spec = f()
     elif isinstance(command_spec_ref, str):
-        module = importlib.import_module(command_spec_ref)
+        if use_manifest:
+            manifest_spec = manifest_utils.get_manifest_command_spec(
+                command_spec_ref
+            )
+            if manifest_spec is not None:
+                return manifest_spec
+        with profile_utils.profile_phase('import ' + command_spec_ref):
+            module = importlib.import_module(command_spec_ref)
         if hasattr(module, 'get_command_spec'):
             f = getattr(module, 'get_command_spec')
-            return f()
+            command_spec = f()
         else:
             raise Exception('module has no function get_command_spec()')
     else:
         raise Exception(
             'could not parse command spec: ' + str(command_spec_ref)
         )
+
+    if use_cache and not command_spec.get('dynamic', False):
+        _command_spec_cache[command_spec_ref] = command_spec
+    return command_spec
+
+
+def reload_command_spec(
+    command_spec_ref: spec.CommandSpecReference,
+) -> spec.CommandSpec:
+    """reload module of command_spec_ref and resolve its spec again
+
+    resolved function references are cleared too, since they may point into
+    the reloaded module
+    """
+    from .. import execution
+
+    _command_spec_cache.pop(command_spec_ref, None)
+    if isinstance(command_spec_ref, str):
+        module = sys.modules.get(command_spec_ref)
+        if module is not None:
+            importlib.reload(module)
+    elif isinstance(command_spec_ref, types.ModuleType):
+        importlib.reload(command_spec_ref)
+    execution.reset_function_cache()
+    return resolve_command_spec(command_spec_ref)
+
+
+def reset_command_spec_cache() -> None:
+    """clear resolved command specs, e.g. after editing command modules"""
+    _command_spec_cache.clear()
+
+
+#
+# # warm imports
+#
+
+
+def get_command_spec_imports(command_spec: spec.CommandSpec) -> list[str]:
+    """get modules needed to run command, from its function and `imports`"""
+    module_names: list[str] = []
+    f = command_spec.get('f')
+    if isinstance(f, (list, tuple)) and len(f) == 2:
+        module_names.append(f[0])
+    module_names.extend(command_spec.get('imports', []))
+    return module_names
+
+
+def start_warm_import(
+    module_names: typing.Sequence[str],
+) -> threading.Thread | None:
+    """import modules on a background thread
+
+    lets argument parsing and extra_data getters overlap with import latency.
+    importing a module that is being warmed waits on its import lock, and
+    errors of warm imports are ignored so that they are raised on first use
+    """
+    import threading
+
+    module_names = [name for name in module_names if name not in sys.modules]
+    if len(module_names) == 0:
+        return None
+    thread = threading.Thread(
+        target=_warm_import,
+        args=(module_names,),
+        name='toolcli-warm-import',
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def _warm_import(module_names: typing.Sequence[str]) -> None:
+    for module_name in module_names:
+        try:
+            with profile_utils.profile_phase('warm import ' + module_name):
+                importlib.import_module(module_name)
+        except BaseException:
+            pass
@@ -0,0 +1,338 @@
+"""lightweight argument parser for the common subset of ArgSpec options
+
+a compiled parser handles store, store_const, store_true, store_false, count,
+and append actions along with nargs, type, choices, default, const, required,
+and dest. anything outside of this subset (unsupported arg specs, unknown
+flags, parse errors, interleaved positionals) returns None so that the caller
+can fall back to argparse, which also produces the standard error messages
+"""
+
+from __future__ import annotations
+
+import typing
+from typing_extensions import TypedDict
+
+from toolcli import spec
+
+
+_supported_actions = {
+    None,
+    'store',
+    'store_const',
+    'store_true',
+    'store_false',
+    'count',
+    'append',
+}
+
+
+class FastArg(TypedDict):
+    dest: str
+    action: typing.Optional[str]
+    min_count: int
+    max_count: typing.Optional[int]
+    nargs: typing.Any
+    const: typing.Any
+    default: typing.Any
+    type: typing.Any
+    choices: typing.Optional[typing.Sequence[typing.Any]]
+    required: bool
+
+
+class FastParser(TypedDict):
+    options: typing.Dict[str, FastArg]
+    positionals: typing.List[FastArg]
+    args: typing.List[FastArg]
+
+
+class _ParseFailure(Exception):
+    pass
+
+
+def compile_fast_parser(
+    arg_specs: typing.Sequence[spec.ArgSpec],
+) -> FastParser | None:
+    """compile arg specs into a FastParser, or None if unsupported"""
+
+    options: dict[str, FastArg] = {}
+    positionals: list[FastArg] = []
+    args: list[FastArg] = []
+    for arg_spec in arg_specs:
+        fast_arg = _compile_arg(arg_spec)
+        if fast_arg is None:
+            return None
+        name = arg_spec['name']
+        if isinstance(name, str):
+            names = [name]
+        else:
+            names = list(name)
+        if all(name.startswith('-') for name in names):
+            for name in names:
+                if name in options:
+                    return None
+                options[name] = fast_arg
+        elif len(names) == 1:
+            if fast_arg['required'] and 'required' in arg_spec:
+                return None
+            if fast_arg['action'] not in (None, 'store'):
+                return None
+            positionals.append(fast_arg)
+        else:
+            return None
+        args.append(fast_arg)
+
+    return {'options': options, 'positionals': positionals, 'args': args}
+
+
+def _compile_arg(arg_spec: spec.ArgSpec) -> FastArg | None:
+    kwargs: dict[str, typing.Any] = {
+        k: v for k, v in arg_spec.items() if v is not None
+    }
+    action = kwargs.get('action')
+    if action not in _supported_actions:
+        return None
+
+    name = arg_spec['name']
+    if isinstance(name, str):
+        names = [name]
+    elif isinstance(name, (list, tuple)):
+        names = list(name)
+    else:
+        return None
+    is_optional = names[0].startswith('-')
+
+    # determine dest the same way that argparse does
+    dest = kwargs.get('dest')
+    if dest is None:
+        if is_optional:
+            long_names = [name for name in names if name.startswith('--')]
+            if len(long_names) > 0:
+                dest = long_names[0][2:]
+            else:
+                dest = names[0][1:]
+            dest = dest.replace('-', '_')
+        else:
+            dest = names[0]
+
+    # determine number of values consumed
+    nargs = kwargs.get('nargs')
+    if action in ('store_true', 'store_false', 'store_const', 'count'):
+        if nargs is not None:
+            return None
+        min_count, max_count = 0, 0
+    elif nargs is None:
+        min_count, max_count = 1, 1
+    elif nargs == '?':
+        min_count, max_count = 0, 1
+    elif nargs == '*':
+        min_count, max_count = 0, None
+    elif nargs == '+':
+        min_count, max_count = 1, None
+    elif isinstance(nargs, int) and nargs > 0:
+        min_count, max_count = nargs, nargs
+    else:
+        return None
+
+    # determine default
+    if 'default' in kwargs:
+        default = kwargs['default']
+    elif action == 'store_true':
+        default = False
+    elif action == 'store_false':
+        default = True
+    elif not is_optional and nargs == '*':
+        default = []
+    else:
+        default = None
+
+    if action == 'store_true':
+        const: typing.Any = True
+    elif action == 'store_false':
+        const = False
+    else:
+        const = kwargs.get('const')
+
+    if is_optional:
+        required = bool(kwargs.get('required', False))
+    else:
+        required = min_count > 0
+
+    fast_arg: FastArg = {
+        'dest': dest,
+        'action': action,
+        'min_count': min_count,
+        'max_count': max_count,
+        'nargs': nargs,
+        'const': const,
+        'default': default,
+        'type': kwargs.get('type'),
+        'choices': kwargs.get('choices'),
+        'required': required,
+    }
+    return fast_arg
+
+
+def parse_args_fast(
+    parser: FastParser,
+    raw_args: typing.Sequence[str],
+) -> spec.ParsedArgs | None:
+    """parse raw_args with a compiled FastParser, or None if unable"""
+    try:
+        return _parse_args(parser, raw_args)
+    except _ParseFailure:
+        return None
+
+
+def _parse_args(
+    parser: FastParser,
+    raw_args: typing.Sequence[str],
+) -> spec.ParsedArgs:
+
+    options = parser['options']
+    values: dict[str, typing.Any] = {}
+    seen: set[str] = set()
+    positional_tokens: list[str] = []
+    positional_chunks = 0
+    previous_positional = False
+
+    i = 0
+    n_args = len(raw_args)
+    while i < n_args:
+        token = raw_args[i]
+
+        # positional tokens
+        if not token.startswith('-'):
+            if not previous_positional:
+                positional_chunks += 1
+            positional_tokens.append(token)
+            previous_positional = True
+            i += 1
+            continue
+        previous_positional = False
+
+        # option tokens, leaving '-', '--', and negative numbers to argparse
+        if '=' in token and token.startswith('--'):
+            flag, attached = token.split('=', 1)
+            attached_values: list[str] | None = [attached]
+        else:
+            flag = token
+            attached_values = None
+        fast_arg = options.get(flag)
+        if fast_arg is None:
+            raise _ParseFailure()
+        i += 1
+
+        # gather values of option
+        if attached_values is not None:
+            if fast_arg['max_count'] == 0:
+                raise _ParseFailure()
+            option_values = attached_values
+        else:
+            option_values = []
+            max_count = fast_arg['max_count']
+            while (max_count is None or len(option_values) < max_count) and (
+                i < n_args and not raw_args[i].startswith('-')
+            ):
+                option_values.append(raw_args[i])
+                i += 1
+        if len(option_values) < fast_arg['min_count']:
+            raise _ParseFailure()
+
+        # store option values
+        dest = fast_arg['dest']
+        action = fast_arg['action']
+        seen.add(dest)
+        if action in ('store_true', 'store_false', 'store_const'):
+            values[dest] = fast_arg['const']
+        elif action == 'count':
+            if dest in values:
+                values[dest] += 1
+            else:
+                values[dest] = (fast_arg['default'] or 0) + 1
+        else:
+            value = _convert_values(fast_arg, option_values)
+            if action == 'append':
+                if dest in values:
+                    previous = list(values[dest])
+                elif fast_arg['default'] is not None:
+                    previous = list(fast_arg['default'])
+                else:
+                    previous = []
+                previous.append(value)
+                values[dest] = previous
+            else:
+                values[dest] = value
+
+    # argparse consumes interleaved positional chunks idiosyncratically
+    if positional_chunks > 1:
+        raise _ParseFailure()
+
+    # allocate positional tokens to positional args
+    positionals = parser['positionals']
+    remaining = len(positional_tokens)
+    min_remaining = sum(fast_arg['min_count'] for fast_arg in positionals)
+    position = 0
+    for fast_arg in positionals:
+        min_remaining -= fast_arg['min_count']
+        available = remaining - min_remaining
+        if available < fast_arg['min_count']:
+            raise _ParseFailure()
+        max_count = fast_arg['max_count']
+        if max_count is None:
+            count = available
+        else:
+            count = min(max_count, available)
+        tokens = positional_tokens[position : position + count]
+        position += count
+        remaining -= count
+        if count == 0 and fast_arg['nargs'] in ('?', '*'):
+            continue
+        values[fast_arg['dest']] = _convert_values(fast_arg, tokens)
+        seen.add(fast_arg['dest'])
+    if remaining > 0:
+        raise _ParseFailure()
+
+    # fill in defaults
+    for fast_arg in parser['args']:
+        dest = fast_arg['dest']
+        if dest in seen:
+            continue
+        if fast_arg['required']:
+            raise _ParseFailure()
+        default = fast_arg['default']
+        if isinstance(default, str) and fast_arg['type'] is not None:
+            default = _convert_value(fast_arg, default, check_choices=False)
+        values.setdefault(dest, default)
+
+    return values
+
+
+def _convert_values(fast_arg: FastArg, tokens: typing.List[str]) -> typing.Any:
+    nargs = fast_arg['nargs']
+    if nargs is None:
+        return _convert_value(fast_arg, tokens[0])
+    elif nargs == '?':
+        if len(tokens) == 0:
+            return fast_arg['const']
+        return _convert_value(fast_arg, tokens[0])
+    else:
+        return [_convert_value(fast_arg, token) for token in tokens]
+
+
+def _convert_value(
+    fast_arg: FastArg,
+    token: str,
+    check_choices: bool = True,
+) -> typing.Any:
+    type_function = fast_arg['type']
+    if type_function is not None:
+        try:
+            value = type_function(token)
+        except Exception:
+            raise _ParseFailure()
+    else:
+        value = token
+    choices = fast_arg['choices']
+    if check_choices and choices is not None and value not in choices:
+        raise _ParseFailure()
+    return value
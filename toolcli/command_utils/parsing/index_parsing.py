@@ -1,23 +1,167 @@
 from __future__ import annotations
 
+import collections
 import os
 import importlib
+import typing
 
 from toolcli import spec
 
 
+class LayeredCommandIndex(
+    typing.ChainMap[spec.CommandSequence, spec.CommandSpecReference]
+):
+    """copy-on-write view of a command index and the layers merged into it
+
+    layers are disjoint, each sequence is stored in exactly one layer. writes
+    go into the newest layer and raise on sequences of older layers, so the
+    underlying indices are never modified. iteration yields the sequences of
+    the base index first and then those of each layer in the order added
+
+    writes increment `generation`, which lets caches of values derived from
+    the index detect changes in O(1). views created by new_child() share the
+    generation of their parent, since they include the layers of the parent
+    """
+
+    def __init__(self, *maps: spec.MutableCommandIndex) -> None:
+        super().__init__(*maps)
+        self._generation = [0]
+
+    @property
+    def generation(self) -> int:
+        """number of writes to the layers of this index and related views"""
+        return self._generation[0]
+
+    def new_child(
+        self,
+        m: spec.MutableCommandIndex | None = None,
+    ) -> LayeredCommandIndex:
+        child = super().new_child(m)
+        child._generation = self._generation
+        return child
+
+    @property
+    def parents(self) -> LayeredCommandIndex:
+        parents = LayeredCommandIndex(*self.maps[1:])
+        parents._generation = self._generation
+        return parents
+
+    def _on_write(self) -> None:
+        from . import command_parsing
+
+        self._generation[0] += 1
+        command_parsing.reset_command_trie_cache(self.maps[0])
+
+    def __setitem__(
+        self,
+        key: spec.CommandSequence,
+        value: spec.CommandSpecReference,
+    ) -> None:
+        if key not in self.maps[0] and key in self:
+            raise Exception('name collision in command_index: ' + str(key))
+        self.maps[0][key] = value
+        self._on_write()
+
+    def __delitem__(self, key: spec.CommandSequence) -> None:
+        super().__delitem__(key)
+        self._on_write()
+
+    def pop(self, key: typing.Any, *args: typing.Any) -> typing.Any:
+        value = super().pop(key, *args)
+        self._on_write()
+        return value
+
+    def popitem(
+        self,
+    ) -> tuple[spec.CommandSequence, spec.CommandSpecReference]:
+        item = super().popitem()
+        self._on_write()
+        return item
+
+    def clear(self) -> None:
+        super().clear()
+        self._on_write()
+
+    def __len__(self) -> int:
+        return sum(len(layer) for layer in self.maps)
+
+    def __iter__(self) -> typing.Iterator[spec.CommandSequence]:
+        for layer in reversed(self.maps):
+            yield from layer
+
+
+def add_command_index_layer(
+    command_index: spec.CommandIndex,
+    layer: spec.MutableCommandIndex | None = None,
+) -> LayeredCommandIndex:
+    """get view of command_index with layer added as its newest layer
+
+    layer must not contain sequences of command_index. if no layer is given,
+    an empty layer is added for writes. costs O(1), command_index is not
+    copied
+    """
+    if layer is None:
+        layer = {}
+    if isinstance(command_index, LayeredCommandIndex):
+        return command_index.new_child(layer)
+    else:
+        # only the newest layer is written, so the base may be read-only
+        base = typing.cast(spec.MutableCommandIndex, command_index)
+        return LayeredCommandIndex(layer, base)
+
+
 def filetree_to_command_index(
     root_module_name: str,
     postfix: str = '_command.py',
+    cache_dir: str | None = None,
+    cache_key: str | None = None,
 ) -> spec.CommandIndex:
+    """create command index from the files of a package
 
-    import inspect
+    if cache_dir is given, the index is stored in a cache file and reused by
+    later calls, skipping both the import of the root module and the walk of
+    the package tree. the cache is invalidated when cache_key (e.g. a package
+    version) changes, or, if no cache_key is given, when the mtime of any
+    directory in the package tree changes
+    """
 
     if not postfix.endswith('.py'):
         raise Exception('postfix must end with ".py"')
 
+    if cache_dir is not None:
+        cache_path = get_command_index_cache_path(
+            root_module_name=root_module_name,
+            postfix=postfix,
+            cache_dir=cache_dir,
+        )
+        cached = load_command_index_cache(cache_path, cache_key=cache_key)
+        if cached is not None:
+            return cached
+
+    command_index, mtimes = _walk_command_filetree(root_module_name, postfix)
+
+    if cache_dir is not None:
+        save_command_index_cache(
+            cache_path=cache_path,
+            command_index=command_index,
+            cache_key=cache_key,
+            mtimes=mtimes,
+        )
+
+    return command_index
+
+
+def _walk_command_filetree(
+    root_module_name: str,
+    postfix: str,
+) -> tuple[spec.CommandIndex, dict[str, float]]:
+    """walk package tree, returning command index and mtimes of dirs walked"""
+
+    import inspect
+
     command_sequences: list[spec.CommandSequence] = []
     modules = []
+    mtimes: dict[str, float] = {}
 
     # add root node if it has a get_command_spec attribute
     root_module = importlib.import_module(root_module_name)
@@ -25,8 +169,11 @@ def filetree_to_command_index(
         command_sequences.append(tuple())
         modules.append(root_module_name)
 
-    root_module_path = os.path.dirname(inspect.getfile(root_module))
+    root_module_file = inspect.getfile(root_module)
+    mtimes[root_module_file] = os.stat(root_module_file).st_mtime
+    root_module_path = os.path.dirname(root_module_file)
     for dirname, subdirs, files in os.walk(root_module_path):
+        mtimes[dirname] = os.stat(dirname).st_mtime
         for file in files:
             if file.endswith(postfix):
 
@@ -47,26 +194,133 @@ def filetree_to_command_index(
 
     command_index: spec.CommandIndex = dict(zip(command_sequences, modules))
 
-    return command_index
+    return command_index, mtimes
+
+
+def get_command_index_cache_path(
+    root_module_name: str,
+    postfix: str,
+    cache_dir: str,
+) -> str:
+    """get path of command index cache file"""
+    import hashlib
+
+    name_hash = hashlib.md5((root_module_name + postfix).encode()).hexdigest()
+    filename = root_module_name + '__' + name_hash + '.json'
+    return os.path.join(cache_dir, filename)
+
+
+def load_command_index_cache(
+    cache_path: str,
+    cache_key: str | None = None,
+) -> spec.CommandIndex | None:
+    """load command index from cache file, returning None if invalid"""
+    import json
+
+    try:
+        with open(cache_path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if data.get('cache_key') != cache_key:
+        return None
+    if cache_key is None:
+        for path, mtime in data['mtimes'].items():
+            try:
+                if os.stat(path).st_mtime != mtime:
+                    return None
+            except OSError:
+                return None
+
+    return {
+        tuple(sequence): module_ref
+        for sequence, module_ref in data['command_index']
+    }
+
+
+def save_command_index_cache(
+    cache_path: str,
+    command_index: spec.CommandIndex,
+    cache_key: str | None,
+    mtimes: typing.Mapping[str, float],
+) -> None:
+    """save command index to cache file atomically"""
+    import json
+    import tempfile
+
+    data = {
+        'cache_key': cache_key,
+        'mtimes': dict(mtimes),
+        'command_index': [
+            [list(sequence), module_ref]
+            for sequence, module_ref in command_index.items()
+        ],
+    }
+
+    dirname = os.path.dirname(cache_path)
+    if len(dirname) > 0:
+        os.makedirs(dirname, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dirname or None, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 
 def add_command_sequence_aliases(
     command_index: spec.CommandIndex,
     config: spec.CLIConfig,
 ) -> spec.CommandIndex:
-    """add command sequence aliases to command index"""
+    """add command sequence aliases to command index
+
+    `command_sequence_aliases` maps each alias to the sequence it stands for.
+    every sequence that starts with the target gains a copy that starts with
+    the alias instead, unless that copy is already in command_index. each alias
+    grafts the subtree of its target from the prefix trie of command_index, so
+    sequences outside of that subtree are never visited
+
+    aliases do not need to be expanded for dispatch, parse_command_sequence()
+    resolves them at lookup time. expanding them lists them in help output
+    """
+    from . import command_parsing
+
     command_sequence_aliases = config.get('command_sequence_aliases')
-    if command_sequence_aliases is not None:
-
-        # add aliases to command index
-        command_index = dict(command_index)
-        for sequence, spec_ref in command_index.items():
-            for alias in command_sequence_aliases:
-                if sequence[: len(alias)] == alias:
-                    len_alias = len(alias)
-                    alias_command = alias + sequence[len_alias:]
-                    if alias_command not in command_index:
-                        command_index[alias_command] = command_index[sequence]
+    if not command_sequence_aliases:
+        return command_index
 
-    return command_index
+    command_trie = command_parsing.get_command_trie(command_index)
+    layer: spec.MutableCommandIndex = {}
+    for alias, target in command_sequence_aliases.items():
+
+        # find subtree of target
+        node: spec.CommandTrie | None = command_trie
+        for token in target:
+            if node is None:
+                break
+            node = node['children'].get(token)
+        if node is None:
+            continue
+
+        # graft subtree onto alias
+        stack: list[tuple[spec.CommandTrie, spec.CommandSequence]] = [
+            (node, ())
+        ]
+        while len(stack) > 0:
+            node, suffix = stack.pop()
+            sequence = node['sequence']
+            if sequence is not None:
+                alias_sequence = tuple(alias) + suffix
+                if (
+                    alias_sequence not in command_index
+                    and alias_sequence not in layer
+                ):
+                    layer[alias_sequence] = command_index[sequence]
+            for token, child in node['children'].items():
+                stack.append((child, suffix + (token,)))
 
+    return add_command_index_layer(command_index, layer)
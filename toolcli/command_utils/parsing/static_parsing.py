@@ -0,0 +1,186 @@
+"""extract command spec metadata from source code without importing modules
+
+only modules whose get_command_spec() consists of a single `return {...}`
+statement with a literal help string are handled statically. everything else
+returns None so that the caller can fall back to importing the module
+"""
+
+from __future__ import annotations
+
+import ast
+import typing
+
+from toolcli import spec
+from .. import manifest_utils
+from . import command_parsing
+
+
+_static_keys = ('help', 'hidden', 'args')
+
+_static_spec_cache: dict[str, spec.CommandSpec | None] = {}
+
+
+def resolve_command_spec_metadata(
+    command_spec_ref: spec.CommandSpecReference,
+) -> spec.CommandSpec:
+    """return help, hidden, and args of command spec, avoiding imports
+
+    module references are read from loaded manifests or statically from source
+    when possible, other references are resolved normally
+    """
+    if isinstance(command_spec_ref, str):
+        metadata = manifest_utils.get_manifest_command_spec(
+            command_spec_ref, complete=False
+        )
+        if metadata is not None:
+            return metadata
+        metadata = get_static_command_spec(command_spec_ref)
+        if metadata is not None:
+            return metadata
+    return command_parsing.resolve_command_spec(command_spec_ref)
+
+
+def get_static_command_spec(module_name: str) -> spec.CommandSpec | None:
+    """read help, hidden, and args of module's command spec from its source"""
+
+    if module_name in _static_spec_cache:
+        return _static_spec_cache[module_name]
+
+    path = get_module_path(module_name)
+    if path is None:
+        metadata = None
+    else:
+        try:
+            with open(path, 'r') as f:
+                source = f.read()
+            metadata = parse_static_command_spec(source)
+        except (OSError, SyntaxError, ValueError):
+            metadata = None
+
+    _static_spec_cache[module_name] = metadata
+    return metadata
+
+
+def reset_static_spec_cache() -> None:
+    """clear statically extracted specs, e.g. after editing source files"""
+    _static_spec_cache.clear()
+
+
+def parse_static_command_spec(source: str) -> spec.CommandSpec | None:
+    """extract help, hidden, and args from source of a command module"""
+
+    tree = ast.parse(source)
+    for node in tree.body:
+        if (
+            isinstance(node, ast.FunctionDef)
+            and node.name == 'get_command_spec'
+        ):
+            return _parse_get_command_spec(node)
+    return None
+
+
+def _parse_get_command_spec(
+    node: ast.FunctionDef,
+) -> spec.CommandSpec | None:
+
+    # function body must be a single return statement of a dict literal
+    body = node.body
+    if len(body) > 0 and isinstance(body[0], ast.Expr):
+        if isinstance(_literal(body[0].value), str):
+            body = body[1:]
+    if len(body) != 1 or not isinstance(body[0], ast.Return):
+        return None
+    returned = body[0].value
+    if not isinstance(returned, ast.Dict):
+        return None
+
+    metadata: dict[str, typing.Any] = {}
+    for key_node, value_node in zip(returned.keys, returned.values):
+        key = _literal(key_node)
+        if not isinstance(key, str):
+            return None
+        if key not in _static_keys:
+            continue
+        if key == 'args':
+            args = _parse_args(value_node)
+            if args is not None:
+                metadata['args'] = args
+        else:
+            value = _literal(value_node, default=_missing)
+            if value is _missing:
+                return None
+            metadata[key] = value
+
+    if not isinstance(metadata.get('help', ''), str):
+        return None
+
+    return typing.cast(spec.CommandSpec, metadata)
+
+
+def _parse_args(node: ast.expr) -> list[spec.ArgSpec] | None:
+    """extract literal entries of each arg spec
+
+    a non-literal completer is recorded as `True` so that completion knows
+    whether the module needs to be imported to complete the arg's values
+    """
+
+    if not isinstance(node, (ast.List, ast.Tuple)):
+        return None
+    args = []
+    for element in node.elts:
+        if not isinstance(element, ast.Dict):
+            return None
+        arg_spec: dict[str, typing.Any] = {}
+        for key_node, value_node in zip(element.keys, element.values):
+            key = _literal(key_node)
+            if not isinstance(key, str):
+                return None
+            value = _literal(value_node, default=_missing)
+            if value is not _missing:
+                arg_spec[key] = value
+            elif key == 'completer':
+                arg_spec[key] = True
+        if 'name' not in arg_spec:
+            return None
+        args.append(typing.cast(spec.ArgSpec, arg_spec))
+    return args
+
+
+_missing = object()
+
+
+def _literal(
+    node: ast.expr | None,
+    default: typing.Any = None,
+) -> typing.Any:
+    """evaluate node if it is a literal, otherwise return default"""
+    if node is None:
+        return default
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError):
+        return default
+
+
+def get_module_path(module_name: str) -> str | None:
+    """get source path of module without importing it"""
+    import importlib.util
+    import sys
+
+    module = sys.modules.get(module_name)
+    if module is not None:
+        path = getattr(module, '__file__', None)
+        if isinstance(path, str) and path.endswith('.py'):
+            return path
+        return None
+
+    try:
+        module_spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        return None
+    if module_spec is None or not module_spec.has_location:
+        return None
+    origin = module_spec.origin
+    if origin is None or not origin.endswith('.py'):
+        return None
+    return origin
@@ -0,0 +1,48 @@
+"""argparse parser that renders toolcli help and usage
+
+kept apart from arg_parsing so that argparse is only imported once a command
+is actually parsed with it, keeping paths like shell completion lighter
+"""
+
+from __future__ import annotations
+
+import argparse
+import typing
+
+from toolcli import exceptions
+from toolcli import spec
+from .. import help_utils
+
+
+class SubcommandArgumentParser(argparse.ArgumentParser):
+    """subclass of argparse.ArgumentParser that stores current ParseSpec"""
+
+    def __init__(
+        self: SubcommandArgumentParser,
+        parse_spec: spec.ParseSpec,
+        **kwargs: typing.Any,
+    ):
+        self.parse_spec = parse_spec
+        super().__init__(**kwargs)
+
+    def print_usage(
+        self,
+        file: typing.Optional[typing.IO[str]] = None,
+    ) -> None:
+        help_utils.print_subcommand_usage(self.parse_spec)
+
+    def print_help(
+        self,
+        file: typing.Optional[typing.IO[str]] = None,
+    ) -> None:
+        if self.parse_spec['command_sequence'] == ():
+            help_utils.print_root_command_help(self.parse_spec)
+        else:
+            help_utils.print_subcommand_help(self.parse_spec)
+
+    def error(self, message: str) -> typing.NoReturn:
+        """raise ArgumentException instead of exiting, unless in exit mode"""
+        config = self.parse_spec.get('config') or {}
+        if config.get('error_mode', 'exit') != 'exit':
+            raise exceptions.ArgumentException(message)
+        super().error(message)
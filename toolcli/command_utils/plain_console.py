@@ -0,0 +1,350 @@
+"""minimal console that renders toolcli markup without importing rich
+
+supports the subset of rich markup and styles used by toolcli help output:
+- tags that name entries of a StyleTheme, such as [title] or [option]
+- closing tags [/name] and [/], and escaped brackets \\[
+- style attributes (bold, dim, italic, underline, blink, reverse, strike)
+- colors given as standard names, color(n), #rrggbb, or rgb(r,g,b), and
+  background colors given as `on <color>`
+- hyperlinks given as `link <url>`
+
+unknown style words are ignored. styling is only emitted when output is a
+terminal, following the NO_COLOR and FORCE_COLOR conventions
+
+like rich, lines longer than the console width are wrapped at spaces, and
+words longer than the width are folded
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import typing
+
+from toolcli import spec
+
+
+_markup_pattern = re.compile(r'((\\*)\[([a-z#/@][^[]*?)])')
+
+# sgr codes and hyperlinks, which take up no width
+_escape_pattern = re.compile(r'\x1b\[[0-9;]*m|\x1b\]8;;.*?\x1b\\')
+
+_attributes = {
+    'bold': '1',
+    'b': '1',
+    'dim': '2',
+    'd': '2',
+    'italic': '3',
+    'i': '3',
+    'underline': '4',
+    'u': '4',
+    'blink': '5',
+    'reverse': '7',
+    'r': '7',
+    'strike': '9',
+    's': '9',
+}
+
+_standard_colors = [
+    'black',
+    'red',
+    'green',
+    'yellow',
+    'blue',
+    'magenta',
+    'cyan',
+    'white',
+]
+
+_rgb_pattern = re.compile(r'rgb\((\d+),(\d+),(\d+)\)')
+_color_number_pattern = re.compile(r'color\((\d+)\)')
+
+
+class PlainConsole:
+    """console with the print and capture interface of rich.console.Console"""
+
+    def __init__(
+        self,
+        style_theme: spec.StyleTheme | None = None,
+        file: typing.TextIO | None = None,
+        width: int | None = None,
+    ) -> None:
+        if style_theme is None:
+            style_theme = {}
+        self.style_theme = typing.cast(typing.Mapping[str, str], style_theme)
+        self.file = file
+        self.width = width
+        self._capture_buffer: list[str] | None = None
+        self._styles: dict[tuple[str, bool], tuple[str, str | None]] = {}
+
+    def print(
+        self,
+        *objects: typing.Any,
+        sep: str = ' ',
+        end: str = '\n',
+        style: str | None = None,
+    ) -> None:
+        """render markup of objects and write it to output"""
+        markup = sep.join(str(item) for item in objects)
+        text = render_markup(
+            markup,
+            get_style=self._get_style,
+            style=style,
+            color=self._is_color_enabled(),
+        )
+        text = wrap_text(text, self._get_width())
+        if self._capture_buffer is not None:
+            self._capture_buffer.append(text + end)
+        else:
+            file = self.file if self.file is not None else sys.stdout
+            file.write(text + end)
+
+    def begin_capture(self) -> None:
+        """capture printed output instead of writing it"""
+        self._capture_buffer = []
+
+    def end_capture(self) -> str:
+        """stop capturing and return captured output"""
+        if self._capture_buffer is None:
+            return ''
+        captured = ''.join(self._capture_buffer)
+        self._capture_buffer = None
+        return captured
+
+    def _get_width(self) -> int:
+        if self.width is not None:
+            return self.width
+        import shutil
+
+        return shutil.get_terminal_size().columns
+
+    def _is_color_enabled(self) -> bool:
+        if os.environ.get('NO_COLOR'):
+            return False
+        if os.environ.get('FORCE_COLOR'):
+            return True
+        if os.environ.get('TERM') == 'dumb':
+            return False
+        file = self.file if self.file is not None else sys.stdout
+        try:
+            return file.isatty()
+        except Exception:
+            return False
+
+    def _get_style(self, name: str) -> tuple[str, str | None]:
+        truecolor = os.environ.get('COLORTERM') in ('truecolor', '24bit')
+        key = (name, truecolor)
+        if key not in self._styles:
+            definition = self.style_theme.get(name, name)
+            self._styles[key] = parse_style(definition, truecolor=truecolor)
+        return self._styles[key]
+
+
+def render_markup(
+    markup: str,
+    get_style: typing.Callable[[str], tuple[str, str | None]],
+    style: str | None = None,
+    color: bool = True,
+) -> str:
+    """render markup into text with ansi escape codes
+
+    get_style maps a tag name to (sgr codes, link url)
+    """
+
+    stack: list[str] = []
+    if style is not None:
+        stack.append(style)
+
+    pieces = []
+
+    def add_text(text: str) -> None:
+        if len(text) == 0:
+            return
+        if not color or len(stack) == 0:
+            pieces.append(text)
+            return
+        codes = []
+        link = None
+        for name in stack:
+            name_codes, name_link = get_style(name)
+            if len(name_codes) > 0:
+                codes.append(name_codes)
+            if name_link is not None:
+                link = name_link
+        if len(codes) > 0:
+            prefix = '\x1b[' + ';'.join(codes) + 'm'
+            suffix = '\x1b[0m'
+        else:
+            prefix = ''
+            suffix = ''
+        if link is not None:
+            prefix = '\x1b]8;;' + link + '\x1b\\' + prefix
+            suffix = suffix + '\x1b]8;;\x1b\\'
+
+        # style each line separately so that styles do not span newlines
+        lines = [
+            prefix + line + suffix if len(line) > 0 else line
+            for line in text.split('\n')
+        ]
+        pieces.append('\n'.join(lines))
+
+    position = 0
+    for match in _markup_pattern.finditer(markup):
+        _, escapes, tag = match.groups()
+        start, end = match.span()
+        add_text(markup[position:start] + '\\' * (len(escapes) // 2))
+        position = end
+        if len(escapes) % 2 == 1:
+            add_text('[' + tag + ']')
+        elif tag.startswith('/'):
+            name = tag[1:]
+            if name == '':
+                if len(stack) > 0:
+                    stack.pop()
+            elif name in stack:
+                del stack[len(stack) - 1 - stack[::-1].index(name)]
+        else:
+            stack.append(tag)
+    add_text(markup[position:])
+
+    return ''.join(pieces)
+
+
+def wrap_text(text: str, width: int) -> str:
+    """wrap each line of rendered text to width
+
+    lines are broken at spaces and words longer than width are folded. escape
+    codes do not count towards width and carry over to continuation lines
+    """
+    if width <= 0:
+        return text
+    return '\n'.join(
+        '\n'.join(_wrap_line(line, width)) for line in text.split('\n')
+    )
+
+
+def _wrap_line(line: str, width: int) -> list[str]:
+    if len(line) <= width:
+        return [line]
+
+    # split into visible characters, each with its preceding escape codes
+    units = []
+    escapes = ''
+    position = 0
+    for match in _escape_pattern.finditer(line):
+        for character in line[position : match.start()]:
+            units.append(escapes + character)
+            escapes = ''
+        escapes += match.group(0)
+        position = match.end()
+    for character in line[position:]:
+        units.append(escapes + character)
+        escapes = ''
+    if len(units) <= width:
+        return [line]
+
+    lines = []
+    start = 0
+    carry = ''
+    while len(units) - start > width:
+        end = start + width
+        space = None
+        for index in range(min(end, len(units) - 1), start, -1):
+            if units[index].endswith(' '):
+                space = index
+                break
+        if space is None:
+            lines.append(carry + ''.join(units[start:end]))
+            carry = ''
+            start = end
+        else:
+            lines.append(carry + ''.join(units[start:space]))
+            carry = units[space][:-1]
+            start = space + 1
+    lines.append(carry + ''.join(units[start:]) + escapes)
+    return lines
+
+
+def parse_style(
+    definition: str,
+    truecolor: bool = True,
+) -> tuple[str, str | None]:
+    """parse rich-style definition into (sgr codes, link url)"""
+
+    codes = []
+    link = None
+    words = definition.split()
+    index = 0
+    while index < len(words):
+        word = words[index].lower()
+        index += 1
+        if word == 'link' and index < len(words):
+            link = words[index]
+            index += 1
+        elif word == 'not' and index < len(words):
+            index += 1
+        elif word in _attributes:
+            codes.append(_attributes[word])
+        elif word == 'on' and index < len(words):
+            background = _parse_color(words[index].lower(), truecolor, 40)
+            index += 1
+            if background is not None:
+                codes.append(background)
+        else:
+            foreground = _parse_color(word, truecolor, 30)
+            if foreground is not None:
+                codes.append(foreground)
+    return ';'.join(codes), link
+
+
+def _parse_color(word: str, truecolor: bool, base: int) -> str | None:
+    """parse color into sgr code
+
+    base is 30 for foreground colors and 40 for background colors
+    """
+
+    if word == 'default':
+        return str(base + 9)
+    if word in _standard_colors:
+        return str(base + _standard_colors.index(word))
+    if word.startswith('bright_') and word[7:] in _standard_colors:
+        return str(base + 60 + _standard_colors.index(word[7:]))
+
+    match = _color_number_pattern.fullmatch(word)
+    if match is not None:
+        return str(base + 8) + ';5;' + str(min(int(match.group(1)), 255))
+
+    if word.startswith('#') and len(word) == 7:
+        try:
+            rgb = (int(word[1:3], 16), int(word[3:5], 16), int(word[5:7], 16))
+        except ValueError:
+            return None
+    else:
+        match = _rgb_pattern.fullmatch(word)
+        if match is None:
+            return None
+        rgb = (
+            min(int(match.group(1)), 255),
+            min(int(match.group(2)), 255),
+            min(int(match.group(3)), 255),
+        )
+
+    if truecolor:
+        return str(base + 8) + ';2;' + ';'.join(str(value) for value in rgb)
+    else:
+        return str(base + 8) + ';5;' + str(_rgb_to_256(*rgb))
+
+
+def _rgb_to_256(red: int, green: int, blue: int) -> int:
+    """approximate rgb color with the 6x6x6 cube of 256 color terminals"""
+
+    def to_cube(value: int) -> int:
+        if value < 48:
+            return 0
+        elif value < 115:
+            return 1
+        else:
+            return (value - 35) // 40
+
+    return 16 + 36 * to_cube(red) + 6 * to_cube(green) + to_cube(blue)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from toolcli import exceptions
 from toolcli import spec
 
 
@@ -41,4 +42,6 @@ def add_plugin(
             extra_data_getters = {}
         for key in required_extra_data:
             if key not in extra_data and key not in extra_data_getters:
-                raise Exception('extra_data required: ' + str(key))
+                raise exceptions.ExtraDataException(
+                    'extra_data required: ' + str(key)
+                )
@@ -0,0 +1,219 @@
+"""timing of the phases of a cli invocation
+
+profiling is enabled by the `profile` config key or the TOOLCLI_PROFILE
+environment variable, set to 'table' or 'json'. the report is printed to stderr
+once the command finishes. a chrome trace (viewable in chrome://tracing or
+perfetto) is written if the `profile_trace_path` config key or the
+TOOLCLI_PROFILE_TRACE environment variable is set
+
+phases are recorded with `profile_phase()`, which does nothing unless
+profiling is active
+"""
+
+from __future__ import annotations
+
+import _thread
+import os
+import sys
+import time
+import typing
+
+from toolcli import spec
+
+
+profile_env_var = 'TOOLCLI_PROFILE'
+profile_trace_env_var = 'TOOLCLI_PROFILE_TRACE'
+
+# records of active profile, None if profiling is inactive
+_records: list[spec.PhaseTiming] | None = None
+_profile_start = 0.0
+
+
+class _Phase:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start: float | None = None
+
+    def __enter__(self) -> None:
+        if _records is not None:
+            self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        if self.start is not None:
+            record_phase(self.name, self.start, time.perf_counter())
+
+
+def profile_phase(name: str) -> typing.ContextManager[None]:
+    """time block of code as phase name, if profiling is active"""
+    return _Phase(name)
+
+
+def is_profile_active() -> bool:
+    return _records is not None
+
+
+def record_phase(name: str, start: float, end: float) -> None:
+    """record phase given perf_counter() times, if profiling is active"""
+    records = _records
+    if records is None:
+        return
+    records.append(
+        {
+            'name': name,
+            'start': start - _profile_start,
+            'duration': end - start,
+            'thread': _thread.get_ident(),
+        }
+    )
+
+
+def get_profile_settings(
+    config: spec.CLIConfig | None,
+) -> tuple[str | None, str | None]:
+    """get (report format, chrome trace path) of config and environment"""
+
+    if config is None:
+        config = {}
+    report_format: str | None = config.get('profile')
+    if report_format is None:
+        report_format = os.environ.get(profile_env_var) or None
+        if report_format in ('1', 'true'):
+            report_format = 'table'
+    trace_path = config.get('profile_trace_path')
+    if trace_path is None:
+        trace_path = os.environ.get(profile_trace_env_var) or None
+    return report_format, trace_path
+
+
+def start_profile(config: spec.CLIConfig | None = None) -> bool:
+    """start recording phases if profiling is enabled, returning whether it is
+
+    config is read before create_config() so that it can be timed as well
+    """
+    global _records, _profile_start
+
+    report_format, trace_path = get_profile_settings(config)
+    if report_format is None and trace_path is None:
+        return False
+    _profile_start = time.perf_counter()
+    _records = []
+    return True
+
+
+def finish_profile(config: spec.CLIConfig | None = None) -> None:
+    """stop recording phases and output report and trace"""
+    global _records
+
+    records = _records
+    if records is None:
+        return
+    _records = None
+
+    report_format, trace_path = get_profile_settings(config)
+    if report_format == 'table':
+        print(format_profile_table(records), file=sys.stderr)
+    elif report_format == 'json':
+        print(format_profile_json(records), file=sys.stderr)
+    elif report_format is not None:
+        raise Exception('unknown profile format: ' + str(report_format))
+    if trace_path is not None:
+        save_chrome_trace(records, trace_path)
+
+
+def get_phase_depths(
+    records: typing.Sequence[spec.PhaseTiming],
+) -> list[int]:
+    """get nesting depth of each record within phases of the same thread"""
+
+    depths = [0] * len(records)
+    stacks: dict[int, list[float]] = {}
+    order = sorted(
+        range(len(records)),
+        key=lambda i: (records[i]['start'], -records[i]['duration']),
+    )
+    for i in order:
+        record = records[i]
+        stack = stacks.setdefault(record['thread'], [])
+        while len(stack) > 0 and stack[-1] <= record['start']:
+            stack.pop()
+        depths[i] = len(stack)
+        stack.append(record['start'] + record['duration'])
+    return depths
+
+
+def format_profile_table(records: typing.Sequence[spec.PhaseTiming]) -> str:
+    """format records as table of phases ordered by start time"""
+
+    depths = get_phase_depths(records)
+    order = sorted(
+        range(len(records)),
+        key=lambda i: (records[i]['start'], depths[i]),
+    )
+    names = ['  ' * depths[i] + records[i]['name'] for i in order]
+    name_width = max([len('phase')] + [len(name) for name in names])
+
+    lines = [
+        'phase'.ljust(name_width) + '    start (ms)    duration (ms)',
+        '-' * (name_width + 31),
+    ]
+    for name, i in zip(names, order):
+        record = records[i]
+        lines.append(
+            name.ljust(name_width)
+            + ('%.3f' % (record['start'] * 1000)).rjust(14)
+            + ('%.3f' % (record['duration'] * 1000)).rjust(17)
+        )
+    lines.append('-' * (name_width + 31))
+    lines.append(
+        'total'.ljust(name_width)
+        + ' ' * 14
+        + ('%.3f' % (_get_total_duration(records) * 1000)).rjust(17)
+    )
+    return '\n'.join(lines)
+
+
+def format_profile_json(records: typing.Sequence[spec.PhaseTiming]) -> str:
+    """format records as json report, times are in seconds"""
+    import json
+
+    depths = get_phase_depths(records)
+    phases = [
+        dict(record, depth=depth) for record, depth in zip(records, depths)
+    ]
+    report = {'total': _get_total_duration(records), 'phases': phases}
+    return json.dumps(report, indent=4)
+
+
+def save_chrome_trace(
+    records: typing.Sequence[spec.PhaseTiming],
+    path: str,
+) -> None:
+    """save records in chrome trace event format"""
+    import json
+
+    pid = os.getpid()
+    events = [
+        {
+            'name': record['name'],
+            'cat': 'toolcli',
+            'ph': 'X',
+            'ts': record['start'] * 1e6,
+            'dur': record['duration'] * 1e6,
+            'pid': pid,
+            'tid': record['thread'],
+        }
+        for record in records
+    ]
+    dirname = os.path.dirname(path)
+    if len(dirname) > 0:
+        os.makedirs(dirname, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def _get_total_duration(records: typing.Sequence[spec.PhaseTiming]) -> float:
+    if len(records) == 0:
+        return 0.0
+    return max(record['start'] + record['duration'] for record in records)
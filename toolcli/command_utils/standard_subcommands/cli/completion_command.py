@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import toolcli
+from toolcli.command_utils import completion_utils
+
+
+def get_command_spec() -> toolcli.CommandSpec:
+    return {
+        'f': completion_command,
+        'help': 'print shell completion script of cli',
+        'args': [
+            {
+                'name': 'shell',
+                'help': 'shell of script',
+                'choices': ['bash', 'zsh', 'fish'],
+            },
+        ],
+        'hidden': True,
+        'extra_data': ['parse_spec'],
+    }
+
+
+def completion_command(
+    shell: completion_utils.CompletionShell,
+    parse_spec: toolcli.ParseSpec,
+) -> None:
+    base_command = parse_spec['config'].get('base_command')
+    if base_command is None:
+        raise Exception('must specify base_command in config')
+    script = completion_utils.get_completion_script(shell, base_command)
+    print(script, end='')
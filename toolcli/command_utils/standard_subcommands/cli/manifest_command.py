@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import toolcli
+from toolcli.command_utils import manifest_utils
+
+
+def get_command_spec() -> toolcli.CommandSpec:
+    return {
+        'f': manifest_build_command,
+        'help': 'build manifest of command specs for fast startup',
+        'args': [
+            {
+                'name': '--path',
+                'help': 'output path of manifest, default is command_manifest',
+            },
+        ],
+        'hidden': True,
+        'extra_data': ['parse_spec'],
+    }
+
+
+def manifest_build_command(
+    path: str | None,
+    parse_spec: toolcli.ParseSpec,
+) -> None:
+    if path is None:
+        path = parse_spec['config'].get('command_manifest')
+    if path is None:
+        raise Exception('must specify --path or command_manifest in config')
+
+    manifest = manifest_utils.build_command_manifest(parse_spec)
+    manifest_utils.save_command_manifest(manifest, path)
+
+    n_complete = sum(entry['complete'] for entry in manifest['commands'])
+    print('wrote manifest of', len(manifest['commands']), 'commands to', path)
+    if n_complete < len(manifest['commands']):
+        print(
+            len(manifest['commands']) - n_complete,
+            'commands will still import their module to resolve their spec',
+        )
@@ -73,6 +73,20 @@ def help_command(
             return
         command_spec_reference = command_index.get(command_sequence)
         if command_spec_reference is not None:
+
+            # check cache before resolving command spec
+            help_cache_dir = help_utils.get_help_cache_dir(parse_spec)
+            if help_cache_dir is not None and not reset_cache:
+                printed = help_utils.print_cached_help(
+                    parse_spec=parse_spec,
+                    help_cache_dir=help_cache_dir,
+                    kind='subcommand',
+                    command_sequence=command_sequence,
+                    options={'hidden': hidden, 'include_subsubcommands': True},
+                )
+                if printed:
+                    return
+
             command_spec = command_parsing.resolve_command_spec(
                 command_spec_reference
             )
@@ -82,17 +96,19 @@ def help_command(
                 'command_index': parse_spec.get('command_index'),
                 'config': parse_spec['config'],
             }
-            help_utils.print_subcommand_help(sub_parse_spec, show_hidden=hidden)
+            help_utils.print_subcommand_help(
+                sub_parse_spec,
+                show_hidden=hidden,
+                reset_cache=True,  # cache was checked above
+            )
         else:
-            length = len(command_sequence)
-            prefix_of = [
-                other_command_sequence
-                for other_command_sequence in command_index.keys()
-                if other_command_sequence[:length] == command_sequence
-            ]
+            prefix_of = command_parsing.get_command_descendants(
+                command_index, command_sequence
+            )
             if len(prefix_of) > 0:
                 help_utils.print_prefix_help(
                     command_sequence=command_sequence,
                     parse_spec=parse_spec,
+                    reset_cache=reset_cache,
                 )
 
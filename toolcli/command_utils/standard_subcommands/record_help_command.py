@@ -41,6 +41,17 @@ def get_command_spec() -> spec.CommandSpec:
                 'help': 'if using --all, include hidden subcommands',
                 'action': 'store_true',
             },
+            {
+                'name': '--jobs',
+                'help': 'if using --all, number of processes to record with',
+                'type': int,
+                'default': 1,
+            },
+            {
+                'name': '--incremental',
+                'help': 'if using --all, skip subcommands with unchanged specs',
+                'action': 'store_true',
+            },
         ],
         'hidden': True,
         'extra_data': ['parse_spec'],
@@ -55,6 +66,8 @@ def record_help_command(
     category: str | None = None,
     record_all: bool = False,
     include_hidden: bool = False,
+    jobs: int = 1,
+    incremental: bool = False,
 ) -> None:
 
     if record_all:
@@ -63,6 +76,8 @@ def record_help_command(
             parse_spec=parse_spec,
             overwrite=overwrite,
             include_hidden=include_hidden,
+            jobs=jobs,
+            incremental=incremental,
         )
     else:
         record_single_help_command(
@@ -111,7 +126,7 @@ def record_single_help_command(
             command_sequence=tuple(subcommand),
             command_spec=None,
             config=parse_spec['config'],
-            add_standard_subcommands=False,
+            prepare_index=False,
         )
         help_utils.print_subcommand_help(
             parse_spec=new_parse_spec,
@@ -158,6 +173,8 @@ def record_all_help_commands(
     overwrite: bool,
     parse_spec: spec.ParseSpec,
     include_hidden: bool = False,
+    jobs: int = 1,
+    incremental: bool = False,
 ) -> None:
 
     if path is None:
@@ -180,23 +197,31 @@ def record_all_help_commands(
             other = 'other'
 
     # record help of root command
-    record_single_help_command(
-        subcommand=(),
-        overwrite=overwrite,
-        parse_spec=parse_spec,
-        path=None,
-    )
+    tasks: list[_RecordTask] = [((), None, None)]
 
     # record help of each subcommand
+    command_specs: dict[spec.CommandSequence, spec.CommandSpec] = {}
     for command_sequence, command_spec_ref in command_index.items():
 
+        # root help is recorded above, but its fingerprint covers root spec
         if command_sequence == ():
+            if incremental:
+                command_specs[()] = parsing.resolve_command_spec(
+                    command_spec_ref
+                )
             continue
 
         # skip hidden commands
-        if not include_hidden:
-            command_spec = parsing.resolve_command_spec(command_spec_ref)
-            if command_spec.get('hidden'):
+        if incremental or not include_hidden:
+            if incremental:
+                # fingerprints need every field of spec, not only help fields
+                command_spec = parsing.resolve_command_spec(command_spec_ref)
+            else:
+                command_spec = parsing.resolve_command_spec_metadata(
+                    command_spec_ref
+                )
+            command_specs[command_sequence] = command_spec
+            if not include_hidden and command_spec.get('hidden'):
                 continue
 
         # determine path
@@ -206,13 +231,7 @@ def record_all_help_commands(
         else:
             subcommand_path = os.path.join(path, 'subcommands')
 
-        # record command
-        record_single_help_command(
-            subcommand=command_sequence,
-            overwrite=overwrite,
-            parse_spec=parse_spec,
-            path=subcommand_path,
-        )
+        tasks.append((command_sequence, subcommand_path, None))
 
     # record help of each subcommand category
     if help_subcommand_categories is not None:
@@ -226,10 +245,235 @@ def record_all_help_commands(
 
         # record help of each category
         for category in categories:
-            record_single_help_command(
-                subcommand=(),
-                overwrite=overwrite,
-                parse_spec=parse_spec,
-                category=category,
-                path=os.path.join(path, 'categories', category + '__help.html'),
+            category_path = os.path.join(
+                path, 'categories', category + '__help.html'
+            )
+            tasks.append(((), category_path, category))
+
+    # skip tasks whose output is up to date
+    if incremental:
+        fingerprints_path = os.path.join(path, _fingerprints_filename)
+        old_fingerprints = _load_fingerprints(fingerprints_path)
+        fingerprints = _get_task_fingerprints(tasks, command_specs, parse_spec)
+        tasks = [
+            task
+            for task in tasks
+            if old_fingerprints.get(_get_task_key(task))
+            != fingerprints[_get_task_key(task)]
+            or not os.path.isfile(_get_task_path(task))
+        ]
+        overwrite = True
+
+    # record help
+    if jobs > 1 and len(tasks) > 1:
+        _record_tasks_in_parallel(tasks, parse_spec, overwrite, jobs)
+    else:
+        for task in tasks:
+            _record_task(task, parse_spec, overwrite)
+
+    if incremental:
+        _save_fingerprints(fingerprints_path, fingerprints)
+
+
+#
+# # parallel recording
+#
+
+# (subcommand, path, category)
+_RecordTask = typing.Tuple[
+    spec.CommandSequence, typing.Optional[str], typing.Optional[str]
+]
+
+_worker_parse_spec: spec.ParseSpec | None = None
+_worker_overwrite: bool = False
+
+
+def _record_task(
+    task: _RecordTask, parse_spec: spec.ParseSpec, overwrite: bool
+) -> None:
+    subcommand, path, category = task
+    record_single_help_command(
+        subcommand=subcommand,
+        overwrite=overwrite,
+        parse_spec=parse_spec,
+        path=path,
+        category=category,
+    )
+
+
+def _record_task_in_worker(task: _RecordTask) -> None:
+    if _worker_parse_spec is None:
+        raise Exception('worker parse_spec not initialized')
+    _record_task(task, _worker_parse_spec, _worker_overwrite)
+
+
+def _record_tasks_in_parallel(
+    tasks: typing.Sequence[_RecordTask],
+    parse_spec: spec.ParseSpec,
+    overwrite: bool,
+    jobs: int,
+) -> None:
+    """record tasks using a pool of forked processes
+
+    parse_spec is inherited by forked workers rather than pickled, because
+    configs commonly contain lambdas and other unpicklable objects
+    """
+    import concurrent.futures
+    import multiprocessing
+
+    global _worker_parse_spec
+    global _worker_overwrite
+
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        for task in tasks:
+            _record_task(task, parse_spec, overwrite)
+        return
+
+    # create output directories up front to avoid races between workers
+    for task in tasks:
+        parent = os.path.dirname(_get_task_path(task))
+        if len(parent) > 0:
+            os.makedirs(parent, exist_ok=True)
+
+    _worker_parse_spec = parse_spec
+    _worker_overwrite = overwrite
+    try:
+        context = multiprocessing.get_context('fork')
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, mp_context=context
+        ) as executor:
+            for _ in executor.map(_record_task_in_worker, tasks):
+                pass
+    finally:
+        _worker_parse_spec = None
+        _worker_overwrite = False
+
+
+#
+# # incremental recording
+#
+
+_fingerprints_filename = '.help_fingerprints.json'
+
+
+def _get_task_key(task: _RecordTask) -> str:
+    subcommand, path, category = task
+    return ' '.join(subcommand) + '|' + str(category)
+
+
+def _get_task_path(task: _RecordTask) -> str:
+    subcommand, path, category = task
+    if path is not None and '.' not in os.path.basename(path):
+        return get_default_subcommand_path(subcommand, directory=path)
+    elif path is None:
+        return get_default_subcommand_path(subcommand)
+    else:
+        return path
+
+
+def get_command_spec_fingerprint(command_spec: spec.CommandSpec) -> str:
+    """compute fingerprint of command spec that is stable across processes"""
+    import hashlib
+    import json
+
+    as_str = json.dumps(command_spec, sort_keys=True, default=_stable_repr)
+    return hashlib.md5(as_str.encode()).hexdigest()
+
+
+def _stable_repr(value: typing.Any) -> str:
+    """get repr of value that is stable across processes
+
+    functions are identified by their code, so that lambdas of the same
+    qualname are distinguished and edits of function bodies are detected
+    """
+    import hashlib
+
+    module = getattr(value, '__module__', None)
+    qualname = getattr(value, '__qualname__', None)
+    if module is not None and qualname is not None:
+        as_str = str(module) + '.' + str(qualname)
+        code = getattr(value, '__code__', None)
+        if code is not None:
+            # nested code objects are omitted, their reprs hold addresses
+            consts = [
+                const
+                for const in code.co_consts
+                if not hasattr(const, 'co_code')
+            ]
+            code_hash = hashlib.md5(
+                code.co_code + repr(consts).encode()
+            ).hexdigest()
+            as_str += ':' + str(code.co_firstlineno) + ':' + code_hash
+        return as_str
+    else:
+        return type(value).__name__
+
+
+def _get_task_fingerprints(
+    tasks: typing.Sequence[_RecordTask],
+    command_specs: typing.Mapping[spec.CommandSequence, spec.CommandSpec],
+    parse_spec: spec.ParseSpec,
+) -> dict[str, str]:
+    """compute fingerprint of the inputs that the output of each task uses"""
+    import hashlib
+    import json
+
+    config = parse_spec['config']
+    command_index = parse_spec['command_index']
+    if command_index is None:
+        raise Exception('must specify command_index')
+    config_str = json.dumps(
+        [
+            config.get('base_command'),
+            config.get('description'),
+            config.get('style_theme'),
+        ],
+        sort_keys=True,
+        default=_stable_repr,
+    )
+    spec_fingerprints = {
+        command_sequence: get_command_spec_fingerprint(command_spec)
+        for command_sequence, command_spec in command_specs.items()
+    }
+
+    fingerprints = {}
+    for task in tasks:
+        subcommand = task[0]
+        if subcommand == ():
+            # root and category help depend on every subcommand
+            items = sorted(spec_fingerprints.items())
+        else:
+            # subcommand help depends on the subcommand and its children
+            items = sorted(
+                (command_sequence, spec_fingerprints[command_sequence])
+                for command_sequence in parsing.get_command_descendants(
+                    command_index, subcommand
+                )
+                if command_sequence in spec_fingerprints
             )
+        data = config_str + str(items) + _get_task_key(task)
+        fingerprints[_get_task_key(task)] = hashlib.md5(
+            data.encode()
+        ).hexdigest()
+
+    return fingerprints
+
+
+def _load_fingerprints(path: str) -> dict[str, str]:
+    import json
+
+    try:
+        with open(path, 'r') as f:
+            fingerprints: dict[str, str] = json.load(f)
+            return fingerprints
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_fingerprints(
+    path: str, fingerprints: typing.Mapping[str, str]
+) -> None:
+    import json
+
+    with open(path, 'w') as f:
+        json.dump(fingerprints, f, indent=4, sort_keys=True)
@@ -0,0 +1,357 @@
+"""resident daemon that runs cli commands on behalf of a thin client
+
+the daemon imports the command index once and forks a child process for each
+request, so every invocation starts with warm imports and resolved specs. the
+client forwards its argv, cwd, environment, and stdio file descriptors over a
+unix socket, then exits with the exit code of the command.
+
+example entry point of a tool:
+
+    exit_code = toolcli.run_client(socket_path)
+    if exit_code is None:
+        toolcli.run_cli(command_index=command_index, config=config)
+    else:
+        sys.exit(exit_code)
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import typing
+
+if typing.TYPE_CHECKING:
+    import socket
+
+    from . import spec
+
+
+_header_size = 4
+
+
+def run_client(
+    socket_path: str,
+    raw_command: typing.Sequence[str] | None = None,
+) -> int | None:
+    """forward command to daemon and return exit code
+
+    returns None if no daemon is listening on socket_path, in which case the
+    caller should run the command itself
+    """
+    import array
+    import json
+    import socket
+    import struct
+
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+
+    if raw_command is None:
+        raw_command = sys.argv[1:]
+    request = {
+        'raw_command': list(raw_command),
+        'argv0': sys.argv[0],
+        'cwd': os.getcwd(),
+        'env': dict(os.environ),
+    }
+    payload = json.dumps(request).encode()
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        return None
+
+    with client:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        # send request along with stdio file descriptors
+        streams = [sys.stdin, sys.stdout, sys.stderr]
+        fds = array.array(
+            'i', [_get_fd(stream, fd) for fd, stream in enumerate(streams)]
+        )
+        message = struct.pack('!I', len(payload)) + payload
+        sent = client.sendmsg(
+            [message], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds)]
+        )
+        client.sendall(message[sent:])
+
+        # wait for exit code
+        response = _recv_exactly(client, _header_size)
+        if len(response) < _header_size:
+            return 1
+        exit_code: int = struct.unpack('!i', response)[0]
+        return exit_code
+
+
+def run_daemon(
+    socket_path: str,
+    command_index: spec.CommandIndex | None = None,
+    command_spec: spec.CommandSpec | None = None,
+    config: spec.CLIConfig | None = None,
+    preload: bool = True,
+) -> None:
+    """serve commands from run_client() until interrupted
+
+    if preload is True, every command module in the index is imported and
+    every command spec is resolved before serving requests
+
+    the socket is only accessible to the current user, and connections from
+    other users are rejected where the platform reports peer credentials. an
+    existing file at socket_path is only replaced if it is a stale socket
+    """
+    import signal
+    import socket
+
+    if preload:
+        _preload_commands(command_index, command_spec, config)
+
+    _remove_stale_socket(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        server.bind(socket_path)
+    finally:
+        os.umask(old_umask)
+    os.chmod(socket_path, 0o600)
+    socket_inode = os.stat(socket_path).st_ino
+    server.listen()
+
+    # let the kernel reap finished children
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    try:
+        while True:
+            connection, _ = server.accept()
+            try:
+                peer_uid = _get_peer_uid(connection)
+                if peer_uid is not None and peer_uid != os.getuid():
+                    print(
+                        'rejected connection from uid',
+                        peer_uid,
+                        file=sys.stderr,
+                    )
+                    continue
+                _handle_connection(
+                    server=server,
+                    connection=connection,
+                    command_index=command_index,
+                    command_spec=command_spec,
+                    config=config,
+                )
+            except Exception as e:
+                print('could not handle request:', e, file=sys.stderr)
+            finally:
+                connection.close()
+    finally:
+        server.close()
+        try:
+            if os.stat(socket_path).st_ino == socket_inode:
+                os.remove(socket_path)
+        except OSError:
+            pass
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """remove socket left behind by a daemon that is no longer running"""
+    import socket
+    import stat
+
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise Exception('path exists and is not a socket: ' + socket_path)
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise Exception('daemon already listening on ' + socket_path)
+
+
+def _get_peer_uid(connection: socket.socket) -> int | None:
+    """get uid of peer of unix socket connection, if platform supports it"""
+    import socket
+    import struct
+
+    so_peercred = getattr(socket, 'SO_PEERCRED', None)
+    if so_peercred is None:
+        return None
+    credentials = connection.getsockopt(
+        socket.SOL_SOCKET, so_peercred, struct.calcsize('3i')
+    )
+    pid, uid, gid = struct.unpack('3i', credentials)
+    return typing.cast(int, uid)
+
+
+def _preload_commands(
+    command_index: spec.CommandIndex | None,
+    command_spec: spec.CommandSpec | None,
+    config: spec.CLIConfig | None,
+) -> None:
+    """import command modules and resolve command specs and functions"""
+    from . import spec
+    from .command_utils import execution
+    from .command_utils import parsing
+
+    # plugins add help categories in-place, so prepare index on a copy. config
+    # is not deep copied because extra_data may hold uncopyable objects
+    preload_config = spec.create_config(config).copy()
+    categories = preload_config.get('help_subcommand_categories')
+    if categories is not None:
+        preload_config['help_subcommand_categories'] = dict(categories)
+    prepared_index = parsing.prepare_command_index(
+        command_index=command_index,
+        config=preload_config,
+        add_standard_subcommands=command_spec is None,
+    )
+
+    execution.preresolve_functions(preload_config)
+
+    command_specs = []
+    if command_spec is not None:
+        command_specs.append(command_spec)
+    if prepared_index is not None:
+        for reference in prepared_index.values():
+            try:
+                command_specs.append(parsing.resolve_command_spec(reference))
+            except Exception:
+                pass
+    for resolved in command_specs:
+        if 'f' in resolved:
+            try:
+                execution.resolve_function(resolved['f'])
+            except Exception:
+                pass
+
+
+def _handle_connection(
+    server: socket.socket,
+    connection: socket.socket,
+    command_index: spec.CommandIndex | None,
+    command_spec: spec.CommandSpec | None,
+    config: spec.CLIConfig | None,
+) -> None:
+    import array
+    import json
+    import socket
+    import struct
+
+    # receive header along with stdio file descriptors
+    fds = array.array('i')
+    header, ancdata, _, _ = connection.recvmsg(
+        _header_size, socket.CMSG_LEN(3 * fds.itemsize)
+    )
+    for level, type_, data in ancdata:
+        if level == socket.SOL_SOCKET and type_ == socket.SCM_RIGHTS:
+            fds.frombytes(data[: len(data) - (len(data) % fds.itemsize)])
+    try:
+        header += _recv_exactly(connection, _header_size - len(header))
+        if len(header) < _header_size or len(fds) != 3:
+            raise Exception('malformed request')
+        (size,) = struct.unpack('!I', header)
+        request = json.loads(_recv_exactly(connection, size).decode())
+
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                server.close()
+                exit_code = _run_request(
+                    request=request,
+                    fds=list(fds),
+                    command_index=command_index,
+                    command_spec=command_spec,
+                    config=config,
+                )
+            finally:
+                try:
+                    connection.sendall(struct.pack('!i', exit_code))
+                finally:
+                    os._exit(0)
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+
+def _run_request(
+    request: typing.Mapping[str, typing.Any],
+    fds: typing.Sequence[int],
+    command_index: spec.CommandIndex | None,
+    command_spec: spec.CommandSpec | None,
+    config: spec.CLIConfig | None,
+) -> int:
+    """run request inside forked child process, returning exit code"""
+    import signal
+
+    from .command_utils import execution
+
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+    # adopt stdio, cwd, and environment of client
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for target, fd in zip((0, 1, 2), fds):
+        os.dup2(fd, target)
+    sys.stdin = open(0, 'r', closefd=False)
+    stdout_buffering = 1 if os.isatty(1) else -1
+    sys.stdout = open(1, 'w', buffering=stdout_buffering, closefd=False)
+    sys.stderr = open(2, 'w', buffering=1, closefd=False)
+    os.chdir(request['cwd'])
+    os.environ.clear()
+    os.environ.update(request['env'])
+    sys.argv = [request['argv0']] + list(request['raw_command'])
+
+    try:
+        exit_code = execution.run_cli(
+            raw_command=list(request['raw_command']),
+            command_index=command_index,
+            command_spec=command_spec,
+            config=config,
+        )
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+    return exit_code
+
+
+def _get_fd(stream: typing.Any, default: int) -> int:
+    try:
+        fd: int = stream.fileno()
+        return fd
+    except Exception:
+        return default
+
+
+def _recv_exactly(connection: socket.socket, size: int) -> bytes:
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = connection.recv(remaining)
+        if len(chunk) == 0:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
@@ -1,6 +1,47 @@
 from __future__ import annotations
 
+import typing
+
 
 class CDException(Exception):
     pass
 
+
+class CLIException(Exception):
+    """base class of errors raised while running a cli
+
+    exit_code is the exit code of the cli when the error is not raised
+    """
+
+    exit_code = 1
+
+
+class UnknownCommandException(CLIException):
+    """raw command does not match any command sequence"""
+
+    exit_code = 2
+
+    def __init__(self, message: str, raw_command: typing.Any = None) -> None:
+        super().__init__(message)
+        self.raw_command = raw_command
+
+
+class ArgumentException(CLIException):
+    """args of raw command are invalid for the command's arg specs"""
+
+    exit_code = 2
+
+
+class ExtraDataException(CLIException):
+    """extra_data required by a command or plugin is not available"""
+
+
+class CommandException(CLIException):
+    """command function or middleware failed
+
+    the original exception is available as __cause__
+    """
+
+    def __init__(self, message: str, exit_code: int = 1) -> None:
+        super().__init__(message)
+        self.exit_code = exit_code
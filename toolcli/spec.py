@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-import argparse
 import types
 import typing
 from typing_extensions import TypedDict, Literal, Protocol
 
+if typing.TYPE_CHECKING:
+    import argparse
+
 #
 # # types
 #
@@ -79,6 +81,8 @@ class CommandSpec(TypedDict, total=False):
     examples: typing.Sequence[str] | typing.Mapping[str, str | CallExample]
     hidden: bool
     extra_data: typing.Sequence[str]
+    dynamic: bool  # resolve spec again on every call instead of caching it
+    imports: typing.Sequence[str]  # modules to warm import, see warm_import
 
 
 CommandSequence = typing.Tuple[str, ...]
@@ -96,6 +100,17 @@ MutableCommandIndex = typing.MutableMapping[
 RawCommand = typing.Union[str, typing.List[str]]
 
 
+class CommandTrie(TypedDict):
+    sequence: typing.Optional[CommandSequence]
+    position: typing.Optional[int]
+    children: typing.Dict[str, CommandTrie]
+
+
+class CommandPrefixIndex(TypedDict):
+    # sequences that start with each prefix, in command index order
+    descendants: typing.Dict[CommandSequence, typing.List[CommandSequence]]
+
+
 class ParseSpec(TypedDict):
     command_index: typing.Optional[CommandIndex]
     command_sequence: typing.Optional[CommandSequence]
@@ -105,6 +120,23 @@ class ParseSpec(TypedDict):
 
 ParsedArgs = typing.Dict[str, typing.Any]
 
+
+class CommandResult(TypedDict):
+    raw_command: RawCommand
+    success: bool
+    exit_code: int
+    stdout: typing.Optional[str]
+    stderr: typing.Optional[str]
+    exception: typing.Optional[BaseException]
+
+
+class PhaseTiming(TypedDict):
+    name: str
+    start: float  # seconds since start of profile
+    duration: float  # seconds
+    thread: int
+
+
 # the first argument to MiddlewareFunction should be CLIState
 # however, mypy does not currently support recursive types
 # see https://github.com/python/mypy/issues/731
@@ -114,6 +146,25 @@ MiddlewareSpec = typing.Union['MiddlewareFunction', FunctionReference]
 MiddlewareSpecs = typing.List['MiddlewareSpec']
 
 
+class HelpConsole(Protocol):
+    """console used to render help, such as rich.console.Console"""
+
+    def print(
+        self,
+        *objects: typing.Any,
+        sep: str = ' ',
+        end: str = '\n',
+        style: typing.Any = None,
+    ) -> None:
+        pass
+
+    def begin_capture(self) -> None:
+        pass
+
+    def end_capture(self) -> str:
+        pass
+
+
 class HelpUrlGetter(Protocol):
     def __call__(
         self,
@@ -141,6 +192,7 @@ class CLIConfig(TypedDict, total=False):
         'known',
         'intermixed',
         'known_intermixed',
+        'fast',
     ]
     async_context_manager: typing.Callable[
         ..., typing.AsyncContextManager[typing.Any]
@@ -153,7 +205,13 @@ class CLIConfig(TypedDict, total=False):
     style_theme: StyleTheme
     extra_data: typing.Mapping[str, typing.Any]
     extra_data_getters: typing.Mapping[str, typing.Callable[..., typing.Any]]
+    concurrent_extra_data: bool
+    cache_extra_data: bool
+    preresolve_functions: bool
     plugins: typing.Sequence[Plugin]
+    command_manifest: str | None
+    error_mode: Literal['exit', 'raise', 'return']
+    warm_import: bool
     #
     # middleware
     pre_middlewares: 'MiddlewareSpecs'
@@ -166,6 +224,7 @@ class CLIConfig(TypedDict, total=False):
         [], typing.Mapping[str, str]
     ]
     help_url_getter: HelpUrlGetter
+    help_renderer: Literal['plain', 'rich']
     help_cache_dir: str | None
     help_subcommand_categories: typing.MutableMapping[CommandSequence, str]
     root_help_arguments: bool
@@ -173,6 +232,10 @@ class CLIConfig(TypedDict, total=False):
     #
     # standard args
     include_debug_arg: bool
+    #
+    # profiling
+    profile: Literal['table', 'json'] | None
+    profile_trace_path: str | None
 
 
 default_config: CLIConfig = {
@@ -210,5 +273,11 @@ def create_config(config: typing.Optional[CLIConfig] = None) -> CLIConfig:
         config = {}
     new_config = copy.copy(default_config)
     new_config.update(config)
+
+    if new_config.get('preresolve_functions'):
+        from .command_utils import execution
+
+        execution.preresolve_functions(new_config)
+
     return new_config
 